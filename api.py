@@ -0,0 +1,246 @@
+#----------------------------------------------------------------------------#
+# JSON API, version 1.
+#
+#   GET /api/v1/venues[?fields=id,name&genre=&city=&state=&after=<id>&limit=]
+#   GET /api/v1/venues/<id>[?fields=]
+#   GET /api/v1/artists[?fields=id,name&genre=&city=&state=&after=<id>&limit=]
+#   GET /api/v1/artists/<id>[?fields=]
+#   GET /api/v1/shows[?fields=&venue_id=&artist_id=&after=<cursor>&before=<cursor>&limit=]
+#   GET /api/v1/shows/pending/<token>
+#   GET /api/v1/export/<venues|artists|shows>[?format=csv|jsonl|columns&gzip=1]
+#
+# Lists are keyset paginated and link to the next page. ?fields= selects the
+# columns that are fetched and serialized. The queries are the ones behind
+# the HTML views (see queries.py).
+#----------------------------------------------------------------------------#
+
+import json
+
+from flask import Blueprint, Response, abort, current_app, request, stream_with_context, url_for
+from werkzeug.exceptions import HTTPException
+
+from bulk import export_formats, export_stream, export_tables
+from models import db, Venue, Artist
+from queries import (
+  filter_by_genre, genre_names_by_id, venue_with_shows, artist_with_shows,
+  split_shows, shows_page)
+
+try:
+  import orjson
+except ImportError:
+  orjson = None
+
+api = Blueprint('api_v1', __name__, url_prefix='/api/v1')
+
+venue_fields = {
+  'id': Venue.id,
+  'name': Venue.name,
+  'city': Venue.city,
+  'state': Venue.state,
+  'address': Venue.address,
+  'phone': Venue.phone,
+  'image_link': Venue.image_link,
+  'facebook_link': Venue.facebook_link,
+  'website_link': Venue.website_link,
+  'seeking_talent': Venue.seeking_talent,
+  'seeking_description': Venue.seeking_description,
+  'num_upcoming_shows': Venue.upcoming_shows_count,
+  'num_past_shows': Venue.past_shows_count,
+  'genres': None,
+}
+
+artist_fields = {
+  'id': Artist.id,
+  'name': Artist.name,
+  'city': Artist.city,
+  'state': Artist.state,
+  'phone': Artist.phone,
+  'image_link': Artist.image_link,
+  'facebook_link': Artist.facebook_link,
+  'website_link': Artist.website_link,
+  'seeking_venue': Artist.seeking_venue,
+  'seeking_description': Artist.seeking_description,
+  'num_upcoming_shows': Artist.upcoming_shows_count,
+  'num_past_shows': Artist.past_shows_count,
+  'genres': None,
+}
+
+show_fields = (
+  'id', 'start_time', 'venue_id', 'venue_name', 'venue_image_link',
+  'artist_id', 'artist_name', 'artist_image_link')
+
+default_list_fields = ('id', 'name', 'city', 'state', 'num_upcoming_shows')
+
+
+#----------------------------------------------------------------------------#
+# Helpers.
+#----------------------------------------------------------------------------#
+
+def _default(value):
+  if hasattr(value, 'isoformat'):
+    return value.isoformat()
+  raise TypeError('{!r} is not JSON serializable'.format(value))
+
+def json_response(payload, status=200):
+  # orjson (see requirements.txt) is several times faster than json on large
+  # pages; json is only the fallback for platforms without an orjson wheel.
+  if orjson is not None:
+    body = orjson.dumps(payload, default=_default)
+  else:
+    body = json.dumps(payload, default=_default, separators=(',', ':'))
+  return Response(body, status=status, mimetype='application/json')
+
+def selected_fields(available, default):
+  fields = request.args.get('fields')
+  if not fields:
+    return list(default)
+  names = [name.strip() for name in fields.split(',') if name.strip()]
+  unknown = [name for name in names if name not in available]
+  if unknown:
+    abort(400, 'Unknown fields: {}'.format(', '.join(unknown)))
+  return names
+
+def page_size():
+  limit = request.args.get('limit', current_app.config['API_PAGE_SIZE'], type=int)
+  return max(1, min(limit, current_app.config['API_MAX_PAGE_SIZE']))
+
+def next_page_url(**cursor):
+  args = request.args.to_dict()
+  args.pop('after', None)
+  args.pop('before', None)
+  args.update(cursor)
+  return url_for(request.endpoint, _external=True, **args)
+
+def list_entities(model, available):
+  # One keyset page of venues or artists, fetching only the selected columns.
+  fields = selected_fields(available, default_list_fields)
+  limit = page_size()
+  columns = [available[name].label(name) for name in fields if name not in ('id', 'genres')]
+  entity_query = db.session.query(model.id.label('id'), *columns)
+
+  genre = request.args.get('genre')
+  if genre:
+    entity_query = filter_by_genre(entity_query, model, genre)
+  for name in ('city', 'state'):
+    value = request.args.get(name)
+    if value:
+      entity_query = entity_query.filter(available[name] == value)
+  after = request.args.get('after')
+  if after is not None:
+    try:
+      after = int(after)
+    except ValueError:
+      abort(400, 'Malformed cursor')
+    entity_query = entity_query.filter(model.id > after)
+
+  rows = entity_query.order_by(model.id).limit(limit + 1).all()
+  has_more = len(rows) > limit
+  rows = rows[:limit]
+  genres = genre_names_by_id(model, [row.id for row in rows]) if 'genres' in fields else {}
+
+  data = []
+  for row in rows:
+    data.append(dict(
+      (name, genres[row.id] if name == 'genres' else getattr(row, name)) for name in fields))
+  return json_response({
+    'data': data,
+    'next': next_page_url(after=rows[-1].id) if has_more else None,
+  })
+
+def entity_detail(entity, available, counterpart):
+  fields = selected_fields(available, available)
+  data = {}
+  for name in fields:
+    if name == 'genres':
+      data[name] = [genre.name for genre in entity.genres]
+    else:
+      data[name] = getattr(entity, available[name].key)
+
+  past_shows, upcoming_shows = split_shows(entity.shows)
+  for key, shows_list in (('past_shows', past_shows), ('upcoming_shows', upcoming_shows)):
+    data[key] = []
+    for show in shows_list:
+      other = getattr(show, counterpart)
+      data[key].append({
+        'id': show.id,
+        'start_time': show.start_time,
+        counterpart + '_id': other.id,
+        counterpart + '_name': other.name,
+        counterpart + '_image_link': other.image_link,
+      })
+  return json_response({'data': data})
+
+
+#----------------------------------------------------------------------------#
+# Endpoints.
+#----------------------------------------------------------------------------#
+
+@api.route('/venues')
+def list_venues():
+  return list_entities(Venue, venue_fields)
+
+@api.route('/venues/<int:venue_id>')
+def get_venue(venue_id):
+  venue = venue_with_shows(venue_id)
+  if venue is None:
+    abort(404, 'Venue {} does not exist'.format(venue_id))
+  return entity_detail(venue, venue_fields, 'artist')
+
+@api.route('/artists')
+def list_artists():
+  return list_entities(Artist, artist_fields)
+
+@api.route('/artists/<int:artist_id>')
+def get_artist(artist_id):
+  artist = artist_with_shows(artist_id)
+  if artist is None:
+    abort(404, 'Artist {} does not exist'.format(artist_id))
+  return entity_detail(artist, artist_fields, 'venue')
+
+@api.route('/shows')
+def list_shows():
+  fields = selected_fields(show_fields, show_fields)
+  try:
+    page, prev_cursor, next_cursor = shows_page(
+      page_size(),
+      after=request.args.get('after'),
+      before=request.args.get('before'),
+      venue_id=request.args.get('venue_id', type=int),
+      artist_id=request.args.get('artist_id', type=int))
+  except ValueError:
+    abort(400, 'Malformed cursor')
+  return json_response({
+    'data': [dict((name, getattr(show, name)) for name in fields) for show in page],
+    'prev': next_page_url(before=prev_cursor) if prev_cursor else None,
+    'next': next_page_url(after=next_cursor) if next_cursor else None,
+  })
+
+@api.route('/shows/pending/<token>')
+def pending_show(token):
+  # Whether a show queued by the write-behind mode was saved (see writebehind.py).
+  status = current_app.extensions['show_writer'].queue.status(token)
+  if status is None:
+    abort(404, 'No show was queued as {}'.format(token))
+  return json_response(status)
+
+@api.route('/export/<table>')
+def export(table):
+  # Streams the whole table; see bulk.py.
+  export_format = request.args.get('format', 'csv')
+  if table not in export_tables:
+    abort(404, 'Unknown table: {}'.format(table))
+  if export_format not in export_formats:
+    abort(400, 'Unknown format: {}'.format(export_format))
+  compress = request.args.get('gzip') in ('1', 'true')
+  filename = '{}.{}'.format(table, 'jsonl' if export_format == 'columns' else export_format)
+  response = Response(
+    stream_with_context(export_stream(table, export_format, compress=compress)),
+    mimetype=export_formats[export_format])
+  if compress:
+    response.headers['Content-Encoding'] = 'gzip'
+  response.headers['Content-Disposition'] = 'attachment; filename="{}"'.format(filename)
+  return response
+
+@api.errorhandler(HTTPException)
+def api_error(error):
+  return json_response({'error': error.name, 'message': error.description}, error.code)
@@ -0,0 +1,206 @@
+#----------------------------------------------------------------------------#
+# Static asset bundles.
+#
+# `flask assets build` concatenates the stylesheets and scripts of
+# layouts/main.html into three bundles, minifies the CSS, and writes each one
+# to static/build/ under a content-hashed name, next to .gz (and, when the
+# brotli package is installed, .br) copies. static/build/manifest.json maps
+# the bundle names to the hashed files; url_for('static', filename=
+# 'build/fyyur.css') returns the hashed URL, and the hashed files are served
+# precompressed with an immutable Cache-Control header.
+#
+# Without a manifest (or with ASSETS_BUNDLED=0) asset_urls() lists the
+# source files, so a checkout works without a build step. Old builds are left
+# in place: pages rendered before a deploy still point at them.
+#----------------------------------------------------------------------------#
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import time
+
+import click
+from flask import current_app, request, send_from_directory, url_for
+from flask.cli import AppGroup
+
+from files import write_atomic
+
+assets_cli = AppGroup('assets', help='Build the static asset bundles.')
+
+BUILD_DIR = 'build'
+MANIFEST = 'manifest.json'
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+# Bundle name: source files under static/, in page order.
+BUNDLES = {
+    'fyyur.css': [
+        'css/bootstrap.min.css',
+        'css/layout.main.css',
+        'css/main.css',
+        'css/main.responsive.css',
+        'css/main.quickfix.css',
+    ],
+    # Loaded with defer in <head>: fetched while the page is parsed, and run
+    # before fyyur.js. No inline script uses them.
+    'head.js': [
+        'js/libs/modernizr-2.8.2.min.js',
+        'js/libs/moment.min.js',
+        'js/script.js',
+    ],
+    # Loaded with defer at the end of <body>.
+    'fyyur.js': [
+        'js/libs/jquery-1.11.1.min.js',
+        'js/libs/bootstrap-3.1.1.min.js',
+        'js/plugins.js',
+    ],
+}
+
+CSS_COMMENT = re.compile(r'/\*.*?\*/', re.S)
+CSS_SPACE_AROUND = re.compile(r'\s*([{};,])\s*')
+SOURCE_MAP = re.compile(r'^\s*//[#@] sourceMappingURL=.*$', re.M)
+
+
+def minify_css(source):
+    # Comments and layout whitespace only; the bundles are built from plain
+    # stylesheets, with no comment markers inside strings.
+    source = CSS_COMMENT.sub('', source)
+    source = CSS_SPACE_AROUND.sub(r'\1', ' '.join(source.split()))
+    return source.replace(';}', '}')
+
+def join_js(sources):
+    # The libraries ship minified; the source maps they name do not match a
+    # bundle, so their references are dropped.
+    return '\n;'.join(SOURCE_MAP.sub('', source).strip() for source in sources) + '\n'
+
+def build_bundle(static_folder, name):
+    sources = []
+    for path in BUNDLES[name]:
+        with open(os.path.join(static_folder, path), encoding='utf-8') as source_file:
+            sources.append(source_file.read())
+    if name.endswith('.css'):
+        return '\n'.join(minify_css(source) for source in sources).encode('utf-8')
+    return join_js(sources).encode('utf-8')
+
+def compressed_copies(data):
+    # {suffix: bytes}; mtime=0 keeps the .gz byte-identical between builds.
+    copies = {'.gz': gzip.compress(data, 9, mtime=0)}
+    try:
+        import brotli
+    except ImportError:
+        return copies
+    copies['.br'] = brotli.compress(data, quality=11)
+    return copies
+
+
+class AssetManifest(object):
+    """Resolves one app's bundle URLs through its manifest and serves hashed files."""
+
+    # Content-Encoding: file suffix, in order of preference.
+    ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+    def __init__(self, static_folder=None, send_static_file=None):
+        self.manifest = {}
+        self.encodings = {}
+        self.static_folder = static_folder
+        self._send_static_file = send_static_file
+
+    def load_manifest(self):
+        try:
+            with open(os.path.join(self.static_folder, BUILD_DIR, MANIFEST)) as manifest_file:
+                manifest = json.load(manifest_file)
+        except FileNotFoundError:
+            manifest = {}
+        encodings = {}
+        for hashed in manifest.values():
+            path = os.path.join(self.static_folder, hashed)
+            encodings[hashed] = [(encoding, suffix) for encoding, suffix in self.ENCODINGS
+                                 if os.path.exists(path + suffix)]
+        self.manifest = manifest
+        self.encodings = encodings
+
+    def asset_urls(self, name):
+        """URLs to include for a bundle: the built file, or its sources."""
+        filename = BUILD_DIR + '/' + name
+        if filename in self.manifest:
+            return [url_for('static', filename=filename)]
+        return [url_for('static', filename=path) for path in BUNDLES[name]]
+
+    def _hashed_filename(self, endpoint, values):
+        if endpoint == 'static' and values.get('filename') in self.manifest:
+            values['filename'] = self.manifest[values['filename']]
+
+    def send_static_file(self, filename):
+        if filename not in self.encodings:
+            return self._send_static_file(filename=filename)
+        suffix = ''
+        encoding = None
+        for candidate, candidate_suffix in self.encodings[filename]:
+            if request.accept_encodings[candidate]:
+                encoding, suffix = candidate, candidate_suffix
+                break
+        response = send_from_directory(
+            self.static_folder, filename + suffix,
+            mimetype=mimetypes.guess_type(filename)[0])
+        if encoding is not None:
+            response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+        response.headers['Cache-Control'] = IMMUTABLE
+        return response
+
+    def build(self):
+        """Write every bundle and then the manifest; returns the manifest."""
+        build_dir = os.path.join(self.static_folder, BUILD_DIR)
+        os.makedirs(build_dir, exist_ok=True)
+        manifest = {}
+        for name in sorted(BUNDLES):
+            data = build_bundle(self.static_folder, name)
+            stem, extension = os.path.splitext(name)
+            hashed = '{}/{}.{}{}'.format(
+                BUILD_DIR, stem, hashlib.sha256(data).hexdigest()[:12], extension)
+            path = os.path.join(self.static_folder, hashed)
+            # Served as static files, so readable by the web server too.
+            for suffix, copy in compressed_copies(data).items():
+                write_atomic(path + suffix, copy, 0o644)
+            write_atomic(path, data, 0o644)
+            manifest[BUILD_DIR + '/' + name] = hashed
+        # Last, so that no worker reads a manifest naming missing files.
+        write_atomic(os.path.join(build_dir, MANIFEST),
+                     json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'), 0o644)
+        self.load_manifest()
+        return manifest
+
+
+class Assets(object):
+    """Binds an AssetManifest to each app, as app.extensions['assets']."""
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        manifest = AssetManifest()
+        if app.has_static_folder:
+            manifest = AssetManifest(app.static_folder, app.view_functions['static'])
+            if app.config.get('ASSETS_BUNDLED', True):
+                manifest.load_manifest()
+            app.view_functions['static'] = manifest.send_static_file
+        app.url_defaults(manifest._hashed_filename)
+        app.jinja_env.globals['asset_urls'] = manifest.asset_urls
+        app.extensions['assets'] = manifest
+
+
+@assets_cli.command('build', help='Bundle, fingerprint and precompress the layout assets.')
+def build_command():
+    started = time.perf_counter()
+    assets = current_app.extensions['assets']
+    if assets.static_folder is None:
+        raise click.ClickException('The app has no static folder.')
+    for name, hashed in sorted(assets.build().items()):
+        path = os.path.join(assets.static_folder, hashed)
+        sizes = ', '.join('{} {:,} B'.format(encoding, os.path.getsize(path + suffix))
+                          for encoding, suffix in assets.encodings[hashed])
+        click.echo('{} -> {} ({:,} B; {})'.format(name, hashed, os.path.getsize(path), sizes))
+    click.echo('Built {} bundles in {:.2f}s.'.format(len(BUNDLES), time.perf_counter() - started))
@@ -0,0 +1,80 @@
+#----------------------------------------------------------------------------#
+# Per-row cost of the datetime filter on a 10k-show page: the previous path
+# (str() in the view, dateutil parse and babel.dates.format_datetime in the
+# filter) against format_datetime() with datetimes and cached patterns, and
+# a full render of pages/shows.html.
+#
+#   python benchmark_filters.py
+#   python benchmark_filters.py --rows 50000 --repeat 5
+#----------------------------------------------------------------------------#
+
+import argparse
+import time
+from datetime import datetime, timedelta
+
+import babel.dates
+import dateutil.parser
+from flask import render_template
+
+from app import create_app, format_datetime
+
+
+def previous_format_datetime(value, format='medium'):
+  date = dateutil.parser.parse(value)
+  if format == 'full':
+      format="EEEE MMMM, d, y 'at' h:mma"
+  elif format == 'medium':
+      format="EE MM, dd, y h:mma"
+  return babel.dates.format_datetime(date, format, locale='en')
+
+def best_of(repeat, function):
+  timings = []
+  for _ in range(repeat):
+    started = time.perf_counter()
+    function()
+    timings.append(time.perf_counter() - started)
+  return min(timings)
+
+def main():
+  parser = argparse.ArgumentParser(description='Benchmark the datetime template filter.')
+  parser.add_argument('--rows', type=int, default=10000)
+  parser.add_argument('--repeat', type=int, default=3, help='Best of this many runs.')
+  args = parser.parse_args()
+
+  start = datetime(2024, 1, 1, 20, 0, 0, 123456)
+  times = [start + timedelta(hours=17 * row) for row in range(args.rows)]
+  strings = [str(value) for value in times]
+  assert all(previous_format_datetime(text, 'full') == format_datetime(value, 'full')
+             for text, value in zip(strings[:100], times[:100]))
+
+  shows = [{
+    'venue_id': row, 'venue_name': 'Venue {}'.format(row),
+    'artist_id': row, 'artist_name': 'Artist {}'.format(row),
+    'artist_image_link': 'https://images.example.com/{}.jpg'.format(row),
+    'start_time': value,
+  } for row, value in enumerate(times)]
+
+  app = create_app()
+
+  def render_page():
+    with app.test_request_context('/shows'):
+      render_template('pages/shows.html', shows=shows, per_page=args.rows,
+                      next_cursor=None, prev_cursor=None)
+
+  render_page()
+  results = [
+    ('previous filter (str + parse)', best_of(args.repeat,
+      lambda: [previous_format_datetime(text, 'full') for text in strings])),
+    ('format_datetime (datetime)', best_of(args.repeat,
+      lambda: [format_datetime(value, 'full') for value in times])),
+    ('format_datetime (str)', best_of(args.repeat,
+      lambda: [format_datetime(text, 'full') for text in strings])),
+    ('render pages/shows.html', best_of(args.repeat, render_page)),
+  ]
+  print('{:<32} {:>10} {:>12}'.format('{} rows'.format(args.rows), 'total ms', 'us per row'))
+  for label, elapsed in results:
+    print('{:<32} {:>10.1f} {:>12.2f}'.format(label, elapsed * 1000, elapsed * 1e6 / args.rows))
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,119 @@
+#----------------------------------------------------------------------------#
+# Seeds a throw-away database with synthetic venues, artists and shows and
+# reports query plans and timings for the show-lookup hot paths, first
+# without and then with the indexes of the Venue and shows tables (see
+# migrations b3e1f4a9c2d7 and c1f7e2d94a08).
+#
+#   python benchmark_indexes.py --database-url sqlite:///benchmark.db
+#   python benchmark_indexes.py --database-url postgresql://.../fyyur_bench \
+#     --venues 5000 --artists 20000 --shows 1000000
+#
+# Never point this at a database you care about: it drops and recreates
+# the Venue, Artist and shows tables.
+#----------------------------------------------------------------------------#
+
+import argparse
+import time
+from datetime import datetime
+
+from sqlalchemy import create_engine, select, text, tuple_
+
+from models import Venue, Artist, Shows
+from seed import create_schema, seed_database
+
+def hot_queries(num_venues, num_artists):
+  # Approximations of the show-heavy statements behind /venues (see
+  # views/venues.py), the shows of /venues/<id> and /artists/<id> (see
+  # venue_with_shows() and artist_with_shows() in queries.py) and a /shows
+  # page (shows_page(), which takes names from the summary cache). Keep
+  # them in step with those.
+  now = datetime.now()
+  venue_id = num_venues // 2
+  artist_id = num_artists // 2
+  return {
+    'venue directory': (
+      select(Venue.city, Venue.state, Venue.id, Venue.name, Venue.upcoming_shows_count)
+      .order_by(Venue.state, Venue.city, Venue.id)
+    ),
+    'venue detail shows': (
+      select(Shows.id, Shows.start_time, Artist.id, Artist.name, Artist.image_link)
+      .select_from(Shows.__table__.outerjoin(Artist.__table__, Shows.artist_id == Artist.id))
+      .where(Shows.venue_id == venue_id)
+      .order_by(Shows.start_time)
+    ),
+    'artist detail shows': (
+      select(Shows.id, Shows.start_time, Venue.id, Venue.name, Venue.image_link)
+      .select_from(Shows.__table__.outerjoin(Venue.__table__, Shows.venue_id == Venue.id))
+      .where(Shows.artist_id == artist_id)
+      .order_by(Shows.start_time)
+    ),
+    'shows page': (
+      select(Shows.id, Shows.start_time, Shows.venue_id, Shows.artist_id)
+      .where(tuple_(Shows.start_time, Shows.id) > (now, 0))
+      .order_by(Shows.start_time, Shows.id)
+      .limit(31)
+    ),
+  }
+
+
+def explain(connection, statement):
+  compiled = statement.compile(connection, compile_kwargs={'literal_binds': True})
+  if connection.dialect.name == 'postgresql':
+    prefix = 'EXPLAIN ANALYZE '
+  else:
+    prefix = 'EXPLAIN QUERY PLAN '
+  rows = connection.execute(text(prefix + str(compiled))).fetchall()
+  return [' '.join(str(column) for column in row) for row in rows]
+
+
+def report(engine, queries, label, repeat):
+  print('=' * 72)
+  print(label)
+  print('=' * 72)
+  with engine.connect() as connection:
+    for name, statement in queries.items():
+      timings = []
+      for _ in range(repeat):
+        started = time.perf_counter()
+        connection.execute(statement).fetchall()
+        timings.append(time.perf_counter() - started)
+      timings.sort()
+      print('-- {}: best {:.2f} ms, median {:.2f} ms'.format(
+        name, timings[0] * 1000, timings[len(timings) // 2] * 1000))
+      for line in explain(connection, statement):
+        print('   ' + line)
+
+
+def main():
+  parser = argparse.ArgumentParser(
+    description='Benchmark the show-lookup queries with and without indexes.')
+  parser.add_argument('--database-url', default='sqlite:///benchmark.db')
+  parser.add_argument('--venues', type=int, default=1000)
+  parser.add_argument('--artists', type=int, default=5000)
+  parser.add_argument('--shows', type=int, default=200000)
+  parser.add_argument('--repeat', type=int, default=5)
+  args = parser.parse_args()
+
+  engine = create_engine(args.database_url)
+  started = time.perf_counter()
+  create_schema(engine)
+  with engine.begin() as connection:
+    seed_database(connection, args.venues, args.artists, args.shows)
+  print('seeded {} venues, {} artists, {} shows in {:.1f}s'.format(
+    args.venues, args.artists, args.shows, time.perf_counter() - started))
+
+  indexes = list(Venue.__table__.indexes) + list(Shows.__table__.indexes)
+  for index in indexes:
+    index.drop(engine)
+  queries = hot_queries(args.venues, args.artists)
+  report(engine, queries, 'without indexes', args.repeat)
+
+  for index in indexes:
+    index.create(engine)
+  with engine.begin() as connection:
+    connection.execute(text('ANALYZE'))
+  report(engine, queries, 'with indexes', args.repeat)
+
+
+if __name__ == '__main__':
+  main()
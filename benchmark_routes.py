@@ -0,0 +1,156 @@
+#----------------------------------------------------------------------------#
+# Drives every route of the app through the Flask test client and reports
+# latency percentiles, SQL statements per request and rows fetched per
+# request, so regressions show up before a deploy.
+#
+#   python benchmark_routes.py --database-url sqlite:////tmp/fyyur_bench.db \
+#     --seed --shows 100000
+#   python benchmark_routes.py --database-url postgresql://.../fyyur_bench \
+#     --seed --venues 5000 --artists 20000 --shows 1000000 --requests 200
+#
+# --seed drops and recreates every table first, so only use it on a
+# throw-away database. Rows fetched come from the DB-API cursor's rowcount,
+# which SQLite does not report for SELECTs.
+#----------------------------------------------------------------------------#
+
+import argparse
+import time
+from collections import defaultdict
+
+from sqlalchemy import event
+
+from app import create_app
+from cache import NullCache
+from models import db, Genre, Venue, Artist, Shows
+from queries import refresh_show_counters
+from seed import create_schema, seed_database
+
+
+def percentile(sorted_values, fraction):
+  index = int(round(fraction * (len(sorted_values) - 1)))
+  return sorted_values[min(index, len(sorted_values) - 1)]
+
+def seed(args):
+  create_schema(db.engine)
+  started = time.perf_counter()
+  with db.engine.begin() as connection:
+    seed_database(connection, args.venues, args.artists, args.shows)
+  refresh_show_counters(Venue, Shows.venue_id)
+  refresh_show_counters(Artist, Shows.artist_id)
+  db.session.commit()
+  print('seeded {} venues, {} artists, {} shows in {:.1f}s'.format(
+    args.venues, args.artists, args.shows, time.perf_counter() - started))
+
+def sample_requests(include_writes):
+  # (label, method, url, form data) for every route, using the busiest and a
+  # quiet venue/artist so both ends of the show-count distribution are hit.
+  busiest_venue = db.session.query(Venue.id).order_by(
+    (Venue.upcoming_shows_count + Venue.past_shows_count).desc()).first()[0]
+  busiest_artist = db.session.query(Artist.id).order_by(
+    (Artist.upcoming_shows_count + Artist.past_shows_count).desc()).first()[0]
+  quiet_venue = db.session.query(Venue.id).order_by(
+    Venue.upcoming_shows_count + Venue.past_shows_count, Venue.id).first()[0]
+  genre = db.session.query(Genre.name).order_by(Genre.id).first()[0]
+  db.session.remove()
+
+  samples = [
+    ('index', 'GET', '/', None),
+    ('venues', 'GET', '/venues', None),
+    ('venues?genre', 'GET', '/venues?genre={}'.format(genre), None),
+    ('search_venues', 'POST', '/venues/search', {'search_term': 'Music'}),
+    ('show_venue (busiest)', 'GET', '/venues/{}'.format(busiest_venue), None),
+    ('show_venue (quiet)', 'GET', '/venues/{}'.format(quiet_venue), None),
+    ('create_venue_form', 'GET', '/venues/create', None),
+    ('edit_venue', 'GET', '/venues/{}/edit'.format(busiest_venue), None),
+    ('artists', 'GET', '/artists', None),
+    ('artists?genre', 'GET', '/artists?genre={}'.format(genre), None),
+    ('search_artists', 'POST', '/artists/search', {'search_term': 'Band'}),
+    ('show_artist (busiest)', 'GET', '/artists/{}'.format(busiest_artist), None),
+    ('create_artist_form', 'GET', '/artists/create', None),
+    ('edit_artist', 'GET', '/artists/{}/edit'.format(busiest_artist), None),
+    ('shows', 'GET', '/shows', None),
+    ('create_shows', 'GET', '/shows/create', None),
+    ('api venues', 'GET', '/api/v1/venues?fields=id,name,genres', None),
+    ('api venue', 'GET', '/api/v1/venues/{}'.format(busiest_venue), None),
+    ('api artists', 'GET', '/api/v1/artists', None),
+    ('api artist', 'GET', '/api/v1/artists/{}'.format(busiest_artist), None),
+    ('api shows', 'GET', '/api/v1/shows', None),
+    ('api export venues', 'GET', '/api/v1/export/venues?format=jsonl', None),
+  ]
+  if include_writes:
+    samples.append(('create_show_submission', 'POST', '/shows/create', {
+      'artist_id': str(busiest_artist), 'venue_id': str(quiet_venue),
+      'start_time': '2030-01-01 20:00:00'}))
+  return samples
+
+def report_uncovered(app, samples):
+  covered = set()
+  adapter = app.url_map.bind('localhost')
+  for _, method, url, _ in samples:
+    path = url.split('?')[0]
+    covered.add(adapter.match(path, method=method)[0])
+  uncovered = sorted(rule.endpoint for rule in app.url_map.iter_rules()
+    if rule.endpoint not in covered and rule.endpoint != 'static')
+  if uncovered:
+    print('not benchmarked: {}'.format(', '.join(uncovered)))
+
+def main():
+  parser = argparse.ArgumentParser(description='Benchmark every route of the app.')
+  parser.add_argument('--database-url', required=True)
+  parser.add_argument('--seed', action='store_true', help='Recreate and seed the database first.')
+  parser.add_argument('--venues', type=int, default=1000)
+  parser.add_argument('--artists', type=int, default=5000)
+  parser.add_argument('--shows', type=int, default=100000)
+  parser.add_argument('--requests', type=int, default=50, help='Requests per route.')
+  parser.add_argument('--warmup', type=int, default=3, help='Untimed requests per route.')
+  parser.add_argument('--cache', action='store_true', help='Keep the rendered-page cache on.')
+  parser.add_argument('--writes', action='store_true', help='Also benchmark show creation.')
+  args = parser.parse_args()
+
+  app = create_app({'SQLALCHEMY_DATABASE_URI': args.database_url, 'WTF_CSRF_ENABLED': False})
+  app.secret_key = app.secret_key or 'benchmark'
+  if not args.cache:
+    app.extensions['response_cache'].backend = NullCache()
+
+  stats = {'statements': 0, 'rows': 0}
+  with app.app_context():
+    @event.listens_for(db.engine, 'after_cursor_execute')
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+      stats['statements'] += 1
+      if cursor.rowcount is not None and cursor.rowcount > 0:
+        stats['rows'] += cursor.rowcount
+
+    if args.seed:
+      seed(args)
+    samples = sample_requests(args.writes)
+  report_uncovered(app, samples)
+
+  client = app.test_client()
+  results = defaultdict(list)
+  print('{:<26} {:>6} {:>9} {:>9} {:>9} {:>9} {:>9}'.format(
+    'route', 'status', 'p50 ms', 'p95 ms', 'p99 ms', 'queries', 'rows'))
+  for label, method, url, data in samples:
+    for _ in range(args.warmup):
+      client.open(url, method=method, data=data).close()
+    statements = rows = 0
+    for _ in range(args.requests):
+      stats['statements'] = stats['rows'] = 0
+      started = time.perf_counter()
+      response = client.open(url, method=method, data=data)
+      response.get_data()
+      response.close()
+      results[label].append(time.perf_counter() - started)
+      statements += stats['statements']
+      rows += stats['rows']
+    timings = sorted(results[label])
+    print('{:<26} {:>6} {:>9.2f} {:>9.2f} {:>9.2f} {:>9.1f} {:>9.1f}'.format(
+      label, response.status_code,
+      percentile(timings, 0.50) * 1000,
+      percentile(timings, 0.95) * 1000,
+      percentile(timings, 0.99) * 1000,
+      float(statements) / args.requests,
+      float(rows) / args.requests))
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,62 @@
+#----------------------------------------------------------------------------#
+# Measures how long importing the app takes, which is what every gunicorn
+# worker, CLI command and test run pays before doing any work. Runs
+# `python -X importtime -c "import app"` in fresh interpreters and reports
+# the best total plus the modules that cost the most.
+#
+#   python benchmark_startup.py
+#   python benchmark_startup.py --runs 10 --top 25
+#   python benchmark_startup.py --max-ms 400   # exits 1 when slower, for CI
+#----------------------------------------------------------------------------#
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+
+def import_times(module):
+  # {module: (self us, cumulative us)} from one fresh interpreter. It runs
+  # outside the tree so that the app's error.log handler does not touch it.
+  env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.abspath(__file__)))
+  result = subprocess.run(
+    [sys.executable, '-X', 'importtime', '-c', 'import {}'.format(module)],
+    cwd=tempfile.gettempdir(), env=env,
+    stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, universal_newlines=True, check=True)
+  times = {}
+  for line in result.stderr.splitlines():
+    if not line.startswith('import time:') or 'self [us]' in line:
+      continue
+    self_us, cumulative_us, name = line[len('import time:'):].split('|')
+    times[name.strip()] = (int(self_us), int(cumulative_us))
+  return times
+
+def main():
+  parser = argparse.ArgumentParser(description='Benchmark the import time of the app.')
+  parser.add_argument('--module', default='app')
+  parser.add_argument('--runs', type=int, default=5, help='Best of this many fresh interpreters.')
+  parser.add_argument('--top', type=int, default=15, help='Slowest modules to list.')
+  parser.add_argument('--max-ms', type=float, help='Fail when the best total exceeds this.')
+  args = parser.parse_args()
+
+  runs = [import_times(args.module) for _ in range(args.runs)]
+  best = min(runs, key=lambda times: times[args.module][1])
+  total_ms = best[args.module][1] / 1000.0
+
+  print('import {}: best {:.1f} ms of {} runs (median {:.1f} ms)'.format(
+    args.module, total_ms, args.runs,
+    sorted(times[args.module][1] for times in runs)[len(runs) // 2] / 1000.0))
+  print('{:>10} {:>10}  {}'.format('self ms', 'cumul ms', 'module'))
+  for name, (self_us, cumulative_us) in sorted(
+      best.items(), key=lambda item: item[1][1], reverse=True)[:args.top]:
+    print('{:>10.1f} {:>10.1f}  {}'.format(self_us / 1000.0, cumulative_us / 1000.0, name))
+
+  if args.max_ms is not None and total_ms > args.max_ms:
+    print('import {} took {:.1f} ms, over the {:.1f} ms budget'.format(
+      args.module, total_ms, args.max_ms))
+    sys.exit(1)
+
+
+if __name__ == '__main__':
+  main()
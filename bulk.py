@@ -0,0 +1,322 @@
+#----------------------------------------------------------------------------#
+# Bulk import and export.
+#
+#   flask import venues venues.csv
+#   flask import artists artists.jsonl --batch-size 5000
+#   flask import shows shows.csv.gz
+#
+# Files are streamed row by row (CSV with a header line, or JSON Lines;
+# optionally gzipped), so memory stays flat however large they are. Every row
+# is validated with the same form that guards the matching create page, and
+# valid rows are written in batches with multi-row INSERTs. Genre names are
+# resolved and show foreign keys are checked once per batch.
+#
+#   flask export shows --format jsonl --gzip -o shows.jsonl.gz
+#   GET /api/v1/export/shows?format=csv&gzip=1
+#
+# Exports read through a server-side cursor (yield_per) and are encoded and
+# optionally gzipped batch by batch, so memory stays flat on multi-million
+# row tables.
+#----------------------------------------------------------------------------#
+
+import csv
+import gzip
+import io
+import json
+import time
+import zlib
+
+import click
+from flask import current_app
+from flask.cli import AppGroup, with_appcontext
+from sqlalchemy import text
+from werkzeug.datastructures import MultiDict
+
+from forms import VenueForm, ArtistForm, ShowForm
+from models import db, Venue, Artist, Shows, venue_genres, artist_genres
+from queries import get_or_create_genres, genre_names_by_id, refresh_show_counters
+
+import_cli = AppGroup('import', help='Bulk import venues, artists or shows.')
+
+
+#----------------------------------------------------------------------------#
+# Reading.
+#----------------------------------------------------------------------------#
+
+def open_text(path):
+  if path.endswith('.gz'):
+    return io.TextIOWrapper(gzip.open(path, 'rb'), encoding='utf-8', newline='')
+  return open(path, encoding='utf-8', newline='')
+
+def read_rows(path):
+  # Yields (line number, record dict) pairs, one row at a time.
+  with open_text(path) as source:
+    if path.endswith(('.jsonl', '.jsonl.gz', '.ndjson', '.ndjson.gz')):
+      for line_number, line in enumerate(source, 1):
+        if line.strip():
+          yield line_number, json.loads(line)
+    else:
+      reader = csv.DictReader(source)
+      for record in reader:
+        yield reader.line_num, record
+
+def to_formdata(record, multi_fields):
+  # List values (JSON arrays, or comma-separated CSV cells for multi-value
+  # fields) become repeated keys, which is how the browser submits a
+  # multi-select.
+  formdata = MultiDict()
+  for key, value in record.items():
+    if value is None:
+      continue
+    if key in multi_fields:
+      if isinstance(value, str):
+        value = [item.strip() for item in value.split(',') if item.strip()]
+      formdata.setlist(key, value)
+    elif isinstance(value, bool):
+      formdata[key] = 'y' if value else ''
+    else:
+      formdata[key] = str(value)
+  return formdata
+
+def validate(form_class, record, multi_fields=()):
+  form = form_class(formdata=to_formdata(record, multi_fields), meta={'csrf': False})
+  if form.validate():
+    return form.data, None
+  return None, form.errors
+
+
+#----------------------------------------------------------------------------#
+# Writing.
+#----------------------------------------------------------------------------#
+
+def reserve_ids(model, count):
+  # Primary keys for a batch, so that association rows can be written with
+  # the same multi-row INSERTs as the entities themselves. On PostgreSQL the
+  # ids come from the table's sequence; elsewhere the importer is assumed to
+  # be the only writer while it runs.
+  if db.engine.dialect.name == 'postgresql':
+    rows = db.session.execute(
+      text('SELECT nextval(pg_get_serial_sequence(:table, \'id\')) FROM generate_series(1, :count)'),
+      {'table': '"{}"'.format(model.__tablename__), 'count': count})
+    return [row[0] for row in rows]
+  start = (db.session.query(db.func.max(model.id)).scalar() or 0) + 1
+  return list(range(start, start + count))
+
+def insert_entities(model, association, entity_column, batch):
+  columns = set(column.name for column in model.__table__.columns)
+  ids = reserve_ids(model, len(batch))
+  genres = get_or_create_genres(name for data in batch for name in data['genres'])
+  db.session.flush()
+  genre_ids = dict((genre.name, genre.id) for genre in genres)
+
+  rows = []
+  links = []
+  for entity_id, data in zip(ids, batch):
+    row = dict((key, value) for key, value in data.items() if key in columns)
+    row['id'] = entity_id
+    rows.append(row)
+    for name in set(data['genres']):
+      links.append({entity_column: entity_id, 'genre_id': genre_ids[name]})
+  db.session.execute(model.__table__.insert(), rows)
+  if links:
+    db.session.execute(association.insert(), links)
+
+def insert_venues(batch):
+  insert_entities(Venue, venue_genres, 'venue_id', batch)
+  return len(batch), 0
+
+def insert_artists(batch):
+  insert_entities(Artist, artist_genres, 'artist_id', batch)
+  return len(batch), 0
+
+def insert_shows(batch):
+  # Checks the batch's artist and venue ids with one query per table instead
+  # of two lookups per show, then keeps the show counters in step.
+  candidates = []
+  for data in batch:
+    if str(data['artist_id']).isdigit() and str(data['venue_id']).isdigit():
+      candidates.append((int(data['artist_id']), int(data['venue_id']), data['start_time']))
+  artist_ids = set(artist_id for artist_id, _, _ in candidates)
+  venue_ids = set(venue_id for _, venue_id, _ in candidates)
+  known_artists = set(row[0] for row in db.session.query(Artist.id).filter(Artist.id.in_(artist_ids)))
+  known_venues = set(row[0] for row in db.session.query(Venue.id).filter(Venue.id.in_(venue_ids)))
+
+  rows = []
+  for artist_id, venue_id, start_time in candidates:
+    if artist_id in known_artists and venue_id in known_venues:
+      rows.append({'artist_id': artist_id, 'venue_id': venue_id, 'start_time': start_time})
+  if rows:
+    db.session.execute(Shows.__table__.insert(), rows)
+    refresh_show_counters(Artist, Shows.artist_id, set(row['artist_id'] for row in rows))
+    refresh_show_counters(Venue, Shows.venue_id, set(row['venue_id'] for row in rows))
+  return len(rows), len(batch) - len(rows)
+
+def run_import(path, form_class, multi_fields, insert_batch, batch_size, max_errors):
+  started = time.perf_counter()
+  loaded = rejected = 0
+  batch = []
+
+  def flush_batch():
+    nonlocal loaded, rejected
+    written, skipped = insert_batch(batch)
+    db.session.commit()
+    loaded += written
+    rejected += skipped
+    if skipped:
+      click.echo('{} rows skipped: missing or unknown artist_id or venue_id.'.format(skipped), err=True)
+    del batch[:]
+
+  for line_number, record in read_rows(path):
+    data, errors = validate(form_class, record, multi_fields)
+    if errors:
+      rejected += 1
+      if rejected <= max_errors:
+        click.echo('line {}: {}'.format(line_number, errors), err=True)
+      continue
+    batch.append(data)
+    if len(batch) >= batch_size:
+      flush_batch()
+  if batch:
+    flush_batch()
+
+  elapsed = time.perf_counter() - started
+  response_cache = current_app.extensions.get('response_cache')
+  if response_cache is not None and loaded:
+    response_cache.invalidate('venues', 'artists')
+  # Rejected rows are never written, so only loaded rows count towards the rate.
+  click.echo('Loaded {} rows, rejected {}, in {:.1f}s ({:.0f} rows/s loaded).'.format(
+    loaded, rejected, elapsed, loaded / elapsed if elapsed else 0))
+
+
+#----------------------------------------------------------------------------#
+# Commands.
+#----------------------------------------------------------------------------#
+
+def import_command(name, form_class, multi_fields, insert_batch):
+  @import_cli.command(name, help='Import {} from a CSV or JSON Lines file.'.format(name))
+  @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+  @click.option('--batch-size', default=1000, show_default=True, help='Rows per INSERT and commit.')
+  @click.option('--max-errors', default=20, show_default=True, help='Invalid rows to print.')
+  def command(path, batch_size, max_errors):
+    run_import(path, form_class, multi_fields, insert_batch, batch_size, max_errors)
+  return command
+
+import_command('venues', VenueForm, ('genres',), insert_venues)
+import_command('artists', ArtistForm, ('genres',), insert_artists)
+import_command('shows', ShowForm, (), insert_shows)
+
+
+#----------------------------------------------------------------------------#
+# Export.
+#----------------------------------------------------------------------------#
+
+export_tables = {
+  'venues': (Venue, ('id', 'name', 'city', 'state', 'address', 'phone', 'image_link',
+    'facebook_link', 'website_link', 'seeking_talent', 'seeking_description',
+    'upcoming_shows_count', 'past_shows_count', 'genres')),
+  'artists': (Artist, ('id', 'name', 'city', 'state', 'phone', 'image_link',
+    'facebook_link', 'website_link', 'seeking_venue', 'seeking_description',
+    'upcoming_shows_count', 'past_shows_count', 'genres')),
+  'shows': (Shows, ('id', 'artist_id', 'venue_id', 'start_time')),
+}
+
+export_formats = {
+  'csv': 'text/csv',
+  'jsonl': 'application/x-ndjson',
+  'columns': 'application/x-ndjson',
+}
+
+def export_batches(table, batch_size):
+  # Yields lists of row tuples in id order. yield_per streams the result from
+  # a server-side cursor instead of materializing the whole table.
+  model, names = export_tables[table]
+  columns = [getattr(model, name) for name in names if name != 'genres']
+  rows = db.session.query(*columns).order_by(model.id).yield_per(batch_size)
+  batch = []
+  for row in rows:
+    batch.append(row)
+    if len(batch) == batch_size:
+      yield with_genres(model, names, batch)
+      batch = []
+  if batch:
+    yield with_genres(model, names, batch)
+
+def with_genres(model, names, batch):
+  if 'genres' not in names:
+    return [tuple(row) for row in batch]
+  genres = genre_names_by_id(model, [row.id for row in batch])
+  return [tuple(row) + (genres[row.id],) for row in batch]
+
+def json_value(value):
+  if hasattr(value, 'isoformat'):
+    return value.isoformat()
+  return value
+
+def csv_value(value):
+  if value is None:
+    return ''
+  if isinstance(value, list):
+    return ','.join(value)
+  return json_value(value)
+
+def encode_csv(names, batches):
+  buffer = io.StringIO()
+  writer = csv.writer(buffer)
+  writer.writerow(names)
+  for batch in batches:
+    writer.writerows([csv_value(value) for value in row] for row in batch)
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+  yield buffer.getvalue()
+
+def encode_jsonl(names, batches):
+  for batch in batches:
+    yield ''.join(
+      json.dumps(dict(zip(names, map(json_value, row))), separators=(',', ':')) + '\n'
+      for row in batch)
+
+def encode_columns(names, batches):
+  # Column-oriented blocks, one JSON object per batch mapping each column to
+  # its values, which loads straight into dataframe/columnar tooling.
+  for batch in batches:
+    block = dict((name, [json_value(value) for value in column])
+      for name, column in zip(names, zip(*batch)))
+    yield json.dumps(block, separators=(',', ':')) + '\n'
+
+encoders = {
+  'csv': encode_csv,
+  'jsonl': encode_jsonl,
+  'columns': encode_columns,
+}
+
+def export_stream(table, export_format, batch_size=1000, compress=False):
+  # Yields encoded (and, with compress, gzip-framed) byte chunks.
+  names = export_tables[table][1]
+  chunks = encoders[export_format](names, export_batches(table, batch_size))
+  compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS) if compress else None
+  for chunk in chunks:
+    data = chunk.encode('utf-8')
+    if compressor is not None:
+      data = compressor.compress(data)
+    if data:
+      yield data
+  if compressor is not None:
+    yield compressor.flush()
+
+@click.command('export', help='Export venues, artists or shows.')
+@click.argument('table', type=click.Choice(sorted(export_tables)))
+@click.option('--format', 'export_format', type=click.Choice(sorted(export_formats)),
+  default='csv', show_default=True)
+@click.option('--gzip', 'compress', is_flag=True, help='Gzip the output.')
+@click.option('--batch-size', default=1000, show_default=True, help='Rows fetched per round trip.')
+@click.option('-o', '--output', type=click.File('wb'), default='-', help='Defaults to stdout.')
+@with_appcontext
+def export_command(table, export_format, compress, batch_size, output):
+  started = time.perf_counter()
+  written = 0
+  for data in export_stream(table, export_format, batch_size, compress):
+    output.write(data)
+    written += len(data)
+  elapsed = time.perf_counter() - started
+  click.echo('Exported {} in {:.1f}s ({} bytes).'.format(table, elapsed, written), err=True)
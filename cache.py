@@ -0,0 +1,275 @@
+#----------------------------------------------------------------------------#
+# Rendered-page cache.
+#
+# A ResponseCache stores the rendered body of GET views in a pluggable
+# backend, keyed by namespace, namespace version, the page's ETag (see
+# conditional() below) and request path + query string. Write handlers call invalidate(namespace), which swaps the
+# namespace version so every page cached under the old one stops matching.
+# Versions live in the backend itself, so the filesystem backend shares
+# invalidations between gunicorn workers; the in-process LRU backend does not,
+# and relies on its TTL to bound staleness in the other workers.
+#----------------------------------------------------------------------------#
+
+import hashlib
+import os
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import timezone
+from functools import wraps
+
+from flask import Response, _request_ctx_stack, current_app, g, make_response, request, session
+
+from files import atomic_write, private_directory
+
+
+class NullCache(object):
+    """Backend that never stores anything; disables caching."""
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, ttl=None):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def clear(self):
+        pass
+
+
+class LRUCache(object):
+    """In-process cache bounded by entry count, with per-entry expiry."""
+
+    def __init__(self, max_entries=512, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        # ttl=None uses the default, ttl=0 never expires.
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class FileSystemCache(object):
+    """Cache of pickled entries in a directory shared by all workers."""
+
+    def __init__(self, directory, ttl=300):
+        self.directory = directory
+        self.ttl = ttl
+        # Entries are unpickled, so nobody else may write to the directory.
+        private_directory(directory)
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.cache')
+
+    def get(self, key):
+        try:
+            with open(self._path(key), 'rb') as cache_file:
+                expires_at, value = pickle.load(cache_file)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        if expires_at is not None and expires_at < time.time():
+            return None
+        return value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.time() + ttl if ttl else None
+        try:
+            with atomic_write(self._path(key)) as cache_file:
+                pickle.dump((expires_at, value), cache_file, pickle.HIGHEST_PROTOCOL)
+        except OSError:
+            pass
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            if name.endswith('.cache'):
+                os.remove(os.path.join(self.directory, name))
+
+
+class PageCache(object):
+    """One app's rendered pages: a backend plus hit and miss counters."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    def version(self, namespace):
+        """The current version of namespace; invalidate() replaces it."""
+        version_key = 'version:' + namespace
+        version = self.backend.get(version_key)
+        if version is None:
+            version = uuid.uuid4().hex
+            self.backend.set(version_key, version, ttl=0)
+        return version
+
+    def invalidate(self, *namespaces):
+        for namespace in namespaces:
+            self.backend.set('version:' + namespace, uuid.uuid4().hex, ttl=0)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': float(self.hits) / lookups if lookups else 0.0,
+        }
+
+
+def backend_from_config(app):
+    config = app.config
+    backend = config.get('RESPONSE_CACHE_BACKEND', 'memory')
+    ttl = config.get('RESPONSE_CACHE_TTL', 300)
+    if backend == 'memory':
+        return LRUCache(config.get('RESPONSE_CACHE_MAX_ENTRIES', 512), ttl)
+    if backend == 'filesystem':
+        return FileSystemCache(config.get('RESPONSE_CACHE_DIR')
+                               or os.path.join(app.instance_path, 'response-cache'), ttl)
+    if backend == 'null':
+        return NullCache()
+    raise ValueError('Unknown RESPONSE_CACHE_BACKEND: {}'.format(backend))
+
+
+class ResponseCache(object):
+    """Caches the rendered output of GET views of the current app.
+
+    Each app's PageCache lives in app.extensions['response_cache'], so views
+    can be decorated at import time and bound to several apps.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['response_cache'] = PageCache(backend_from_config(app))
+
+    @property
+    def pages(self):
+        return current_app.extensions['response_cache']
+
+    def invalidate(self, *namespaces):
+        self.pages.invalidate(*namespaces)
+
+    def stats(self):
+        return self.pages.stats()
+
+    def cached(self, namespace):
+        """Serve the view from the cache, keyed by route and arguments."""
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                # Pages render pending flash messages, which are per user.
+                if request.method != 'GET' or '_flashes' in session:
+                    return view(*args, **kwargs)
+
+                pages = self.pages
+                # Under @conditional, the page's ETag too: a worker whose
+                # namespace version is stale must not serve an old body
+                # under a new ETag.
+                key = 'page:{}:{}:{}:{}'.format(namespace, pages.version(namespace),
+                                                g.get('page_etag', ''), request.full_path)
+                entry = pages.backend.get(key)
+                if entry is not None:
+                    pages.hits += 1
+                    body, status, mimetype = entry
+                    response = Response(body, status=status, mimetype=mimetype)
+                    response.headers['X-Cache'] = 'HIT'
+                    return response
+
+                pages.misses += 1
+                response = make_response(view(*args, **kwargs))
+                rendered_flashes = getattr(_request_ctx_stack.top, 'flashes', None)
+                if response.status_code == 200 and not rendered_flashes:
+                    pages.backend.set(key, (response.get_data(), response.status_code, response.mimetype))
+                response.headers['X-Cache'] = 'MISS'
+                return response
+            return wrapper
+        return decorator
+
+
+def conditional(validator):
+    """Answer 304 Not Modified when the client already holds the current page.
+
+    validator(**view_kwargs) cheaply returns (last_modified, version) for the
+    page, or None when it cannot tell (e.g. the entity does not exist), in
+    which case the view runs as usual. The strong ETag is derived from the
+    version, the request path and ETAG_VERSION, which deploys bump when the
+    templates change; it is also kept in g.page_etag, which
+    ResponseCache.cached() adds to its keys. Apply it outside cached().
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method not in ('GET', 'HEAD') or '_flashes' in session:
+                return view(*args, **kwargs)
+            state = validator(**kwargs)
+            if state is None:
+                return view(*args, **kwargs)
+
+            last_modified, version = state
+            if last_modified is not None:
+                last_modified = last_modified.replace(microsecond=0)
+            etag = hashlib.sha1(repr((
+                current_app.config.get('ETAG_VERSION'), request.full_path, version
+            )).encode('utf-8')).hexdigest()
+            g.page_etag = etag
+
+            if request.if_none_match:
+                not_modified = request.if_none_match.contains(etag)
+            else:
+                not_modified = (
+                    request.if_modified_since is not None and last_modified is not None
+                    and last_modified.replace(tzinfo=timezone.utc) <= request.if_modified_since)
+            if not_modified:
+                response = Response(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            # Let browsers and the CDN store the page but revalidate every use.
+            response.cache_control.no_cache = True
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,48 @@
+#----------------------------------------------------------------------------#
+# Maintenance commands.
+#
+#   flask rebuild-show-counters
+#   flask rollover-show-counters --since-minutes 60
+#   flask pool-report
+#----------------------------------------------------------------------------#
+
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from database import pool_report
+from extensions import response_cache
+from models import db
+from queries import rebuild_show_counters, rollover_show_counters
+
+
+@click.command('rebuild-show-counters')
+@with_appcontext
+def rebuild_show_counters_command():
+  """Recompute every venue and artist show counter from the shows table."""
+  artists, venues = rebuild_show_counters()
+  db.session.commit()
+  response_cache.invalidate('venues', 'artists')
+  click.echo('Rebuilt show counters for {} artists and {} venues.'.format(artists, venues))
+
+@click.command('rollover-show-counters')
+@click.option('--since-minutes', default=60, show_default=True,
+  help='Look back this far for shows that have started. Run the command '
+       'more often than this, e.g. from cron every 15 minutes.')
+@with_appcontext
+def rollover_show_counters_command(since_minutes):
+  """Move shows that have started from the upcoming to the past counters."""
+  since = datetime.now() - timedelta(minutes=since_minutes)
+  artists, venues = rollover_show_counters(since)
+  db.session.commit()
+  response_cache.invalidate('venues', 'artists')
+  click.echo('Rolled over show counters for {} artists and {} venues.'.format(artists, venues))
+
+@click.command('pool-report')
+@with_appcontext
+def pool_report_command():
+  """Print the effective database connection pool settings."""
+  for line in pool_report(db.engine, current_app.config):
+    click.echo(line)
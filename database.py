@@ -0,0 +1,214 @@
+#----------------------------------------------------------------------------#
+# Engine and connection-pool configuration.
+#
+# The pool is tuned from the environment (see the DB_* settings in
+# config.py). Two layouts are supported:
+#
+#   direct / pgbouncer session pooling: every worker keeps a QueuePool of
+#     DB_POOL_SIZE connections, plus up to DB_MAX_OVERFLOW more under load.
+#   DB_PGBOUNCER_MODE=transaction: pgbouncer owns the pooling, so workers
+#     hold no idle connections (NullPool) and session state such as the
+#     statement timeout is set per transaction with SET LOCAL.
+#
+# With gunicorn, the database sees up to
+# WEB_CONCURRENCY * (DB_POOL_SIZE + DB_MAX_OVERFLOW) connections; the report
+# logged when the engine is created spells this out.
+#
+# Read replicas (REPLICA_DATABASE_URLS): GET and HEAD requests, and the
+# read-only searches, read from the replicas in round-robin order; every
+# other request, flushes and CLI commands use the primary. After a write the
+# client reads from the primary for READ_YOUR_WRITES_SECONDS, so it sees its
+# own changes despite replication lag. Replicas failing a health check are
+# skipped until the next check.
+#----------------------------------------------------------------------------#
+
+import itertools
+import os
+import threading
+import time
+
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy import SQLAlchemy, SignallingSession
+from sqlalchemy import event, orm
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.pool import NullPool, QueuePool
+
+
+def pool_options(config, sa_url):
+    # create_engine() keyword arguments for the configured pool. SQLite keeps
+    # Flask-SQLAlchemy's defaults, which suit a single local file.
+    if not sa_url.drivername.startswith('postgresql'):
+        return {}
+    if config.get('DB_PGBOUNCER_MODE') == 'transaction':
+        return {'poolclass': NullPool}
+    return {
+        'pool_size': config.get('DB_POOL_SIZE', 5),
+        'max_overflow': config.get('DB_MAX_OVERFLOW', 10),
+        'pool_timeout': config.get('DB_POOL_TIMEOUT', 30),
+        'pool_recycle': config.get('DB_POOL_RECYCLE', 1800),
+        'pool_pre_ping': config.get('DB_POOL_PRE_PING', True),
+    }
+
+def install_statement_timeout(engine, timeout_ms, per_transaction):
+    # Not passed as a startup parameter (options=-c statement_timeout=...),
+    # which pgbouncer rejects unless told to ignore it.
+    if not timeout_ms:
+        return
+    if per_transaction:
+        @event.listens_for(engine, 'begin')
+        def set_local_timeout(conn):
+            conn.exec_driver_sql('SET LOCAL statement_timeout = {:d}'.format(timeout_ms))
+    else:
+        @event.listens_for(engine, 'connect')
+        def set_timeout(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            cursor.execute('SET statement_timeout = {:d}'.format(timeout_ms))
+            cursor.close()
+            dbapi_connection.commit()
+
+def pool_report(engine, config):
+    """Lines describing the effective pool settings of engine."""
+    pool = engine.pool
+    lines = [
+        'database: {}'.format(repr(engine.url)),
+        'pool: {}'.format(type(pool).__name__),
+    ]
+    if isinstance(pool, QueuePool):
+        workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+        per_worker = pool.size() + max(pool._max_overflow, 0)
+        lines.append('pool_size={} max_overflow={} pool_timeout={}s pool_recycle={}s pre_ping={}'.format(
+            pool.size(), pool._max_overflow, pool._timeout, pool._recycle, pool._pre_ping))
+        lines.append('up to {} connections per worker, {} for {} worker(s) (WEB_CONCURRENCY)'.format(
+            per_worker, per_worker * workers, workers))
+    lines.append('pgbouncer mode: {}'.format(config.get('DB_PGBOUNCER_MODE') or 'off'))
+    timeout_ms = config.get('DB_STATEMENT_TIMEOUT_MS')
+    lines.append('statement timeout: {}'.format('{} ms'.format(timeout_ms) if timeout_ms else 'off'))
+    return lines
+
+
+class PooledSQLAlchemy(SQLAlchemy):
+    """SQLAlchemy whose engine takes its pool settings from the app config."""
+
+    def create_engine(self, sa_url, engine_opts):
+        config = current_app.config
+        engine_opts.update(pool_options(config, sa_url))
+        engine = super(PooledSQLAlchemy, self).create_engine(sa_url, engine_opts)
+        if engine.dialect.name == 'postgresql':
+            install_statement_timeout(engine, config.get('DB_STATEMENT_TIMEOUT_MS'),
+                                      per_transaction=config.get('DB_PGBOUNCER_MODE') == 'transaction')
+        for line in pool_report(engine, config):
+            current_app.logger.info(line)
+        return engine
+
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+
+#----------------------------------------------------------------------------#
+# Read replicas.
+#----------------------------------------------------------------------------#
+
+# POST endpoints that only read.
+READ_ONLY_ENDPOINTS = ('venues.search_venues', 'artists.search_artists')
+
+STICKY_COOKIE = 'fyyur_read_primary'
+
+
+class Replica(object):
+    """A replica engine, created on first use, and its last health check."""
+
+    def __init__(self, url):
+        self.url = url
+        self.engine = None
+        self.healthy = True
+        self.checked_at = 0.0
+
+
+class ReplicaSet(object):
+    """Picks the engine that reads of the current request of one app go to."""
+
+    def __init__(self, urls=(), health_check_seconds=10, sticky_seconds=5):
+        self.replicas = [Replica(url) for url in urls]
+        self.health_check_seconds = health_check_seconds
+        self.sticky_seconds = sticky_seconds
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def _start_request(self):
+        g.read_from_replica = bool(self.replicas) and (
+            request.method in ('GET', 'HEAD') or request.endpoint in READ_ONLY_ENDPOINTS
+        ) and STICKY_COOKIE not in request.cookies
+
+    def _finish_request(self, response):
+        # Pin the client to the primary for a while after a successful write.
+        if (self.replicas and request.method not in ('GET', 'HEAD', 'OPTIONS')
+                and request.endpoint not in READ_ONLY_ENDPOINTS and response.status_code < 400):
+            response.set_cookie(STICKY_COOKIE, '1', max_age=self.sticky_seconds,
+                                httponly=True, samesite='Lax')
+        return response
+
+    def _check(self, replica):
+        # Also creates the engine on first use, with the primary's pool settings.
+        replica.checked_at = time.time()
+        try:
+            if replica.engine is None:
+                replica.engine = current_app.extensions['sqlalchemy'].db.create_engine(
+                    make_url(replica.url), {})
+            with replica.engine.connect() as connection:
+                connection.exec_driver_sql('SELECT 1')
+            replica.healthy = True
+        except DBAPIError:
+            # Logged once per outage rather than on every check.
+            if replica.healthy:
+                current_app.logger.warning('Read replica {!r} failed its health check.'.format(
+                    make_url(replica.url)))
+            replica.healthy = False
+
+    def read_engine(self):
+        """The replica engine for the current request, or None for the primary."""
+        if not has_request_context() or not g.get('read_from_replica'):
+            return None
+        engine = g.get('replica_engine')
+        if engine is not None:
+            return engine
+        with self._lock:
+            start = next(self._counter)
+        for offset in range(len(self.replicas)):
+            replica = self.replicas[(start + offset) % len(self.replicas)]
+            if time.time() - replica.checked_at >= self.health_check_seconds:
+                self._check(replica)
+            if replica.healthy:
+                g.replica_engine = replica.engine
+                return replica.engine
+        # Every replica is down; fall back to the primary for this request.
+        g.read_from_replica = False
+        return None
+
+
+class ReplicaRouter(object):
+    """Binds a ReplicaSet to each app, as app.extensions['replica_router']."""
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        replicas = ReplicaSet(app.config.get('REPLICA_DATABASE_URLS', ()),
+                              app.config.get('REPLICA_HEALTH_CHECK_SECONDS', 10),
+                              app.config.get('READ_YOUR_WRITES_SECONDS', 5))
+        app.before_request(replicas._start_request)
+        app.after_request(replicas._finish_request)
+        app.extensions['replica_router'] = replicas
+
+
+class RoutingSession(SignallingSession):
+    """Session that sends the reads of read-only requests to a replica."""
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        router = self.app.extensions.get('replica_router')
+        if router is not None and not self._flushing:
+            engine = router.read_engine()
+            if engine is not None:
+                return engine
+        return super(RoutingSession, self).get_bind(mapper, clause)
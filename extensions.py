@@ -0,0 +1,32 @@
+#----------------------------------------------------------------------------#
+# Extensions.
+#
+# Created unbound and bound to the app by create_app() (app.py), so that
+# blueprints can use them at import time, e.g. @response_cache.cached(...).
+# init_app() keeps each app's state in app.extensions and the methods look
+# it up through current_app, so several apps (e.g. in tests) can share them.
+# db lives in models.py.
+#----------------------------------------------------------------------------#
+
+from flask_moment import Moment
+
+from assets import Assets
+from cache import ResponseCache
+from database import ReplicaRouter
+from images import Images
+from instrumentation import SQLInstrumentation
+from jobs import Jobs
+from metrics import Metrics
+from summaries import Summaries
+from writebehind import ShowWriteBehind
+
+moment = Moment()
+replica_router = ReplicaRouter()
+response_cache = ResponseCache()
+sql_instrumentation = SQLInstrumentation()
+metrics = Metrics()
+summaries = Summaries()
+assets = Assets()
+images = Images()
+show_writer = ShowWriteBehind()
+job_queue = Jobs()
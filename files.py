@@ -0,0 +1,50 @@
+#----------------------------------------------------------------------------#
+# Files written by the caches, the asset build and the image store.
+#
+# Workers read these files while other workers (or builds) replace them, so
+# they are written to a temporary file in the same directory and renamed over
+# the old one: readers see the old file or the new one, never half of it.
+#
+# The template bytecode cache and the filesystem page cache load code and
+# pickles from their directories, so those are private_directory()s: a
+# directory another local user created first is refused, not used.
+#----------------------------------------------------------------------------#
+
+import os
+import stat
+import tempfile
+from contextlib import contextmanager
+
+
+@contextmanager
+def atomic_write(path, mode='wb', permissions=None):
+    """A file to write path's new content to; it replaces path on success.
+
+    The file is created by mkstemp, so it is only readable by its owner
+    unless permissions says otherwise.
+    """
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.')
+    try:
+        with os.fdopen(fd, mode) as output:
+            yield output
+        if permissions is not None:
+            os.chmod(temp_path, permissions)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+def write_atomic(path, data, permissions=None):
+    with atomic_write(path, 'wb', permissions) as output:
+        output.write(data)
+
+def private_directory(path):
+    """Create path readable by this user only, or check that an existing one is ours."""
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid():
+        raise RuntimeError('{} is not a directory owned by this user.'.format(path))
+    if stat.S_IMODE(info.st_mode) & 0o077:
+        os.chmod(path, 0o700)
+    return path
@@ -0,0 +1,303 @@
+#----------------------------------------------------------------------------#
+# Image derivatives.
+#
+# Venue and artist image_links point at arbitrary remote images. `flask
+# images fetch` downloads each one once, through a pluggable fetcher, and
+# stores it under IMAGE_DIR keyed by the SHA-256 of its content; resized
+# copies are made from it on first request (or by the same command) and
+# served from /img/<digest>/<size> as WebP to browsers that accept it and
+# JPEG to the rest, with an immutable Cache-Control header.
+#
+# Templates call image_url(link, size). Links that have not been fetched yet
+# are returned unchanged, so pages render the same before the first fetch.
+# Images Pillow cannot decode (e.g. truncated ones) are skipped by the fetch,
+# and /img/ redirects to the original link of any it cannot resize.
+#
+#   IMAGE_DIR/urls/<sha256 of url>          digest of the image behind a url
+#   IMAGE_DIR/<dd>/<digest>/original        the fetched bytes
+#   IMAGE_DIR/<dd>/<digest>/source          the url they were fetched from
+#   IMAGE_DIR/<dd>/<digest>/<size>.<format> derivatives
+#----------------------------------------------------------------------------#
+
+import hashlib
+import io
+import os
+import re
+import time
+import urllib.request
+from urllib.parse import urlparse
+
+import click
+from flask import abort, current_app, redirect, request, send_file, url_for
+from flask.cli import AppGroup
+
+from files import private_directory, write_atomic
+from models import db, Venue, Artist
+
+images_cli = AppGroup('images', help='Fetch and resize venue and artist images.')
+
+# Bounding boxes; images are scaled down to fit, never up.
+SIZES = {
+    'thumb': (320, 320),
+    'detail': (1024, 1024),
+}
+FORMATS = (
+    ('webp', 'image/webp'),
+    ('jpeg', 'image/jpeg'),
+)
+QUALITY = 80
+IMMUTABLE = 'public, max-age=31536000, immutable'
+DIGEST = re.compile(r'^[0-9a-f]{64}$')
+
+
+class ImageFetchError(Exception):
+    pass
+
+
+class HTTPFetcher(object):
+    """Downloads image links over HTTP(S)."""
+
+    def __init__(self, timeout=10, max_bytes=10 * 1024 * 1024):
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+
+    def __call__(self, url):
+        if urlparse(url).scheme not in ('http', 'https'):
+            raise ImageFetchError('Not an http(s) URL: {}'.format(url))
+        fetch = urllib.request.Request(url, headers={'User-Agent': 'fyyur-images'})
+        try:
+            with urllib.request.urlopen(fetch, timeout=self.timeout) as response:
+                data = response.read(self.max_bytes + 1)
+        except (OSError, ValueError) as error:
+            raise ImageFetchError('{}: {}'.format(url, error))
+        if len(data) > self.max_bytes:
+            raise ImageFetchError('{}: larger than {} bytes'.format(url, self.max_bytes))
+        return data
+
+
+class LocalFetcher(object):
+    """Reads image links from a directory by file name; for development and tests."""
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def __call__(self, url):
+        path = os.path.join(self.directory, os.path.basename(urlparse(url).path))
+        try:
+            with open(path, 'rb') as image_file:
+                return image_file.read()
+        except OSError as error:
+            raise ImageFetchError('{}: {}'.format(url, error))
+
+
+def resize(data, size, format):
+    # Pillow is only needed by the processes that make derivatives.
+    from PIL import Image, ImageOps
+    try:
+        image = ImageOps.exif_transpose(Image.open(io.BytesIO(data)))
+        image.thumbnail(SIZES[size], Image.LANCZOS)
+        if format == 'jpeg' and image.mode != 'RGB':
+            # JPEG has no alpha channel; flatten transparency onto white.
+            image = image.convert('RGBA')
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel('A'))
+            image = background
+        elif image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA')
+        output = io.BytesIO()
+        image.save(output, format.upper(), quality=QUALITY, optimize=format == 'jpeg')
+    except (OSError, SyntaxError, ValueError, Image.DecompressionBombError) as error:
+        # e.g. "image file is truncated", which verify() does not notice.
+        raise ImageFetchError('Cannot resize: {}'.format(error))
+    return output.getvalue()
+
+def check_image(data):
+    from PIL import Image, UnidentifiedImageError
+    try:
+        Image.open(io.BytesIO(data)).verify()
+        # verify() only checks the headers; decoding finds truncated data.
+        Image.open(io.BytesIO(data)).load()
+    except (UnidentifiedImageError, OSError, SyntaxError, ValueError,
+            Image.DecompressionBombError) as error:
+        raise ImageFetchError('Not an image: {}'.format(error))
+
+
+def fetcher_from_config(config):
+    source = config.get('IMAGE_FETCHER', 'http')
+    if source == 'http':
+        return HTTPFetcher(config.get('IMAGE_FETCH_TIMEOUT', 10),
+                           config.get('IMAGE_MAX_BYTES', 10 * 1024 * 1024))
+    if source == 'local':
+        return LocalFetcher(config['IMAGE_LOCAL_DIR'])
+    raise ValueError('Unknown IMAGE_FETCHER: {}'.format(source))
+
+
+class ImageStore(object):
+    """Originals and derivatives on disk, keyed by content digest."""
+
+    def __init__(self, directory):
+        self.directory = private_directory(directory)
+
+    def _url_path(self, url):
+        return os.path.join(self.directory, 'urls', hashlib.sha256(url.encode('utf-8')).hexdigest())
+
+    def _image_dir(self, digest):
+        return os.path.join(self.directory, digest[:2], digest)
+
+    def _write(self, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        write_atomic(path, data)
+
+    def digest_for(self, url):
+        try:
+            with open(self._url_path(url)) as url_file:
+                return url_file.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def has_original(self, digest):
+        return os.path.exists(os.path.join(self._image_dir(digest), 'original'))
+
+    def source(self, digest):
+        """The url an image was fetched from, or None."""
+        try:
+            with open(os.path.join(self._image_dir(digest), 'source')) as source_file:
+                return source_file.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def add(self, url, data):
+        check_image(data)
+        digest = hashlib.sha256(data).hexdigest()
+        if not self.has_original(digest):
+            self._write(os.path.join(self._image_dir(digest), 'source'), url.encode('utf-8'))
+            self._write(os.path.join(self._image_dir(digest), 'original'), data)
+        self._write(self._url_path(url), digest.encode('ascii'))
+        return digest
+
+    def derivative(self, digest, size, format):
+        """Path of a derivative, made from the original if it does not exist yet."""
+        path = os.path.join(self._image_dir(digest), '{}.{}'.format(size, format))
+        if not os.path.exists(path):
+            with open(os.path.join(self._image_dir(digest), 'original'), 'rb') as original:
+                self._write(path, resize(original.read(), size, format))
+        return path
+
+
+class ImageProxy(object):
+    """Maps one app's image links to local derivatives and serves /img/<digest>/<size>."""
+
+    def __init__(self, store, fetcher, enabled=True, recheck_seconds=60):
+        self.store = store
+        self.fetcher = fetcher
+        self.enabled = enabled
+        self.recheck_seconds = recheck_seconds
+        # url -> digest, and url -> when it was last found unfetched.
+        self._digests = {}
+        self._missing = {}
+
+    def digest_for(self, url):
+        digest = self._digests.get(url)
+        if digest is not None:
+            return digest
+        checked_at = self._missing.get(url)
+        if checked_at is not None and time.monotonic() - checked_at < self.recheck_seconds:
+            return None
+        digest = self.store.digest_for(url)
+        if digest is None:
+            self._missing[url] = time.monotonic()
+        else:
+            self._digests[url] = digest
+            self._missing.pop(url, None)
+        return digest
+
+    def image_url(self, link, size):
+        """URL of a derivative of link, or link itself until it has been fetched."""
+        if not link or not self.enabled:
+            return link
+        digest = self.digest_for(link)
+        if digest is None:
+            return link
+        return url_for('image', digest=digest, size=size)
+
+    def fetch(self, url, force=False):
+        digest = None if force else self.store.digest_for(url)
+        if digest is None or not self.store.has_original(digest):
+            digest = self.store.add(url, self.fetcher(url))
+        self._digests[url] = digest
+        self._missing.pop(url, None)
+        return digest
+
+    def fetch_all(self, force=False):
+        """Fetch every venue and artist image and make its derivatives.
+
+        Returns {link: digest} of the images fetched and the errors of the rest.
+        """
+        links = set()
+        for model in (Venue, Artist):
+            links.update(link for link, in db.session.query(model.image_link).distinct() if link)
+        fetched = {}
+        errors = []
+        for link in sorted(links):
+            try:
+                digest = self.fetch(link, force=force)
+                for size in SIZES:
+                    for format, _ in FORMATS:
+                        self.store.derivative(digest, size, format)
+            except ImageFetchError as error:
+                errors.append(error)
+                continue
+            fetched[link] = digest
+        return fetched, errors
+
+    def send_image(self, digest, size):
+        if size not in SIZES or not DIGEST.match(digest) or not self.store.has_original(digest):
+            abort(404)
+        format, mimetype = FORMATS[-1]
+        for candidate, candidate_mimetype in FORMATS:
+            if request.accept_mimetypes[candidate_mimetype]:
+                format, mimetype = candidate, candidate_mimetype
+                break
+        try:
+            path = self.store.derivative(digest, size, format)
+        except ImageFetchError as error:
+            # Send the browser to the remote image rather than fail the page.
+            current_app.logger.warning('Image {}: {}'.format(digest, error))
+            source = self.store.source(digest)
+            if source is None:
+                abort(404)
+            return redirect(source)
+        response = send_file(path, mimetype=mimetype)
+        response.vary.add('Accept')
+        response.headers['Cache-Control'] = IMMUTABLE
+        return response
+
+
+class Images(object):
+    """Binds an ImageProxy to each app, as app.extensions['images']."""
+
+    def __init__(self, fetcher=None):
+        # A fetcher given here is used by every app; otherwise each app gets
+        # the one its IMAGE_FETCHER names.
+        self.fetcher = fetcher
+
+    def init_app(self, app):
+        proxy = ImageProxy(
+            ImageStore(app.config.get('IMAGE_DIR') or os.path.join(app.instance_path, 'images')),
+            self.fetcher or fetcher_from_config(app.config),
+            app.config.get('IMAGE_PROXY', True),
+            app.config.get('IMAGE_RECHECK_SECONDS', 60))
+        app.add_url_rule('/img/<digest>/<size>', 'image', proxy.send_image)
+        app.jinja_env.globals['image_url'] = proxy.image_url
+        app.extensions['images'] = proxy
+
+
+@images_cli.command('fetch', help='Fetch every venue and artist image and make its derivatives.')
+@click.option('--force', is_flag=True, help='Fetch links again even if they were fetched before.')
+def fetch_command(force):
+    started = time.perf_counter()
+    fetched, errors = current_app.extensions['images'].fetch_all(force=force)
+    for error in errors:
+        click.echo('Skipped {}'.format(error), err=True)
+    click.echo('Fetched {} images ({} failed) in {:.2f}s.'.format(
+        len(fetched), len(errors), time.perf_counter() - started))
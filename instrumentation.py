@@ -0,0 +1,165 @@
+#----------------------------------------------------------------------------#
+# Per-request SQL instrumentation.
+#
+# Cursor execution hooks time every statement run while a request is being
+# handled. The totals go out in a Server-Timing header (shown in the browser
+# devtools' timing tab):
+#
+#   Server-Timing: db;desc="7 queries";dur=12.4, db-slowest;dur=6.1, app;dur=31.0
+#
+# Statements slower than SLOW_QUERY_MS are written to SLOW_QUERY_LOG as one
+# JSON object per line, with the route that ran them. With SQL_DEBUG_PANEL
+# on, HTML pages also get a panel listing every statement and its duration.
+#----------------------------------------------------------------------------#
+
+import json
+import logging
+import os
+import time
+from datetime import datetime
+
+from flask import g, has_app_context, request
+from markupsafe import escape
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Statements kept per request for the debug panel.
+PANEL_MAX_STATEMENTS = 200
+
+
+class RequestStats(object):
+    """SQL statements run while handling one request."""
+
+    def __init__(self, keep_statements=False):
+        self.started = time.perf_counter()
+        self.count = 0
+        self.total = 0.0
+        self.slowest = 0.0
+        self.slowest_statement = None
+        self.statements = [] if keep_statements else None
+
+    def record(self, statement, elapsed):
+        self.count += 1
+        self.total += elapsed
+        if elapsed > self.slowest:
+            self.slowest = elapsed
+            self.slowest_statement = statement
+        if self.statements is not None and len(self.statements) < PANEL_MAX_STATEMENTS:
+            self.statements.append((elapsed, statement))
+
+    def server_timing(self):
+        return 'db;desc="{} queries";dur={:.1f}, db-slowest;dur={:.1f}, app;dur={:.1f}'.format(
+            self.count, self.total * 1000, self.slowest * 1000,
+            (time.perf_counter() - self.started) * 1000)
+
+
+def slow_query_logger(path):
+    # One logger per log file, shared by the apps that write to it.
+    logger = logging.getLogger('fyyur.slow_queries.' + os.path.abspath(path))
+    if not logger.handlers:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        handler = logging.FileHandler(path, delay=True)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(handler)
+        logger.setLevel(logging.WARNING)
+        logger.propagate = False
+    return logger
+
+
+class SQLReporter(object):
+    """Reports the SQL statements of one app's requests and logs slow ones."""
+
+    def __init__(self, slow_query_seconds=0.2, server_timing=True, debug_panel=False,
+                 logger=None):
+        self.slow_query_seconds = slow_query_seconds
+        self.server_timing = server_timing
+        self.debug_panel = debug_panel
+        self.logger = logger
+
+    def _start_request(self):
+        g.sql_stats = RequestStats(keep_statements=self.debug_panel)
+        g.sql_instrumentation = self
+
+    def _finish_request(self, response):
+        stats = g.pop('sql_stats', None)
+        if stats is None:
+            return response
+        if self.server_timing:
+            response.headers['Server-Timing'] = stats.server_timing()
+        if (self.debug_panel and response.status_code == 200 and response.mimetype == 'text/html'
+                and not response.direct_passthrough):
+            body = response.get_data(as_text=True)
+            if '</body>' in body:
+                response.set_data(body.replace('</body>', render_panel(stats) + '</body>', 1))
+        return response
+
+    def log_slow_query(self, statement, elapsed):
+        if self.logger is None:
+            return
+        self.logger.warning(json.dumps({
+            'time': datetime.now().isoformat(),
+            'route': request.endpoint,
+            'method': request.method,
+            'path': request.full_path.rstrip('?'),
+            'duration_ms': round(elapsed * 1000, 2),
+            'statement': ' '.join(statement.split()),
+        }))
+
+
+class SQLInstrumentation(object):
+    """Times the SQL statements of each request and reports slow ones.
+
+    Each app's SQLReporter lives in app.extensions['sql_instrumentation'].
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        log_path = app.config.get('SLOW_QUERY_LOG')
+        if log_path is None:
+            log_path = os.path.join(app.instance_path, 'slow_queries.log')
+        reporter = SQLReporter(
+            app.config.get('SLOW_QUERY_MS', 200) / 1000.0,
+            app.config.get('SERVER_TIMING', True),
+            app.config.get('SQL_DEBUG_PANEL', False),
+            slow_query_logger(log_path) if log_path else None)
+
+        # Listening on the Engine class covers the engine Flask-SQLAlchemy
+        # creates lazily, and any replica engines.
+        if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+            event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        app.before_request(reporter._start_request)
+        app.after_request(reporter._finish_request)
+        app.extensions['sql_instrumentation'] = reporter
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info['query_started'].pop()
+    if not has_app_context():
+        return
+    stats = g.get('sql_stats')
+    if stats is None:
+        return
+    elapsed = time.perf_counter() - started
+    stats.record(statement, elapsed)
+    instrumentation = g.sql_instrumentation
+    if elapsed >= instrumentation.slow_query_seconds:
+        instrumentation.log_slow_query(statement, elapsed)
+
+def render_panel(stats):
+    rows = ''.join(
+        '<tr><td class="text-right">{:.2f}</td><td><code>{}</code></td></tr>'.format(
+            elapsed * 1000, escape(statement))
+        for elapsed, statement in stats.statements)
+    return (
+        '<div id="sql-debug-panel" class="container" style="margin-top: 20px;">'
+        '<h4>SQL: {} queries, {:.1f} ms (slowest {:.1f} ms)</h4>'
+        '<table class="table table-condensed"><tr><th>ms</th><th>statement</th></tr>{}</table>'
+        '</div>'
+    ).format(stats.count, stats.total * 1000, stats.slowest * 1000, rows)
@@ -0,0 +1,428 @@
+#----------------------------------------------------------------------------#
+# Background jobs.
+#
+# Jobs are functions registered with @job(name) below. They are queued in a
+# SQLite file (JOBS_QUEUE_PATH) shared by the app and the workers, so no
+# broker is needed:
+#
+#   flask worker                       run queued and scheduled jobs
+#   flask jobs enqueue fetch-images    queue a job (--args '{"force": true}')
+#   flask jobs status                  jobs per state, and the schedule
+#
+# A job that raises is retried after JOBS_RETRY_BASE_SECONDS, doubling on
+# every attempt up to JOBS_RETRY_MAX_SECONDS, until it has been tried
+# max_attempts times. A job whose worker dies is run again once its claim of
+# JOBS_LEASE_SECONDS lapses, so jobs must be safe to run twice.
+#
+# JOBS_SCHEDULE queues jobs on cron schedules ("minute hour day month
+# weekday", local time), e.g. "rollover-show-counters: */15 * * * *". Every
+# worker checks the schedule; each due job is queued once.
+#
+# Durations and outcomes are recorded in the metrics registry and appear at
+# /metrics when the workers share METRICS_DIR with the web workers.
+#----------------------------------------------------------------------------#
+
+import json
+import os
+import signal
+import sqlite3
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import AppGroup, with_appcontext
+
+from models import db
+from queries import rebuild_show_counters, rollover_show_counters
+
+jobs_cli = AppGroup('jobs', help='Queue and inspect background jobs.')
+
+Job = namedtuple('Job', 'id name args attempts max_attempts')
+JobType = namedtuple('JobType', 'function max_attempts')
+
+# name -> JobType
+registry = {}
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS jobs (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  name TEXT NOT NULL,
+  args TEXT NOT NULL,
+  state TEXT NOT NULL DEFAULT 'queued',
+  attempts INTEGER NOT NULL DEFAULT 0,
+  max_attempts INTEGER NOT NULL,
+  run_at REAL NOT NULL,
+  claimed_until REAL,
+  last_error TEXT,
+  duration REAL,
+  created_at REAL NOT NULL,
+  updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_jobs_state_run_at ON jobs (state, run_at);
+CREATE TABLE IF NOT EXISTS schedule (
+  name TEXT PRIMARY KEY,
+  spec TEXT NOT NULL,
+  next_run_at REAL NOT NULL
+);
+'''
+
+
+def job(name, max_attempts=3):
+    """Register a function as the job called name."""
+    def register(function):
+        registry[name] = JobType(function, max_attempts)
+        return function
+    return register
+
+
+#----------------------------------------------------------------------------#
+# Schedules.
+#----------------------------------------------------------------------------#
+
+def cron_field(spec, low, high):
+    values = set()
+    for part in spec.split(','):
+        step = 1
+        if '/' in part:
+            part, step = part.split('/')
+            step = int(step)
+        if part == '*':
+            start, end = low, high
+        elif '-' in part:
+            start, end = (int(bound) for bound in part.split('-'))
+        else:
+            start = int(part)
+            end = high if step > 1 else start
+        if start < low or end > high or step < 1:
+            raise ValueError('{!r} is outside {}-{}'.format(spec, low, high))
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronSchedule(object):
+    """A five-field cron expression; weekday 0 (or 7) is Sunday."""
+
+    def __init__(self, spec):
+        fields = spec.split()
+        if len(fields) != 5:
+            raise ValueError('Expected 5 cron fields: {!r}'.format(spec))
+        self.spec = spec
+        self.minutes = cron_field(fields[0], 0, 59)
+        self.hours = cron_field(fields[1], 0, 23)
+        self.days = cron_field(fields[2], 1, 31)
+        self.months = cron_field(fields[3], 1, 12)
+        self.weekdays = set(day % 7 for day in cron_field(fields[4], 0, 7))
+        # As in cron, a day matches either field when both are restricted.
+        self.any_day = fields[2] == '*' or fields[4] == '*'
+
+    def _day_matches(self, moment):
+        in_days = moment.day in self.days
+        in_weekdays = (moment.weekday() + 1) % 7 in self.weekdays
+        if self.any_day:
+            return in_days and in_weekdays
+        return in_days or in_weekdays
+
+    def next_after(self, moment):
+        """The first matching minute after moment."""
+        moment = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = moment + timedelta(days=366 * 5)
+        while moment < limit:
+            if moment.month not in self.months:
+                moment = (moment.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(moment):
+                moment = moment.replace(hour=0, minute=0) + timedelta(days=1)
+            elif moment.hour not in self.hours:
+                moment = moment.replace(minute=0) + timedelta(hours=1)
+            elif moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+            else:
+                return moment
+        raise ValueError('{!r} never matches'.format(self.spec))
+
+
+def parse_schedule(text):
+    # "name: spec; name: spec" -> {name: CronSchedule}
+    schedule = {}
+    for entry in text.split(';'):
+        if not entry.strip():
+            continue
+        name, spec = entry.split(':', 1)
+        name = name.strip()
+        if name not in registry:
+            raise ValueError('Unknown job in JOBS_SCHEDULE: {}'.format(name))
+        schedule[name] = CronSchedule(spec.strip())
+    return schedule
+
+
+#----------------------------------------------------------------------------#
+# Queue.
+#----------------------------------------------------------------------------#
+
+class JobQueue(object):
+    """Queues jobs in SQLite and runs them in `flask worker` processes."""
+
+    def __init__(self, path, schedule=None, lease_seconds=600,
+                 retry_base_seconds=10, retry_max_seconds=3600):
+        self.path = path
+        self.schedule = schedule or {}
+        self.lease_seconds = lease_seconds
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self._ready = False
+
+    def _connect(self):
+        # One connection per call, as in writebehind.PendingShows.
+        if not self._ready:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        connection.row_factory = sqlite3.Row
+        if not self._ready:
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.executescript(SCHEMA)
+            self._ready = True
+        return connection
+
+    def _insert(self, connection, name, args, run_at):
+        now = time.time()
+        return connection.execute(
+            'INSERT INTO jobs (name, args, max_attempts, run_at, created_at, updated_at)'
+            ' VALUES (?, ?, ?, ?, ?, ?)',
+            (name, json.dumps(args, sort_keys=True), registry[name].max_attempts,
+             run_at or now, now, now)).lastrowid
+
+    def enqueue(self, name, run_at=None, **args):
+        """Queue job name with keyword arguments args; returns the job id."""
+        if name not in registry:
+            raise KeyError('Unknown job: {}'.format(name))
+        connection = self._connect()
+        try:
+            return self._insert(connection, name, args, run_at)
+        finally:
+            connection.close()
+
+    def queue_scheduled(self, now=None):
+        """Queue the scheduled jobs that are due; returns their names."""
+        if not self.schedule:
+            return []
+        now = now or datetime.now()
+        queued = []
+        connection = self._connect()
+        try:
+            connection.execute('BEGIN IMMEDIATE')
+            rows = dict((row['name'], row) for row in connection.execute('SELECT * FROM schedule'))
+            for name, cron in self.schedule.items():
+                row = rows.get(name)
+                if row is not None and row['spec'] == cron.spec:
+                    if row['next_run_at'] > now.timestamp():
+                        continue
+                    self._insert(connection, name, {}, None)
+                    queued.append(name)
+                connection.execute(
+                    'INSERT OR REPLACE INTO schedule (name, spec, next_run_at) VALUES (?, ?, ?)',
+                    (name, cron.spec, cron.next_after(now).timestamp()))
+            connection.execute('COMMIT')
+        except BaseException:
+            if connection.in_transaction:
+                connection.execute('ROLLBACK')
+            raise
+        finally:
+            connection.close()
+        return queued
+
+    def claim(self):
+        """The next due job, claimed for lease_seconds, or None."""
+        now = time.time()
+        connection = self._connect()
+        try:
+            connection.execute('BEGIN IMMEDIATE')
+            row = connection.execute(
+                "SELECT id, name, args, attempts, max_attempts FROM jobs"
+                " WHERE (state = 'queued' AND run_at <= ?) OR (state = 'running' AND claimed_until < ?)"
+                " ORDER BY run_at LIMIT 1", (now, now)).fetchone()
+            if row is not None:
+                connection.execute(
+                    "UPDATE jobs SET state = 'running', attempts = attempts + 1,"
+                    " claimed_until = ?, updated_at = ? WHERE id = ?",
+                    (now + self.lease_seconds, now, row['id']))
+            connection.execute('COMMIT')
+        except BaseException:
+            if connection.in_transaction:
+                connection.execute('ROLLBACK')
+            raise
+        finally:
+            connection.close()
+        if row is None:
+            return None
+        return Job(row['id'], row['name'], json.loads(row['args']),
+                   row['attempts'] + 1, row['max_attempts'])
+
+    def _update(self, job_id, **columns):
+        columns['updated_at'] = time.time()
+        connection = self._connect()
+        try:
+            connection.execute(
+                'UPDATE jobs SET {} WHERE id = ?'.format(', '.join(name + ' = ?' for name in columns)),
+                list(columns.values()) + [job_id])
+        finally:
+            connection.close()
+
+    def run(self, job):
+        """Run a claimed job; returns 'done', 'retry' or 'failed'."""
+        started = time.perf_counter()
+        try:
+            registry[job.name].function(**job.args)
+            db.session.commit()
+        except Exception as error:
+            db.session.rollback()
+            duration = time.perf_counter() - started
+            if job.attempts < job.max_attempts:
+                outcome = 'retry'
+                delay = min(self.retry_base_seconds * 2 ** (job.attempts - 1), self.retry_max_seconds)
+                self._update(job.id, state='queued', run_at=time.time() + delay, claimed_until=None,
+                             last_error=repr(error), duration=duration)
+            else:
+                outcome = 'failed'
+                self._update(job.id, state='failed', claimed_until=None,
+                             last_error=repr(error), duration=duration)
+        else:
+            outcome = 'done'
+            duration = time.perf_counter() - started
+            self._update(job.id, state='done', claimed_until=None, duration=duration)
+        finally:
+            db.session.remove()
+
+        metrics = current_app.extensions.get('metrics')
+        if metrics is not None:
+            metrics.registry.inc('fyyur_jobs_total', (('job', job.name), ('outcome', outcome)))
+            metrics.registry.observe('fyyur_job_duration_seconds', (('job', job.name),), duration)
+            if metrics.directory:
+                metrics.flush()
+        return outcome, duration
+
+    def counts(self):
+        connection = self._connect()
+        try:
+            return (dict(connection.execute('SELECT state, COUNT(*) FROM jobs GROUP BY state').fetchall()),
+                    connection.execute('SELECT name, spec, next_run_at FROM schedule ORDER BY name').fetchall())
+        finally:
+            connection.close()
+
+    def purge(self, older_than_seconds):
+        connection = self._connect()
+        try:
+            return connection.execute(
+                "DELETE FROM jobs WHERE state IN ('done', 'failed') AND updated_at < ?",
+                (time.time() - older_than_seconds,)).rowcount
+        finally:
+            connection.close()
+
+
+class Jobs(object):
+    """Binds a JobQueue to each app, as app.extensions['jobs']."""
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        path = app.config.get('JOBS_QUEUE_PATH')
+        if path is None:
+            path = os.path.join(app.instance_path, 'jobs.sqlite3')
+        app.extensions['jobs'] = JobQueue(
+            path,
+            parse_schedule(app.config.get('JOBS_SCHEDULE', '')),
+            app.config.get('JOBS_LEASE_SECONDS', 600),
+            app.config.get('JOBS_RETRY_BASE_SECONDS', 10),
+            app.config.get('JOBS_RETRY_MAX_SECONDS', 3600))
+
+
+#----------------------------------------------------------------------------#
+# Jobs.
+#----------------------------------------------------------------------------#
+
+# The same work as `flask rebuild-show-counters` and
+# `flask rollover-show-counters` (commands.py), for the schedule.
+
+@job('rebuild-show-counters')
+def rebuild_counters():
+    rebuild_show_counters()
+    db.session.commit()
+    current_app.extensions['response_cache'].invalidate('venues', 'artists')
+
+@job('rollover-show-counters')
+def rollover_counters(since_minutes=60):
+    rollover_show_counters(datetime.now() - timedelta(minutes=since_minutes))
+    db.session.commit()
+    current_app.extensions['response_cache'].invalidate('venues', 'artists')
+
+@job('fetch-images')
+def fetch_images(force=False):
+    # Links that were fetched before are skipped, so this only fetches the
+    # images of new and edited venues and artists.
+    fetched, errors = current_app.extensions['images'].fetch_all(force=force)
+    if errors and not fetched:
+        raise errors[0]
+
+@job('drain-show-queue')
+def drain_show_queue():
+    # For deployments that do not run `flask show-queue run` (writebehind.py).
+    writer = current_app.extensions['show_writer']
+    while sum(writer.drain_batch()):
+        pass
+
+@job('warm-pages')
+def warm_pages(paths=None):
+    # Renders pages into the page cache; useful with the filesystem backend,
+    # which the web workers share.
+    client = current_app.test_client()
+    for path in paths or current_app.config.get('JOBS_WARM_PATHS', ()):
+        client.get(path).close()
+
+
+#----------------------------------------------------------------------------#
+# Commands.
+#----------------------------------------------------------------------------#
+
+@click.command('worker')
+@click.option('--once', is_flag=True, help='Stop when no job is due.')
+@click.option('--interval', default=1.0, show_default=True,
+              help='Seconds to wait when no job is due.')
+@with_appcontext
+def worker_command(once, interval):
+    """Run queued and scheduled background jobs."""
+    queue = current_app.extensions['jobs']
+    retain_seconds = current_app.config.get('JOBS_RETAIN_SECONDS', 7 * 86400)
+    stopping = []
+    # Finish the current job on SIGTERM/SIGINT, then exit.
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: stopping.append(True))
+    while not stopping:
+        queue.queue_scheduled()
+        job = queue.claim()
+        if job is not None:
+            outcome, duration = queue.run(job)
+            click.echo('{} #{} {} (attempt {}/{}) in {:.3f}s'.format(
+                job.name, job.id, outcome, job.attempts, job.max_attempts, duration))
+            continue
+        queue.purge(retain_seconds)
+        if once:
+            break
+        time.sleep(interval)
+
+@jobs_cli.command('enqueue', help='Queue a background job.')
+@click.argument('name', type=click.Choice(sorted(registry)))
+@click.option('--args', 'arguments', default='{}', help='Keyword arguments, as a JSON object.')
+def enqueue_command(name, arguments):
+    job_id = current_app.extensions['jobs'].enqueue(name, **json.loads(arguments))
+    click.echo('Queued {} as job #{}.'.format(name, job_id))
+
+@jobs_cli.command('status', help='Count jobs by state and list the schedule.')
+def status_command():
+    counts, schedule = current_app.extensions['jobs'].counts()
+    for state in ('queued', 'running', 'done', 'failed'):
+        click.echo('{:<8} {}'.format(state, counts.get(state, 0)))
+    for row in schedule:
+        click.echo('{:<24} {:<16} next {}'.format(
+            row['name'], row['spec'], datetime.fromtimestamp(row['next_run_at']).strftime('%Y-%m-%d %H:%M')))
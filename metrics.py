@@ -0,0 +1,295 @@
+#----------------------------------------------------------------------------#
+# Prometheus metrics.
+#
+#   GET /metrics
+#
+# Served in the Prometheus text exposition format:
+#   - request counts and latency histograms per Flask endpoint
+#   - template render time per template
+#   - connection-pool checkouts plus size/checked-out/overflow gauges
+#   - rendered-page cache hits, misses and hit ratio
+#   - venue/artist summary cache hits and misses
+#   - background job outcomes and durations, per job (see jobs.py)
+#
+# Each worker counts in plain in-process dicts. With METRICS_DIR set, every
+# worker also writes a snapshot of its counters to METRICS_DIR/<pid>.json at
+# most every METRICS_FLUSH_SECONDS, and /metrics sums the snapshots of all
+# workers, so any gunicorn worker can answer the scrape. Empty METRICS_DIR
+# when redeploying, as counters of old workers are kept until then.
+#----------------------------------------------------------------------------#
+
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+
+from flask import Response, current_app, g, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.pool import Pool
+
+from files import atomic_write
+from models import db
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HELP = {
+    'fyyur_http_requests_total': ('counter', 'Requests handled, by endpoint, method and status.'),
+    'fyyur_http_request_duration_seconds': ('histogram', 'Time spent handling requests, by endpoint.'),
+    'fyyur_template_render_seconds': ('histogram', 'Time spent rendering templates, by template.'),
+    'fyyur_db_pool_checkouts_total': ('counter', 'Connections checked out of the pool.'),
+    'fyyur_db_pool_connects_total': ('counter', 'New DB connections opened by the pool.'),
+    'fyyur_db_pool_size': ('gauge', 'Configured pool size, per worker.'),
+    'fyyur_db_pool_checked_out': ('gauge', 'Connections currently checked out, per worker.'),
+    'fyyur_db_pool_overflow': ('gauge', 'Connections open beyond the pool size, per worker.'),
+    'fyyur_response_cache_hits_total': ('counter', 'Rendered-page cache hits.'),
+    'fyyur_response_cache_misses_total': ('counter', 'Rendered-page cache misses.'),
+    'fyyur_response_cache_hit_ratio': ('gauge', 'Rendered-page cache hits over lookups.'),
+    'fyyur_summary_cache_hits_total': ('counter', 'Venue/artist summaries found in the cache.'),
+    'fyyur_summary_cache_misses_total': ('counter', 'Venue/artist summaries loaded from the database.'),
+    'fyyur_jobs_total': ('counter', 'Background jobs run, by job and outcome.'),
+    'fyyur_job_duration_seconds': ('histogram', 'Time spent running background jobs, by job.'),
+}
+
+
+class MetricsRegistry(object):
+    """Counters and histograms of one process, keyed by (name, labels)."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counters = defaultdict(float)
+        # Per-bucket (non-cumulative) counts, then the sum and the count.
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name, labels=(), amount=1):
+        with self._lock:
+            self.counters[(name, labels)] += amount
+
+    def observe(self, name, labels, value):
+        index = len(self.buckets)
+        for position, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = position
+                break
+        with self._lock:
+            histogram = self.histograms.get((name, labels))
+            if histogram is None:
+                histogram = self.histograms[(name, labels)] = [0] * (len(self.buckets) + 3)
+            histogram[index] += 1
+            histogram[-2] += value
+            histogram[-1] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'counters': [[name, labels, value] for (name, labels), value in self.counters.items()],
+                'histograms': [[name, labels, list(values)] for (name, labels), values in self.histograms.items()],
+            }
+
+
+def timed_template_class(base, registry):
+    # Templates are only rendered through Template.render at the top level, so
+    # extended and included templates count towards the page that uses them.
+    class TimedTemplate(base):
+        def render(self, *args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return super(TimedTemplate, self).render(*args, **kwargs)
+            finally:
+                registry.observe('fyyur_template_render_seconds', (('template', self.name),),
+                                 time.perf_counter() - started)
+    return TimedTemplate
+
+
+class AppMetrics(object):
+    """One app's registry, and the snapshots it shares through METRICS_DIR."""
+
+    def __init__(self, registry, directory=None, flush_seconds=5):
+        self.registry = registry
+        self.directory = directory
+        self.flush_seconds = flush_seconds
+        self._flushed_at = 0.0
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+
+    def _start_request(self):
+        g.metrics_started = time.perf_counter()
+
+    def _finish_request(self, response):
+        started = g.pop('metrics_started', None)
+        if started is None:
+            return response
+        endpoint = request.endpoint or 'unmatched'
+        self.registry.inc('fyyur_http_requests_total', (
+            ('endpoint', endpoint), ('method', request.method), ('status', str(response.status_code))))
+        self.registry.observe('fyyur_http_request_duration_seconds', (('endpoint', endpoint),),
+                              time.perf_counter() - started)
+        if self.directory and time.time() - self._flushed_at >= self.flush_seconds:
+            self.flush()
+        return response
+
+    def snapshot(self):
+        # The registry plus values read from the pool and the page cache now.
+        snapshot = self.registry.snapshot()
+        snapshot['pid'] = os.getpid()
+        snapshot['gauges'] = []
+        pool = db.engine.pool
+        for name, method in (('fyyur_db_pool_size', 'size'),
+                             ('fyyur_db_pool_checked_out', 'checkedout'),
+                             ('fyyur_db_pool_overflow', 'overflow')):
+            if hasattr(pool, method):
+                snapshot['gauges'].append([name, [], getattr(pool, method)()])
+        response_cache = current_app.extensions.get('response_cache')
+        if response_cache is not None:
+            snapshot['counters'].append(['fyyur_response_cache_hits_total', [], response_cache.hits])
+            snapshot['counters'].append(['fyyur_response_cache_misses_total', [], response_cache.misses])
+        summaries = current_app.extensions.get('summaries')
+        if summaries is not None:
+            snapshot['counters'].append(['fyyur_summary_cache_hits_total', [], summaries.hits])
+            snapshot['counters'].append(['fyyur_summary_cache_misses_total', [], summaries.misses])
+        return snapshot
+
+    def flush(self):
+        # Atomically replace this worker's snapshot file.
+        self._flushed_at = time.time()
+        path = os.path.join(self.directory, '{}.json'.format(os.getpid()))
+        try:
+            with atomic_write(path, 'w') as snapshot_file:
+                json.dump(self.snapshot(), snapshot_file)
+        except OSError:
+            pass
+
+    def collect(self):
+        if not self.directory:
+            return [self.snapshot()]
+        self.flush()
+        snapshots = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.directory, name)) as snapshot_file:
+                    snapshots.append(json.load(snapshot_file))
+            except (OSError, ValueError):
+                continue
+        return snapshots
+
+    def render_metrics(self):
+        return Response(render_exposition(self.collect(), self.registry.buckets),
+                        mimetype='text/plain; version=0.0.4')
+
+
+class Metrics(object):
+    """Collects request, template, pool and cache metrics and serves /metrics.
+
+    Each app's AppMetrics lives in app.extensions['metrics'].
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app_metrics = AppMetrics(
+            MetricsRegistry(app.config.get('METRICS_BUCKETS', DEFAULT_BUCKETS)),
+            app.config.get('METRICS_DIR') or None,
+            app.config.get('METRICS_FLUSH_SECONDS', 5))
+        # The pool events are global; the listeners count towards whichever
+        # app is current.
+        if not event.contains(Pool, 'checkout', _on_checkout):
+            event.listen(Pool, 'checkout', _on_checkout)
+            event.listen(Pool, 'connect', _on_connect)
+        app.jinja_env.template_class = timed_template_class(
+            app.jinja_env.template_class, app_metrics.registry)
+        app.before_request(app_metrics._start_request)
+        app.after_request(app_metrics._finish_request)
+        app.add_url_rule('/metrics', 'metrics', app_metrics.render_metrics)
+        app.extensions['metrics'] = app_metrics
+
+
+def _current_registry():
+    if not has_app_context():
+        return None
+    app_metrics = current_app.extensions.get('metrics')
+    return app_metrics.registry if app_metrics is not None else None
+
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    registry = _current_registry()
+    if registry is not None:
+        registry.inc('fyyur_db_pool_checkouts_total')
+
+def _on_connect(dbapi_connection, connection_record):
+    registry = _current_registry()
+    if registry is not None:
+        registry.inc('fyyur_db_pool_connects_total')
+
+
+#----------------------------------------------------------------------------#
+# Exposition.
+#----------------------------------------------------------------------------#
+
+def worker_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join('{}="{}"'.format(key, str(value).replace('\\', '\\\\').replace('"', '\\"'))
+                          for key, value in labels) + '}'
+
+def format_value(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+def render_exposition(snapshots, buckets):
+    # Counters and histograms are summed over workers; gauges are reported per
+    # live worker, as a dead worker's pool no longer exists.
+    counters = defaultdict(float)
+    histograms = {}
+    gauges = []
+    for snapshot in snapshots:
+        for name, labels, value in snapshot['counters']:
+            counters[(name, tuple(map(tuple, labels)))] += value
+        for name, labels, values in snapshot['histograms']:
+            key = (name, tuple(map(tuple, labels)))
+            if key in histograms:
+                histograms[key] = [total + value for total, value in zip(histograms[key], values)]
+            else:
+                histograms[key] = values
+        if worker_alive(snapshot['pid']):
+            for name, labels, value in snapshot['gauges']:
+                gauges.append((name, (('pid', snapshot['pid']),) + tuple(map(tuple, labels)), value))
+
+    hits = counters.get(('fyyur_response_cache_hits_total', ()), 0)
+    misses = counters.get(('fyyur_response_cache_misses_total', ()), 0)
+    gauges.append(('fyyur_response_cache_hit_ratio', (), hits / (hits + misses) if hits + misses else 0.0))
+
+    lines = defaultdict(list)
+    for (name, labels), value in sorted(counters.items()):
+        lines[name].append('{}{} {}'.format(name, format_labels(labels), format_value(value)))
+    for name, labels, value in gauges:
+        lines[name].append('{}{} {}'.format(name, format_labels(labels), format_value(value)))
+    for (name, labels), values in sorted(histograms.items()):
+        cumulative = 0
+        for bound, count in zip(buckets + ('+Inf',), values):
+            cumulative += count
+            lines[name].append('{}_bucket{} {}'.format(
+                name, format_labels(labels + (('le', bound),)), cumulative))
+        lines[name].append('{}_sum{} {}'.format(name, format_labels(labels), format_value(values[-2])))
+        lines[name].append('{}_count{} {}'.format(name, format_labels(labels), values[-1]))
+
+    output = []
+    for name in sorted(lines):
+        metric_type, description = HELP.get(name, ('untyped', name))
+        output.append('# HELP {} {}'.format(name, description))
+        output.append('# TYPE {} {}'.format(name, metric_type))
+        output.extend(lines[name])
+    return '\n'.join(output) + '\n'
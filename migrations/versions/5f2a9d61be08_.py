@@ -0,0 +1,41 @@
+"""replace Venue.upcoming_shows with maintained show counters
+
+Revision ID: 5f2a9d61be08
+Revises: d41c8e27f5a3
+Create Date: 2026-10-18 11:48:21.730415
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5f2a9d61be08'
+down_revision = 'd41c8e27f5a3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table in ('Venue', 'Artist'):
+        op.add_column(table, sa.Column('upcoming_shows_count', sa.Integer(), server_default='0', nullable=False))
+        op.add_column(table, sa.Column('past_shows_count', sa.Integer(), server_default='0', nullable=False))
+    op.drop_column('Venue', 'upcoming_shows')
+
+    # Backfill from the shows table; `flask rebuild-show-counters` does the same.
+    for table, column in (('Venue', 'venue_id'), ('Artist', 'artist_id')):
+        op.execute(
+            'UPDATE "{table}" SET '
+            'upcoming_shows_count = (SELECT count(*) FROM shows '
+            'WHERE shows.{column} = "{table}".id AND shows.start_time > LOCALTIMESTAMP), '
+            'past_shows_count = (SELECT count(*) FROM shows '
+            'WHERE shows.{column} = "{table}".id AND shows.start_time <= LOCALTIMESTAMP)'
+            .format(table=table, column=column))
+
+
+def downgrade():
+    op.add_column('Venue', sa.Column('upcoming_shows', sa.Integer(), nullable=True))
+    op.execute('UPDATE "Venue" SET upcoming_shows = upcoming_shows_count')
+    for table in ('Artist', 'Venue'):
+        op.drop_column(table, 'past_shows_count')
+        op.drop_column(table, 'upcoming_shows_count')
@@ -0,0 +1,99 @@
+"""move comma-joined genres into a genres table
+
+Revision ID: 9c7e3b2d4f16
+Revises: 5f2a9d61be08
+Create Date: 2026-10-18 12:35:09.611842
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c7e3b2d4f16'
+down_revision = '5f2a9d61be08'
+branch_labels = None
+depends_on = None
+
+
+def split_genres(value):
+    # Rows were saved either as "Jazz,Rock" or, when a list was bound to the
+    # String column, as the array literal '{Jazz,"Hip-Hop"}'.
+    if not value:
+        return []
+    value = value.strip().lstrip('{').rstrip('}')
+    return [name.strip().strip('"') for name in value.split(',') if name.strip().strip('"')]
+
+
+def upgrade():
+    genres = op.create_table('genres',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=120), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+    venue_genres = op.create_table('venue_genres',
+    sa.Column('venue_id', sa.Integer(), nullable=False),
+    sa.Column('genre_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['genre_id'], ['genres.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['venue_id'], ['Venue.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('venue_id', 'genre_id')
+    )
+    op.create_index('ix_venue_genres_genre_id_venue_id', 'venue_genres', ['genre_id', 'venue_id'], unique=False)
+    artist_genres = op.create_table('artist_genres',
+    sa.Column('artist_id', sa.Integer(), nullable=False),
+    sa.Column('genre_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['artist_id'], ['Artist.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['genre_id'], ['genres.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('artist_id', 'genre_id')
+    )
+    op.create_index('ix_artist_genres_genre_id_artist_id', 'artist_genres', ['genre_id', 'artist_id'], unique=False)
+
+    # Convert the existing strings.
+    connection = op.get_bind()
+    links = {'Venue': [], 'Artist': []}
+    names = set()
+    for table in links:
+        rows = connection.execute(sa.text('SELECT id, genres FROM "{}"'.format(table)))
+        for entity_id, value in rows:
+            for name in split_genres(value):
+                names.add(name)
+                links[table].append((entity_id, name))
+
+    if names:
+        op.bulk_insert(genres, [{'name': name} for name in sorted(names)])
+    genre_ids = dict(
+        (name, genre_id) for genre_id, name
+        in connection.execute(sa.text('SELECT id, name FROM genres')))
+    venue_links = set((venue_id, genre_ids[name]) for venue_id, name in links['Venue'])
+    artist_links = set((artist_id, genre_ids[name]) for artist_id, name in links['Artist'])
+    if venue_links:
+        op.bulk_insert(venue_genres, [
+            {'venue_id': venue_id, 'genre_id': genre_id} for venue_id, genre_id in sorted(venue_links)])
+    if artist_links:
+        op.bulk_insert(artist_genres, [
+            {'artist_id': artist_id, 'genre_id': genre_id} for artist_id, genre_id in sorted(artist_links)])
+
+    op.drop_column('Venue', 'genres')
+    op.drop_column('Artist', 'genres')
+
+
+def downgrade():
+    op.add_column('Artist', sa.Column('genres', sa.String(length=120), nullable=True))
+    op.add_column('Venue', sa.Column('genres', sa.String(length=120), nullable=True))
+    op.execute(
+        'UPDATE "Venue" SET genres = (SELECT string_agg(genres.name, \',\' ORDER BY genres.name) '
+        'FROM venue_genres JOIN genres ON genres.id = venue_genres.genre_id '
+        'WHERE venue_genres.venue_id = "Venue".id)')
+    op.execute(
+        'UPDATE "Artist" SET genres = (SELECT string_agg(genres.name, \',\' ORDER BY genres.name) '
+        'FROM artist_genres JOIN genres ON genres.id = artist_genres.genre_id '
+        'WHERE artist_genres.artist_id = "Artist".id)')
+    op.execute('UPDATE "Venue" SET genres = \'\' WHERE genres IS NULL')
+    op.alter_column('Venue', 'genres', nullable=False)
+
+    op.drop_index('ix_artist_genres_genre_id_artist_id', table_name='artist_genres')
+    op.drop_table('artist_genres')
+    op.drop_index('ix_venue_genres_genre_id_venue_id', table_name='venue_genres')
+    op.drop_table('venue_genres')
+    op.drop_table('genres')
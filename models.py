@@ -0,0 +1,128 @@
+from datetime import datetime
+from database import PooledSQLAlchemy
+
+db = PooledSQLAlchemy()
+
+#----------------------------------------------------------------------------#
+# Models.
+#----------------------------------------------------------------------------#
+
+venue_genres = db.Table('venue_genres',
+  db.Column('venue_id', db.Integer, db.ForeignKey('Venue.id', ondelete='CASCADE'), primary_key=True),
+  db.Column('genre_id', db.Integer, db.ForeignKey('genres.id', ondelete='CASCADE'), primary_key=True),
+  # The primary key answers "genres of a venue", this index "venues of a genre".
+  db.Index('ix_venue_genres_genre_id_venue_id', 'genre_id', 'venue_id')
+)
+
+artist_genres = db.Table('artist_genres',
+  db.Column('artist_id', db.Integer, db.ForeignKey('Artist.id', ondelete='CASCADE'), primary_key=True),
+  db.Column('genre_id', db.Integer, db.ForeignKey('genres.id', ondelete='CASCADE'), primary_key=True),
+  db.Index('ix_artist_genres_genre_id_artist_id', 'genre_id', 'artist_id')
+)
+
+class Genre(db.Model):
+  __tablename__ = 'genres'
+
+  id = db.Column(db.Integer, primary_key=True)
+  name = db.Column(db.String(120), nullable=False, unique=True)
+
+  def __repr__(self):
+    return f"<Genre ID: {self.id}, Genre name:{self.name}>"
+
+class Venue(db.Model):
+    __tablename__ = 'Venue'
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String, nullable=False)
+    city = db.Column(db.String(120), nullable=False)
+    state = db.Column(db.String(120), nullable=False)
+    address = db.Column(db.String(120), nullable=False)
+    phone = db.Column(db.String(120))
+    image_link = db.Column(db.String(500))
+    facebook_link = db.Column(db.String(120))
+
+    # TODO: implement any missing fields, as a database migration using Flask-Migrate
+    genres = db.relationship('Genre', secondary=venue_genres, lazy=True, order_by='Genre.name')
+    website_link = db.Column(db.String(120))
+    seeking_talent =db.Column(db.Boolean, default=False)
+    seeking_description = db.Column(db.Text)
+    # Denormalized show counters, see "Show counters." below.
+    upcoming_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    past_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    shows = db.relationship('Shows', backref='venue', lazy=True, order_by='Shows.start_time')
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.now, onupdate=datetime.now, server_default=db.func.now())
+
+    # The directory orders by (state, city, id); an index in that order
+    # returns the rows sorted.
+    __table_args__ = (
+      db.Index('ix_Venue_state_city_id', 'state', 'city', 'id'),
+      db.Index('ix_Venue_updated_at', 'updated_at'),
+      db.Index('ix_Venue_name_trgm', 'name',
+        postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}),
+    )
+
+    def __repr__(self):
+      return f"<Venue ID: {self.id}, Venue name:{self.name}>"
+
+class Artist(db.Model):
+    __tablename__ = 'Artist'
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String, nullable=False)
+    city = db.Column(db.String(120), nullable=False)
+    state = db.Column(db.String(120), nullable=False)
+    phone = db.Column(db.String(120))
+    genres = db.relationship('Genre', secondary=artist_genres, lazy=True, order_by='Genre.name')
+    image_link = db.Column(db.String(500))
+    facebook_link = db.Column(db.String(120))
+
+    # TODO: implement any missing fields, as a database migration using Flask-Migrate
+    website_link = db.Column(db.String(120))
+    seeking_venue =db.Column(db.Boolean, default=False)
+    seeking_description = db.Column(db.Text)
+    upcoming_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    past_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    shows = db.relationship('Shows', backref='artist', lazy=True, order_by='Shows.start_time')
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.now, onupdate=datetime.now, server_default=db.func.now())
+
+    __table_args__ = (
+      db.Index('ix_Artist_updated_at', 'updated_at'),
+      db.Index('ix_Artist_name_trgm', 'name',
+        postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}),
+    )
+    
+    def __repr__(self):
+      return f"<Venue ID: {self.id}, Venue name:{self.name}>"
+
+# TODO Implement Show and Artist models, and complete all model relationships and properties, as a database migration.
+
+class Shows(db.Model):
+  __tablename__ = 'shows'
+
+  id = db.Column(db.Integer, primary_key=True)
+  artist_id = db.Column(db.Integer, db.ForeignKey(Artist.id), nullable=False)
+  venue_id = db.Column(db.Integer, db.ForeignKey(Venue.id), nullable=False)
+  start_time = db.Column(db.DateTime, nullable=False)
+  updated_at = db.Column(db.DateTime, nullable=False, default=datetime.now, onupdate=datetime.now, server_default=db.func.now())
+
+  # Detail pages filter on one side of the show and order by start_time,
+  # /shows pages on (start_time, id).
+  __table_args__ = (
+    db.Index('ix_shows_venue_id_start_time', 'venue_id', 'start_time'),
+    db.Index('ix_shows_artist_id_start_time', 'artist_id', 'start_time'),
+    db.Index('ix_shows_start_time_id', 'start_time', 'id'),
+  )
+
+class ShowSubmission(db.Model):
+  # The write-behind token (see writebehind.py) of a show, written in the
+  # transaction that inserts it, so a retried batch can tell which of its
+  # shows were already saved.
+  __tablename__ = 'show_submissions'
+
+  token = db.Column(db.String(32), primary_key=True)
+  show_id = db.Column(db.Integer, db.ForeignKey(Shows.id, ondelete='CASCADE'), nullable=False)
+  created_at = db.Column(db.DateTime, nullable=False, default=datetime.now, server_default=db.func.now())
+
+  __table_args__ = (
+    db.Index('ix_show_submissions_created_at', 'created_at'),
+  )
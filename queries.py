@@ -0,0 +1,296 @@
+from collections import namedtuple
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import tuple_
+from models import db, Genre, Venue, Artist, Shows, venue_genres, artist_genres
+
+#----------------------------------------------------------------------------#
+# Genres.
+#----------------------------------------------------------------------------#
+
+def get_or_create_genres(names):
+  # Maps genre names from a form to Genre rows, adding the unknown ones.
+  names = sorted(set(name.strip() for name in names if name and name.strip()))
+  genres = Genre.query.filter(Genre.name.in_(names)).all() if names else []
+  known = set(genre.name for genre in genres)
+  for name in names:
+    if name not in known:
+      genre = Genre(name=name)
+      db.session.add(genre)
+      genres.append(genre)
+  return genres
+
+#----------------------------------------------------------------------------#
+# Show counters.
+#----------------------------------------------------------------------------#
+
+# Venue and Artist carry upcoming_shows_count / past_shows_count so that list
+# and search pages never count show rows. New shows bump them incrementally,
+# rollover_show_counters() moves shows that have started since the last run
+# from upcoming to past, and refresh_show_counters() recomputes them exactly.
+
+def count_new_show(artist_id, venue_id, start_time, count=1):
+  # Runs in the same transaction as the insert of the show (or of count shows
+  # on the same side of now).
+  if start_time > datetime.now():
+    column_name = 'upcoming_shows_count'
+  else:
+    column_name = 'past_shows_count'
+  for model, entity_id in ((Artist, artist_id), (Venue, venue_id)):
+    counter = getattr(model, column_name)
+    model.query.filter(model.id == entity_id).update(
+      {counter: counter + count}, synchronize_session=False)
+
+def refresh_show_counters(model, show_column, ids=None):
+  # Recomputes both counters of model rows (all of them, or those whose id is
+  # in ids) with one correlated UPDATE.
+  now = datetime.now()
+  upcoming = (
+    db.select(db.func.count(Shows.id))
+    .where(show_column == model.id, Shows.start_time > now)
+    .scalar_subquery()
+  )
+  past = (
+    db.select(db.func.count(Shows.id))
+    .where(show_column == model.id, Shows.start_time <= now)
+    .scalar_subquery()
+  )
+  query = model.query
+  if ids is not None:
+    query = query.filter(model.id.in_(ids))
+  return query.update(
+    {model.upcoming_shows_count: upcoming, model.past_shows_count: past},
+    synchronize_session=False)
+
+def rebuild_show_counters():
+  # Recomputes every artist and venue counter. Returns the rows updated, as
+  # (artists, venues) like rollover_show_counters().
+  artists = refresh_show_counters(Artist, Shows.artist_id)
+  venues = refresh_show_counters(Venue, Shows.venue_id)
+  return artists, venues
+
+def rollover_show_counters(since):
+  # Refreshes only the venues and artists with a show that started between
+  # since and now. Recomputing is idempotent, so overlapping windows are safe.
+  started_shows = Shows.query.filter(
+    Shows.start_time > since, Shows.start_time <= datetime.now())
+  artists = refresh_show_counters(Artist, Shows.artist_id,
+    started_shows.with_entities(Shows.artist_id))
+  venues = refresh_show_counters(Venue, Shows.venue_id,
+    started_shows.with_entities(Shows.venue_id))
+  return artists, venues
+
+#----------------------------------------------------------------------------#
+# Search.
+#----------------------------------------------------------------------------#
+
+def search_by_name(model, search_term):
+  # Case-insensitive partial match on model.name, answered by the pg_trgm GIN
+  # index on PostgreSQL. Returns (total matches, ranked rows capped at
+  # SEARCH_RESULT_LIMIT); each row carries its num_upcoming_shows.
+  escaped_term = (search_term.replace('\\', '\\\\')
+    .replace('%', '\\%').replace('_', '\\_'))
+  total = db.func.count().over()
+  if db.engine.dialect.name == 'postgresql':
+    rank = db.func.similarity(model.name, search_term).desc()
+  else:
+    rank = db.func.length(model.name)
+
+  rows = (
+    db.session.query(
+      model.id,
+      model.name,
+      model.upcoming_shows_count.label('num_upcoming_shows'),
+      total.label('total'))
+    .filter(model.name.ilike('%' + escaped_term + '%', escape='\\'))
+    .order_by(rank, model.name, model.id)
+    .limit(current_app.config['SEARCH_RESULT_LIMIT'])
+    .all()
+  )
+  return (rows[0].total if rows else 0), rows
+
+#----------------------------------------------------------------------------#
+# Page versions.
+#----------------------------------------------------------------------------#
+
+# Validators for @conditional: each answers (last_modified, version) with one
+# aggregate statement, without loading show rows or rendering a template.
+
+def venue_list_version():
+  last_modified, count = db.session.query(
+    db.func.max(Venue.updated_at), db.func.count(Venue.id)).one()
+  return last_modified, (last_modified, count)
+
+def artist_list_version():
+  last_modified, count = db.session.query(
+    db.func.max(Artist.updated_at), db.func.count(Artist.id)).one()
+  return last_modified, (last_modified, count)
+
+def show_timeline_version(model, show_column, counterpart, counterpart_column, entity_id):
+  # A detail page changes when the entity, one of its shows or a counterpart
+  # changes, when a show is removed, and when a show moves from upcoming to
+  # past, i.e. when the latest show that has started changes.
+  row = (
+    db.session.query(
+      model.updated_at,
+      db.func.max(Shows.updated_at),
+      db.func.max(counterpart.updated_at),
+      db.func.count(Shows.id),
+      db.func.max(Shows.start_time).filter(Shows.start_time < datetime.now()))
+    .outerjoin(Shows, show_column == model.id)
+    .outerjoin(counterpart, counterpart.id == counterpart_column)
+    .filter(model.id == entity_id)
+    .group_by(model.id)
+    .first()
+  )
+  if row is None:
+    return None
+  last_modified = max(value for value in (row[0], row[1], row[2], row[4]) if value is not None)
+  return last_modified, tuple(row)
+
+def venue_version(venue_id):
+  return show_timeline_version(Venue, Shows.venue_id, Artist, Shows.artist_id, venue_id)
+
+def artist_version(artist_id):
+  return show_timeline_version(Artist, Shows.artist_id, Venue, Shows.venue_id, artist_id)
+
+#----------------------------------------------------------------------------#
+# Listings.
+#----------------------------------------------------------------------------#
+
+# Shared by the HTML views and the JSON API, so both get the same statements.
+
+genre_associations = {
+  Venue: (venue_genres, venue_genres.c.venue_id),
+  Artist: (artist_genres, artist_genres.c.artist_id),
+}
+
+def filter_by_genre(query, model, genre):
+  # Narrows a Venue or Artist query to one genre through the
+  # (genre_id, entity_id) index of its association table.
+  association, entity_column = genre_associations[model]
+  return (
+    query.join(association, entity_column == model.id)
+    .join(Genre, Genre.id == association.c.genre_id)
+    .filter(Genre.name == genre)
+  )
+
+def genre_names_by_id(model, ids):
+  # {entity id: [genre names]} for a page of venues or artists, in one query.
+  association, entity_column = genre_associations[model]
+  names = dict((entity_id, []) for entity_id in ids)
+  if ids:
+    rows = (
+      db.session.query(entity_column, Genre.name)
+      .join(Genre, Genre.id == association.c.genre_id)
+      .filter(entity_column.in_(ids))
+      .order_by(entity_column, Genre.name)
+    )
+    for entity_id, name in rows:
+      names[entity_id].append(name)
+  return names
+
+def venue_with_shows(venue_id):
+  # The venue, its genres, its shows and each show's artist in three
+  # statements. The artists are read from the database rather than the
+  # summary cache, so the page matches the version its ETag was made from.
+  return (
+    Venue.query
+    .options(
+      db.selectinload(Venue.genres),
+      db.selectinload(Venue.shows).joinedload(Shows.artist))
+    .get(venue_id)
+  )
+
+def artist_with_shows(artist_id):
+  # The artist, its genres, its shows and each show's venue in three statements.
+  return (
+    Artist.query
+    .options(
+      db.selectinload(Artist.genres),
+      db.selectinload(Artist.shows).joinedload(Shows.venue))
+    .get(artist_id)
+  )
+
+def show_counterparts(shows, model):
+  # {id: Summary} of the venues or artists (model) of shows, from the
+  # summary cache; at most one query, for the ones it does not hold.
+  column = 'venue_id' if model is Venue else 'artist_id'
+  return current_app.extensions['summaries'].get_many(
+    model, [getattr(show, column) for show in shows])
+
+def split_shows(shows):
+  # Splits start_time-ordered shows into (past, upcoming) in one pass.
+  thisday = datetime.now()
+  past_shows = []
+  upcoming_shows = []
+  for show in shows:
+    if show.start_time < thisday:
+      past_shows.append(show)
+    else:
+      upcoming_shows.append(show)
+  return past_shows, upcoming_shows
+
+def encode_show_cursor(start_time, show_id):
+  return '{}_{}'.format(start_time.isoformat(), show_id)
+
+def decode_show_cursor(cursor):
+  start_time, show_id = cursor.rsplit('_', 1)
+  return datetime.fromisoformat(start_time), int(show_id)
+
+ShowRow = namedtuple('ShowRow', (
+  'id', 'start_time', 'venue_id', 'venue_name', 'venue_image_link',
+  'artist_id', 'artist_name', 'artist_image_link'))
+
+def shows_page(per_page, after=None, before=None, venue_id=None, artist_id=None):
+  # One keyset page of shows ordered by (start_time, id), as ShowRows. The
+  # venue and artist columns come from the summary cache instead of joins.
+  # after/before are cursors of the last/first show of the current page.
+  # Returns (rows, prev_cursor, next_cursor).
+  page_query = db.session.query(Shows.id, Shows.start_time, Shows.venue_id, Shows.artist_id)
+  if venue_id is not None:
+    page_query = page_query.filter(Shows.venue_id == venue_id)
+  if artist_id is not None:
+    page_query = page_query.filter(Shows.artist_id == artist_id)
+  show_key = tuple_(Shows.start_time, Shows.id)
+
+  if before:
+    page_query = (
+      page_query.filter(show_key < decode_show_cursor(before))
+      .order_by(Shows.start_time.desc(), Shows.id.desc())
+    )
+  else:
+    if after:
+      page_query = page_query.filter(show_key > decode_show_cursor(after))
+    page_query = page_query.order_by(Shows.start_time, Shows.id)
+
+  # Fetch one extra row to know whether there is another page.
+  page = page_query.limit(per_page + 1).all()
+  has_more = len(page) > per_page
+  page = page[:per_page]
+  if before:
+    page.reverse()
+
+  venues = show_counterparts(page, Venue)
+  artists = show_counterparts(page, Artist)
+  rows = []
+  for show in page:
+    venue = venues.get(show.venue_id)
+    artist = artists.get(show.artist_id)
+    # Shows of a venue or artist deleted since the page was read are left
+    # out, as the joins used to.
+    if venue is None or artist is None:
+      continue
+    rows.append(ShowRow(
+      show.id, show.start_time, show.venue_id, venue.name, venue.image_link,
+      show.artist_id, artist.name, artist.image_link))
+
+  prev_cursor = None
+  next_cursor = None
+  if page:
+    first, last = page[0], page[-1]
+    if (has_more if before else after):
+      prev_cursor = encode_show_cursor(first.start_time, first.id)
+    if (before or has_more):
+      next_cursor = encode_show_cursor(last.start_time, last.id)
+  return rows, prev_cursor, next_cursor
@@ -0,0 +1,158 @@
+#----------------------------------------------------------------------------#
+# Synthetic data generator.
+#
+#   flask seed --venues 1000 --artists 5000 --shows 100000
+#   flask seed --shows 10000000 --batch-size 50000 --reset
+#
+# Generates venues and artists spread over real-looking cities, with genres
+# from the forms' choices, and shows whose venues and artists follow a
+# long-tailed popularity curve, so that some detail pages carry hundreds of
+# shows as they do in production. Rows are written with multi-row INSERTs
+# in batches, keeping memory flat at any scale. benchmark_indexes.py and
+# benchmark_routes.py seed through the same seed_database().
+#----------------------------------------------------------------------------#
+
+import bisect
+import random
+import time
+from datetime import datetime, timedelta
+
+import click
+from flask.cli import with_appcontext
+
+from forms import VenueForm
+from models import db, Genre, Venue, Artist, Shows, venue_genres, artist_genres
+from queries import refresh_show_counters
+
+CITIES = [
+  ('San Francisco', 'CA'), ('Los Angeles', 'CA'), ('Oakland', 'CA'),
+  ('New York', 'NY'), ('Brooklyn', 'NY'), ('Austin', 'TX'), ('Houston', 'TX'),
+  ('Seattle', 'WA'), ('Chicago', 'IL'), ('Miami', 'FL'), ('Boston', 'MA'),
+  ('Denver', 'CO'), ('Atlanta', 'GA'), ('Portland', 'OR'), ('Nashville', 'TN'),
+  ('New Orleans', 'LA'), ('Detroit', 'MI'), ('Philadelphia', 'PA'),
+]
+VENUE_WORDS = ['The', 'Musical', 'Hop', 'Dueling', 'Pianos', 'Park', 'Square',
+  'Live', 'Music', 'Coffee', 'Hall', 'Lounge', 'Garage', 'Basement', 'Room',
+  'Tavern', 'Club', 'Theatre', 'Warehouse', 'Cellar']
+ARTIST_WORDS = ['Guns', 'Petals', 'Wild', 'Sax', 'Band', 'Quevado', 'Echo',
+  'Velvet', 'Static', 'Owls', 'Neon', 'Rivers', 'Golden', 'Hour', 'Paper',
+  'Tigers', 'Silver', 'Lining', 'Midnight', 'Choir']
+GENRES = [value for value, _ in VenueForm.genres.kwargs['choices']]
+DEFAULT_BATCH_SIZE = 10000
+
+
+def popularity_picker(rng, count):
+  # Picks ids 1..count with Pareto-distributed weights: a few very busy
+  # venues and artists, and a long tail with a handful of shows each.
+  cumulative = []
+  total = 0.0
+  for _ in range(count):
+    total += rng.paretovariate(1.2)
+    cumulative.append(total)
+  def pick():
+    return bisect.bisect_left(cumulative, rng.random() * total) + 1
+  return pick
+
+def entity_rows(rng, count, words, extra):
+  for entity_id in range(1, count + 1):
+    city, state = rng.choice(CITIES)
+    row = {
+      'id': entity_id,
+      'name': '{} {}'.format(' '.join(rng.sample(words, rng.randint(1, 3))), entity_id),
+      'city': city,
+      'state': state,
+      'phone': '{}-{}-{}'.format(rng.randint(200, 999), rng.randint(100, 999), rng.randint(1000, 9999)),
+      'image_link': 'https://images.example.com/{}/{}.jpg'.format(extra, entity_id),
+      'facebook_link': 'https://www.facebook.com/{}{}'.format(extra, entity_id),
+      'website_link': 'https://{}{}.example.com'.format(extra, entity_id),
+      'seeking_description': None,
+    }
+    if extra == 'venue':
+      row['address'] = '{} {} Street'.format(rng.randint(1, 9999), rng.choice(VENUE_WORDS))
+      row['seeking_talent'] = rng.random() < 0.3
+    else:
+      row['seeking_venue'] = rng.random() < 0.3
+    yield row
+
+def insert_in_batches(connection, table, rows, batch_size):
+  batch = []
+  for row in rows:
+    batch.append(row)
+    if len(batch) >= batch_size:
+      connection.execute(table.insert(), batch)
+      batch = []
+  if batch:
+    connection.execute(table.insert(), batch)
+
+def genre_links(rng, count, column):
+  for entity_id in range(1, count + 1):
+    for genre_id in rng.sample(range(1, len(GENRES) + 1), rng.randint(1, 3)):
+      yield {column: entity_id, 'genre_id': genre_id}
+
+def show_rows(rng, num_shows, pick_venue, pick_artist):
+  # Shows span the last three years and the next one, like a live catalogue.
+  now = datetime.now().replace(minute=0, second=0, microsecond=0)
+  for show_id in range(1, num_shows + 1):
+    yield {
+      'id': show_id,
+      'venue_id': pick_venue(),
+      'artist_id': pick_artist(),
+      'start_time': now + timedelta(hours=rng.randint(-24 * 365 * 3, 24 * 365)),
+    }
+
+def seed_database(connection, num_venues, num_artists, num_shows,
+                  batch_size=DEFAULT_BATCH_SIZE, seed=42):
+  # Fills empty tables through connection. Counters are left to the caller.
+  rng = random.Random(seed)
+  connection.execute(Genre.__table__.insert(), [
+    {'id': genre_id, 'name': name} for genre_id, name in enumerate(GENRES, 1)])
+  insert_in_batches(connection, Venue.__table__,
+    entity_rows(rng, num_venues, VENUE_WORDS, 'venue'), batch_size)
+  insert_in_batches(connection, Artist.__table__,
+    entity_rows(rng, num_artists, ARTIST_WORDS, 'artist'), batch_size)
+  insert_in_batches(connection, venue_genres, genre_links(rng, num_venues, 'venue_id'), batch_size)
+  insert_in_batches(connection, artist_genres, genre_links(rng, num_artists, 'artist_id'), batch_size)
+  insert_in_batches(connection, Shows.__table__, show_rows(
+    rng, num_shows, popularity_picker(rng, num_venues), popularity_picker(rng, num_artists)),
+    batch_size)
+
+def create_schema(engine):
+  # Recreates every table; the name search indexes need pg_trgm on PostgreSQL.
+  if engine.dialect.name == 'postgresql':
+    with engine.begin() as connection:
+      connection.exec_driver_sql('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+  db.metadata.drop_all(engine)
+  db.metadata.create_all(engine)
+
+def reset_sequences(connection):
+  # Explicit ids do not advance PostgreSQL sequences; move them past the data.
+  if connection.dialect.name != 'postgresql':
+    return
+  for table in ('genres', 'Venue', 'Artist', 'shows'):
+    connection.exec_driver_sql(
+      'SELECT setval(pg_get_serial_sequence(\'"{0}"\', \'id\'), '
+      'coalesce((SELECT max(id) FROM "{0}"), 0) + 1, false)'.format(table))
+
+
+@click.command('seed', help='Fill an empty database with synthetic data.')
+@click.option('--venues', default=1000, show_default=True)
+@click.option('--artists', default=5000, show_default=True)
+@click.option('--shows', default=100000, show_default=True, help='1k to 10M are realistic.')
+@click.option('--batch-size', default=DEFAULT_BATCH_SIZE, show_default=True)
+@click.option('--seed', 'random_seed', default=42, show_default=True)
+@click.option('--reset', is_flag=True, help='Drop and recreate all tables first.')
+@with_appcontext
+def seed_command(venues, artists, shows, batch_size, random_seed, reset):
+  if reset:
+    create_schema(db.engine)
+  elif db.session.query(Venue.id).first() is not None:
+    raise click.ClickException('The database already has venues; use --reset to replace them.')
+  started = time.perf_counter()
+  with db.engine.begin() as connection:
+    seed_database(connection, venues, artists, shows, batch_size, random_seed)
+    reset_sequences(connection)
+  refresh_show_counters(Venue, Shows.venue_id)
+  refresh_show_counters(Artist, Shows.artist_id)
+  db.session.commit()
+  click.echo('Seeded {} venues, {} artists and {} shows in {:.1f}s.'.format(
+    venues, artists, shows, time.perf_counter() - started))
@@ -0,0 +1,121 @@
+#----------------------------------------------------------------------------#
+# Venue and artist summaries.
+#
+# Show lists and show creation only need a few columns of the venue or
+# artist on the other side of a show. A SummaryCache keeps those columns per
+# id in an in-process LRU (see cache.LRUCache) of __slots__ records, and
+# loads the ids it is missing with one IN query per model. Detail pages read
+# them from the database instead, since their ETags cover them.
+#
+# Each entry is stored with the version of its model's summaries, which
+# lives in the page cache backend (see cache.PageCache.version()). Edit and
+# delete handlers replace that version, so with the filesystem backend the
+# entries of every worker stop matching at once; with the memory backend
+# other workers' entries expire after SUMMARY_CACHE_TTL, and with the null
+# backend every lookup goes to the database. Missing ids are not cached, so
+# new venues and artists are found at once.
+#----------------------------------------------------------------------------#
+
+from flask import current_app
+
+from cache import LRUCache
+from models import db
+
+
+class Summary(object):
+    """The columns of a venue or artist that other pages show."""
+
+    __slots__ = ('id', 'name', 'image_link', 'city', 'state')
+
+    def __init__(self, id, name, image_link, city, state):
+        self.id = id
+        self.name = name
+        self.image_link = image_link
+        self.city = city
+        self.state = state
+
+    def __repr__(self):
+        return '<Summary {} {!r}>'.format(self.id, self.name)
+
+
+class SummaryCache(object):
+    """Summaries of venues and artists by id, shared by a worker's requests."""
+
+    def __init__(self, max_entries=10000, ttl=60):
+        self.backend = LRUCache(max_entries, ttl)
+        self.hits = 0
+        self.misses = 0
+
+    def _namespace(self, model):
+        return 'summaries:' + model.__tablename__
+
+    def _version(self, model):
+        pages = current_app.extensions.get('response_cache')
+        return pages.version(self._namespace(model)) if pages is not None else None
+
+    def get_many(self, model, ids):
+        """{id: Summary} for the ids that exist."""
+        version = self._version(model)
+        summaries = {}
+        missing = []
+        for entity_id in set(ids):
+            entry = self.backend.get((model.__tablename__, entity_id))
+            if entry is None or entry[0] != version:
+                missing.append(entity_id)
+            else:
+                summaries[entity_id] = entry[1]
+        self.hits += len(summaries)
+        self.misses += len(missing)
+        if missing:
+            rows = db.session.query(
+                model.id, model.name, model.image_link, model.city, model.state
+            ).filter(model.id.in_(missing))
+            for row in rows:
+                summary = Summary(*row)
+                self.backend.set((model.__tablename__, summary.id), (version, summary))
+                summaries[summary.id] = summary
+        return summaries
+
+    def get(self, model, entity_id):
+        """The Summary of one venue or artist, or None if it does not exist."""
+        return self.get_many(model, (entity_id,)).get(entity_id)
+
+    def invalidate(self, model, entity_id):
+        # Other workers only see the new version, which drops all of their
+        # summaries of model; edits are rare next to reads.
+        self.backend.delete((model.__tablename__, entity_id))
+        pages = current_app.extensions.get('response_cache')
+        if pages is not None:
+            pages.invalidate(self._namespace(model))
+
+    def clear(self):
+        self.backend.clear()
+
+
+class Summaries(object):
+    """The SummaryCache of the current app (app.extensions['summaries'])."""
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['summaries'] = SummaryCache(
+            app.config.get('SUMMARY_CACHE_MAX_ENTRIES', 10000),
+            app.config.get('SUMMARY_CACHE_TTL', 60))
+
+    @property
+    def cache(self):
+        return current_app.extensions['summaries']
+
+    def get_many(self, model, ids):
+        return self.cache.get_many(model, ids)
+
+    def get(self, model, entity_id):
+        return self.cache.get(model, entity_id)
+
+    def invalidate(self, model, entity_id):
+        self.cache.invalidate(model, entity_id)
+
+    def clear(self):
+        self.cache.clear()
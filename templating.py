@@ -0,0 +1,82 @@
+#----------------------------------------------------------------------------#
+# Template compilation.
+#
+# Jinja compiles a template to Python the first time a process renders it.
+# Three settings take that cost off the first requests after a deploy:
+#
+#   TEMPLATE_BYTECODE_CACHE_DIR  compiled code is cached in this directory
+#       (by default instance/jinja-cache), shared by the workers and across
+#       restarts; fill it at build time with `flask templates warm`.
+#   TEMPLATE_MODULES_DIR  templates are loaded from the Python modules that
+#       `flask templates warm --modules <dir>` writes, skipping compilation
+#       altogether. The modules are not checked against the sources, so
+#       rebuild them whenever the templates change.
+#   TEMPLATE_PRELOAD  every template is loaded when the app is created, so
+#       workers forked by `gunicorn --preload` start with all of them.
+#----------------------------------------------------------------------------#
+
+import os
+import time
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from jinja2 import ChoiceLoader, FileSystemBytecodeCache, ModuleLoader
+
+from files import atomic_write, private_directory
+
+templates_cli = AppGroup('templates', help='Precompile the Jinja templates.')
+
+
+class AtomicFileSystemBytecodeCache(FileSystemBytecodeCache):
+    """Bytecode cache whose files are never seen half-written by other workers."""
+
+    def __init__(self, directory):
+        # Cached bytecode is executed, so nobody else may write to it.
+        private_directory(directory)
+        super(AtomicFileSystemBytecodeCache, self).__init__(directory)
+
+    def dump_bytecode(self, bucket):
+        try:
+            with atomic_write(self._get_cache_filename(bucket)) as cache_file:
+                bucket.write_bytecode(cache_file)
+        except OSError:
+            pass
+
+
+def source_environment(app):
+    # The app's environment reading the template sources, even when it
+    # normally loads precompiled modules.
+    return app.jinja_env.overlay(loader=app.create_global_jinja_loader())
+
+def template_names(environment):
+    return environment.list_templates(extensions=('html',))
+
+def init_templates(app):
+    cache_dir = app.config.get('TEMPLATE_BYTECODE_CACHE_DIR')
+    if cache_dir is None:
+        cache_dir = os.path.join(app.instance_path, 'jinja-cache')
+    if cache_dir:
+        app.jinja_env.bytecode_cache = AtomicFileSystemBytecodeCache(cache_dir)
+    modules_dir = app.config.get('TEMPLATE_MODULES_DIR')
+    if modules_dir and os.path.isdir(modules_dir):
+        app.jinja_env.loader = ChoiceLoader([ModuleLoader(modules_dir), app.jinja_env.loader])
+    if app.config.get('TEMPLATE_PRELOAD'):
+        for name in template_names(source_environment(app)):
+            app.jinja_env.get_template(name)
+
+
+@templates_cli.command('warm', help='Compile every template into the bytecode cache.')
+@click.option('--modules', 'modules_dir', type=click.Path(file_okay=False),
+              help='Also write precompiled template modules to this directory.')
+def warm_command(modules_dir):
+    started = time.perf_counter()
+    environment = source_environment(current_app)
+    if environment.bytecode_cache is None and not modules_dir:
+        raise click.ClickException('Set TEMPLATE_BYTECODE_CACHE_DIR or pass --modules.')
+    names = template_names(environment)
+    for name in names:
+        environment.get_template(name)
+    if modules_dir:
+        environment.compile_templates(modules_dir, extensions=('html',), zip=None)
+    click.echo('Compiled {} templates in {:.2f}s.'.format(len(names), time.perf_counter() - started))
@@ -0,0 +1,97 @@
+import os
+import sys
+import tempfile
+
+import pytest
+from sqlalchemy import event
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def pytest_configure(config):
+    # Apps built without TESTING log to error.log in the working directory;
+    # keep that (and any other relative path) out of the checkout.
+    os.chdir(tempfile.mkdtemp(prefix='fyyur-tests-'))
+
+
+def make_app(tmp_path, **config):
+    from app import create_app
+    settings = {
+        'TESTING': True,
+        'SECRET_KEY': 'test',
+        'WTF_CSRF_ENABLED': False,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + str(tmp_path / 'fyyur.db'),
+        'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+        'RESPONSE_CACHE_BACKEND': 'null',
+        'TEMPLATE_BYTECODE_CACHE_DIR': '',
+        'SLOW_QUERY_LOG': '',
+        'IMAGE_DIR': str(tmp_path / 'images'),
+        'SHOWS_QUEUE_PATH': str(tmp_path / 'show_queue.sqlite3'),
+        'JOBS_QUEUE_PATH': str(tmp_path / 'jobs.sqlite3'),
+        'JOBS_SCHEDULE': '',
+    }
+    settings.update(config)
+    return create_app(settings)
+
+
+@pytest.fixture
+def app(tmp_path):
+    from models import db
+    app = make_app(tmp_path)
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.get_engine().dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def seed(app):
+    """seed(venues, artists, shows): synthetic rows with their show counters."""
+    from models import db, Venue, Artist, Shows
+    from queries import refresh_show_counters
+    from seed import seed_database
+
+    def seed(venues, artists, shows):
+        with app.app_context():
+            with db.engine.begin() as connection:
+                seed_database(connection, venues, artists, shows)
+            refresh_show_counters(Venue, Shows.venue_id)
+            refresh_show_counters(Artist, Shows.artist_id)
+            db.session.commit()
+    return seed
+
+
+class StatementCounter(object):
+    """Counts the statements run by the app's engine."""
+
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def reset(self):
+        self.statements = []
+
+
+@pytest.fixture
+def statements(app):
+    from models import db
+    counter = StatementCounter()
+    with app.app_context():
+        engine = db.get_engine()
+    event.listen(engine, 'before_cursor_execute', counter)
+    yield counter
+    event.remove(engine, 'before_cursor_execute', counter)
@@ -0,0 +1,33 @@
+import json
+
+
+def test_list_pages_follow_the_cursor(client, seed):
+    seed(venues=7, artists=3, shows=20)
+    first = json.loads(client.get('/api/v1/venues?limit=5&fields=id,name').data)
+    assert [venue['id'] for venue in first['data']] == [1, 2, 3, 4, 5]
+    second = json.loads(client.get(first['next']).data)
+    assert [venue['id'] for venue in second['data']] == [6, 7]
+    assert second['next'] is None
+
+
+def test_malformed_cursors_are_rejected(client, seed):
+    seed(venues=3, artists=3, shows=5)
+    for path in ('/api/v1/venues?after=x', '/api/v1/artists?after=1.5',
+                 '/api/v1/shows?after=x'):
+        response = client.get(path)
+        assert response.status_code == 400, path
+
+
+def test_json_fallback_matches_orjson(app, monkeypatch):
+    from datetime import date, datetime
+    import api
+    payload = {'data': [{'start_time': datetime(2026, 10, 18, 20, 30)},
+                        {'start_time': datetime(2026, 10, 18, 20, 30, 15, 250)},
+                        {'day': date(2026, 10, 18), 'name': 'Café'}]}
+    assert api.orjson is not None
+    with app.app_context():
+        fast = json.loads(api.json_response(payload).get_data())
+        monkeypatch.setattr(api, 'orjson', None)
+        fallback = json.loads(api.json_response(payload).get_data())
+    assert fast == fallback
+    assert fast['data'][1]['start_time'] == '2026-10-18T20:30:15.000250'
@@ -0,0 +1,102 @@
+import gzip
+import json
+import os
+import re
+import shutil
+
+import pytest
+from flask import Flask, render_template_string, url_for
+
+from assets import BUNDLES, IMMUTABLE, Assets, build_command
+from conftest import ROOT, make_app
+
+HASHED = re.compile(r'^build/(fyyur|head)\.[0-9a-f]{12}\.(css|js)$')
+
+
+@pytest.fixture
+def static_app(tmp_path):
+    # An app over a copy of the bundle sources, so builds stay out of static/.
+    static_folder = tmp_path / 'static'
+    for paths in BUNDLES.values():
+        for path in paths:
+            os.makedirs(str((static_folder / path).parent), exist_ok=True)
+            shutil.copy(os.path.join(ROOT, 'static', path), str(static_folder / path))
+    app = Flask(__name__, static_folder=str(static_folder))
+    Assets().init_app(app)
+    return app
+
+
+def build(app):
+    result = app.test_cli_runner().invoke(build_command)
+    assert result.exit_code == 0, result.output
+    assert 'Built {} bundles'.format(len(BUNDLES)) in result.output
+    return app.extensions['assets'].manifest
+
+
+def test_build_writes_hashed_bundles_and_the_manifest(static_app):
+    manifest = build(static_app)
+    assert sorted(manifest) == ['build/fyyur.css', 'build/fyyur.js', 'build/head.js']
+    assert all(HASHED.match(hashed) for hashed in manifest.values())
+    with open(os.path.join(static_app.static_folder, 'build', 'manifest.json')) as manifest_file:
+        assert json.load(manifest_file) == manifest
+
+    css = os.path.join(static_app.static_folder, manifest['build/fyyur.css'])
+    with open(css, 'rb') as css_file:
+        data = css_file.read()
+    assert b'/*' not in data
+    with open(css + '.gz', 'rb') as gz_file:
+        compressed = gz_file.read()
+    assert gzip.decompress(compressed) == data
+
+    # Unchanged sources give the same names and the same bytes.
+    assert build(static_app) == manifest
+    with open(css + '.gz', 'rb') as gz_file:
+        assert gz_file.read() == compressed
+
+
+def test_hashed_files_are_served_precompressed_and_immutable(static_app):
+    manifest = build(static_app)
+    hashed = manifest['build/head.js']
+    with open(os.path.join(static_app.static_folder, hashed), 'rb') as js_file:
+        data = js_file.read()
+    client = static_app.test_client()
+
+    response = client.get('/static/' + hashed, headers={'Accept-Encoding': 'gzip, deflate'})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['Cache-Control'] == IMMUTABLE
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert response.mimetype in ('application/javascript', 'text/javascript')
+    assert gzip.decompress(response.get_data()) == data
+    response.close()
+
+    response = client.get('/static/' + hashed, headers={'Accept-Encoding': 'identity'})
+    assert 'Content-Encoding' not in response.headers
+    assert response.headers['Cache-Control'] == IMMUTABLE
+    assert response.get_data() == data
+    response.close()
+
+    # Source files are served as before.
+    response = client.get('/static/js/script.js')
+    assert response.status_code == 200
+    assert response.headers.get('Cache-Control') != IMMUTABLE
+    response.close()
+
+
+def test_asset_urls_resolve_the_built_bundles(static_app):
+    with static_app.test_request_context('/'):
+        assert static_app.jinja_env.globals['asset_urls']('head.js') == [
+            url_for('static', filename=path) for path in BUNDLES['head.js']]
+
+    manifest = build(static_app)
+    with static_app.test_request_context('/'):
+        for name in BUNDLES:
+            assert render_template_string('{{ asset_urls(name)|join(" ") }}', name=name) == (
+                '/static/' + manifest['build/' + name])
+        assert url_for('static', filename='build/fyyur.css') == '/static/' + manifest['build/fyyur.css']
+
+
+def test_unbundled_layout_defers_its_scripts(tmp_path):
+    page = make_app(tmp_path, ASSETS_BUNDLED=False).test_client().get('/').get_data(as_text=True)
+    for path in BUNDLES['head.js'] + BUNDLES['fyyur.js']:
+        assert '<script type="text/javascript" src="/static/{}" defer></script>'.format(path) in page
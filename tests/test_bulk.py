@@ -0,0 +1,115 @@
+import csv
+import gzip
+import io
+import json
+
+import pytest
+
+VENUE_HEADER = 'name,city,state,address,genres,facebook_link,seeking_talent\n'
+
+
+def run_import(app, table, path, *args):
+    return app.test_cli_runner().invoke(args=['import', table, str(path)] + list(args))
+
+
+def test_import_venues_skips_invalid_rows(app, tmp_path):
+    from models import Venue
+    path = tmp_path / 'venues.csv'
+    path.write_text(
+        VENUE_HEADER
+        + 'Hop,San Francisco,CA,1015 Folsom St,"Jazz, Blues",https://fb.com/hop,true\n'
+        + ',Nowhere,CA,1 Road,Jazz,https://fb.com/x,false\n'
+        + 'Bad State,Austin,XX,1 Road,Jazz,https://fb.com/x,false\n'
+        + 'Dueling Pianos,New York,NY,335 Delancey St,"Classical,Classical",https://fb.com/dp,\n'
+        + 'Park Square,San Francisco,CA,34 Whiskey Moore Ave,Pop,https://fb.com/ps,false\n')
+    result = run_import(app, 'venues', path, '--batch-size', '2')
+    assert result.exit_code == 0, result.output
+    assert 'Loaded 3 rows, rejected 2' in result.output
+    assert 'rows/s loaded' in result.output
+    assert 'line 3:' in result.output and 'line 4:' in result.output
+    with app.app_context():
+        venues = dict((venue.name, venue) for venue in Venue.query)
+        assert sorted(venues) == ['Dueling Pianos', 'Hop', 'Park Square']
+        assert [genre.name for genre in venues['Hop'].genres] == ['Blues', 'Jazz']
+        assert [genre.name for genre in venues['Dueling Pianos'].genres] == ['Classical']
+        assert venues['Hop'].seeking_talent is True
+
+
+def test_import_shows_skips_unknown_ids(app, seed, tmp_path):
+    from models import Venue, Artist, Shows
+    seed(venues=2, artists=2, shows=0)
+    path = tmp_path / 'shows.jsonl.gz'
+    with gzip.open(str(path), 'wt') as shows_file:
+        for artist_id, venue_id in ((1, 2), (2, 99), (99, 1), ('x', 1), (2, 1)):
+            shows_file.write(json.dumps({'artist_id': artist_id, 'venue_id': venue_id,
+                                         'start_time': '2035-05-21 21:30:00'}) + '\n')
+    result = run_import(app, 'shows', path)
+    assert result.exit_code == 0, result.output
+    assert 'Loaded 2 rows, rejected 3' in result.output
+    assert '3 rows skipped' in result.output
+    with app.app_context():
+        assert sorted((show.artist_id, show.venue_id) for show in Shows.query) == [(1, 2), (2, 1)]
+        assert Venue.query.get(1).upcoming_shows_count == 1
+        assert Artist.query.get(2).upcoming_shows_count == 1
+
+
+def export(client, table, export_format, compress=False):
+    response = client.get('/api/v1/export/{}?format={}{}'.format(
+        table, export_format, '&gzip=1' if compress else ''))
+    assert response.status_code == 200
+    body = response.get_data()
+    if compress:
+        assert response.headers['Content-Encoding'] == 'gzip'
+        body = gzip.decompress(body)
+    return body.decode('utf-8')
+
+
+def expected_venues(app):
+    from models import Venue
+    with app.app_context():
+        return [(venue.id, venue.name, sorted(genre.name for genre in venue.genres))
+                for venue in Venue.query.order_by(Venue.id)]
+
+
+@pytest.mark.parametrize('compress', [False, True])
+def test_export_formats_round_trip(app, client, seed, compress):
+    seed(venues=7, artists=3, shows=10)
+    expected = expected_venues(app)
+
+    rows = list(csv.DictReader(io.StringIO(export(client, 'venues', 'csv', compress))))
+    assert [(int(row['id']), row['name'], sorted(filter(None, row['genres'].split(','))))
+            for row in rows] == expected
+
+    rows = [json.loads(line) for line in export(client, 'venues', 'jsonl', compress).splitlines()]
+    assert [(row['id'], row['name'], sorted(row['genres'])) for row in rows] == expected
+
+    blocks = [json.loads(line) for line in export(client, 'venues', 'columns', compress).splitlines()]
+    ids = [venue_id for block in blocks for venue_id in block['id']]
+    names = [name for block in blocks for name in block['name']]
+    assert list(zip(ids, names)) == [(venue_id, name) for venue_id, name, _ in expected]
+
+
+def test_export_command_writes_gzipped_batches(app, seed, tmp_path):
+    seed(venues=7, artists=3, shows=10)
+    path = tmp_path / 'venues.jsonl.gz'
+    result = app.test_cli_runner().invoke(args=[
+        'export', 'venues', '--format', 'columns', '--gzip', '--batch-size', '3', '-o', str(path)])
+    assert result.exit_code == 0, result.output
+    blocks = [json.loads(line) for line in gzip.decompress(path.read_bytes()).splitlines()]
+    assert [len(block['id']) for block in blocks] == [3, 3, 1]
+    assert [venue_id for block in blocks for venue_id in block['id']] == list(range(1, 8))
+
+
+def test_export_shows_times_as_iso(app, client, seed):
+    from models import Shows
+    seed(venues=2, artists=2, shows=3)
+    with app.app_context():
+        first = Shows.query.order_by(Shows.id).first()
+    rows = [json.loads(line) for line in export(client, 'shows', 'jsonl').splitlines()]
+    assert rows[0] == {'id': first.id, 'artist_id': first.artist_id, 'venue_id': first.venue_id,
+                       'start_time': first.start_time.isoformat()}
+
+
+def test_export_rejects_unknown_tables_and_formats(client):
+    assert client.get('/api/v1/export/genres').status_code == 404
+    assert client.get('/api/v1/export/venues?format=xml').status_code == 400
@@ -0,0 +1,40 @@
+import os
+
+from flask import Flask
+
+from cache import FileSystemCache, backend_from_config
+
+
+def test_filesystem_cache_defaults_to_a_private_instance_folder(tmp_path):
+    app = Flask('fyyur_test', instance_path=str(tmp_path / 'instance'))
+    app.config.update(RESPONSE_CACHE_BACKEND='filesystem', RESPONSE_CACHE_DIR='')
+    backend = backend_from_config(app)
+    assert isinstance(backend, FileSystemCache)
+    assert backend.directory == str(tmp_path / 'instance' / 'response-cache')
+    assert os.stat(backend.directory).st_mode & 0o777 == 0o700
+
+
+def test_filesystem_cache_round_trip(tmp_path):
+    backend = FileSystemCache(str(tmp_path / 'cache'), ttl=60)
+    backend.set('page:venues:1:/venues?', (b'<html>', 200, 'text/html'))
+    assert backend.get('page:venues:1:/venues?') == (b'<html>', 200, 'text/html')
+    backend.delete('page:venues:1:/venues?')
+    assert backend.get('page:venues:1:/venues?') is None
+
+
+def test_page_cache_follows_the_etag(tmp_path, seed, app):
+    from conftest import make_app
+    from models import db, Venue
+    seed(venues=3, artists=3, shows=10)
+    worker = make_app(tmp_path, RESPONSE_CACHE_BACKEND='memory')
+    client = worker.test_client()
+    first = client.get('/venues/1')
+    assert client.get('/venues/1').headers['X-Cache'] == 'HIT'
+    # An edit made by another worker, which does not invalidate this one's cache.
+    with app.app_context():
+        Venue.query.get(1).name = 'Renamed Hall'
+        db.session.commit()
+    response = client.get('/venues/1')
+    assert response.headers['X-Cache'] == 'MISS'
+    assert response.headers['ETag'] != first.headers['ETag']
+    assert b'Renamed Hall' in response.data
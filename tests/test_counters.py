@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta
+
+
+def counters(app, artist_id, venue_id):
+    from models import Venue, Artist
+    with app.app_context():
+        artist = Artist.query.get(artist_id)
+        venue = Venue.query.get(venue_id)
+        return ((artist.upcoming_shows_count, artist.past_shows_count),
+                (venue.upcoming_shows_count, venue.past_shows_count))
+
+
+def create_show(client, artist_id, venue_id, start_time):
+    response = client.post('/shows/create', data={
+        'artist_id': artist_id, 'venue_id': venue_id,
+        'start_time': start_time.strftime('%Y-%m-%d %H:%M:%S')})
+    assert b'successfully listed' in response.data
+
+
+def test_new_shows_bump_both_sides(app, client, seed):
+    seed(venues=2, artists=2, shows=0)
+    create_show(client, 1, 2, datetime.now() + timedelta(days=3))
+    create_show(client, 1, 2, datetime.now() + timedelta(days=4))
+    create_show(client, 1, 2, datetime.now() - timedelta(days=3))
+    assert counters(app, 1, 2) == ((2, 1), (2, 1))
+    assert counters(app, 2, 1) == ((0, 0), (0, 0))
+
+
+def test_rollover_moves_started_shows_once(app, client, seed):
+    from models import db, Shows
+    seed(venues=2, artists=2, shows=0)
+    create_show(client, 1, 2, datetime.now() + timedelta(hours=1))
+    create_show(client, 1, 2, datetime.now() + timedelta(days=1))
+    # Time passes: the first show starts without any write.
+    with app.app_context():
+        show = Shows.query.order_by(Shows.start_time).first()
+        show.start_time = datetime.now() - timedelta(minutes=5)
+        db.session.commit()
+    assert counters(app, 1, 2) == ((2, 0), (2, 0))
+
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=['rollover-show-counters', '--since-minutes', '60'])
+    assert result.exit_code == 0, result.output
+    assert 'for 1 artists and 1 venues' in result.output
+    assert counters(app, 1, 2) == ((1, 1), (1, 1))
+
+    # Overlapping windows recompute the same values.
+    assert runner.invoke(args=['rollover-show-counters', '--since-minutes', '60']).exit_code == 0
+    assert counters(app, 1, 2) == ((1, 1), (1, 1))
+
+
+def test_rollover_ignores_shows_outside_the_window(app, seed):
+    from models import db, Venue, Shows
+    from queries import rollover_show_counters
+    seed(venues=1, artists=1, shows=0)
+    with app.app_context():
+        db.session.add(Shows(artist_id=1, venue_id=1, start_time=datetime.now() - timedelta(days=2)))
+        db.session.commit()
+        assert rollover_show_counters(datetime.now() - timedelta(hours=1)) == (0, 0)
+        db.session.commit()
+        assert Venue.query.get(1).past_shows_count == 0
@@ -0,0 +1,88 @@
+import pytest
+from sqlalchemy import create_engine, event
+
+from conftest import make_app
+from database import STICKY_COOKIE
+
+
+def venue_row(name):
+    return {'id': 1, 'name': name, 'city': 'Austin', 'state': 'TX', 'address': '1 Main St'}
+
+
+def make_database(path, name):
+    from models import db, Venue
+    engine = create_engine('sqlite:///' + str(path))
+    db.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(Venue.__table__.insert(), [venue_row(name)])
+    engine.dispose()
+    return 'sqlite:///' + str(path)
+
+
+@pytest.fixture
+def routed_app(tmp_path):
+    from models import db
+    make_database(tmp_path / 'fyyur.db', 'Primary Hall')
+    app = make_app(tmp_path, REPLICA_DATABASE_URLS=[
+        make_database(tmp_path / 'replica.db', 'Replica Hall')])
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.get_engine().dispose()
+
+
+def venue_name(app, path, method='GET', cookies=None):
+    from models import db, Venue
+    headers = {'Cookie': '{}=1'.format(STICKY_COOKIE)} if cookies else {}
+    with app.test_request_context(path, method=method, headers=headers):
+        app.preprocess_request()
+        return db.session.query(Venue.name).filter(Venue.id == 1).scalar()
+
+
+def test_get_requests_read_from_the_replica(routed_app):
+    assert venue_name(routed_app, '/venues/1') == 'Replica Hall'
+    assert venue_name(routed_app, '/venues/search', method='POST') == 'Replica Hall'
+
+
+def test_writes_read_from_the_primary(routed_app):
+    assert venue_name(routed_app, '/venues/1/edit', method='POST') == 'Primary Hall'
+
+
+def test_sticky_cookie_reads_from_the_primary(routed_app):
+    with routed_app.test_request_context('/venues/1/edit', method='POST'):
+        routed_app.preprocess_request()
+        response = routed_app.process_response(routed_app.response_class('ok'))
+    assert STICKY_COOKIE in response.headers['Set-Cookie']
+    assert venue_name(routed_app, '/venues/1', cookies=True) == 'Primary Hall'
+
+
+def test_flushes_use_the_primary(routed_app):
+    from models import db, Genre
+    inserts = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith('INSERT'):
+            inserts.append(conn.engine.url.database)
+    with routed_app.test_request_context('/venues/1'):
+        routed_app.preprocess_request()
+        assert db.session.get_bind() is not db.get_engine()
+        for engine in (db.get_engine(), db.session.get_bind()):
+            event.listen(engine, 'before_cursor_execute', record)
+        db.session.add(Genre(name='Jazz'))
+        db.session.flush()
+        db.session.rollback()
+    assert [path.rsplit('/', 1)[-1] for path in inserts] == ['fyyur.db']
+
+
+def test_unavailable_replica_falls_back_to_the_primary(tmp_path):
+    from models import db
+    make_database(tmp_path / 'fyyur.db', 'Primary Hall')
+    app = make_app(tmp_path, REPLICA_DATABASE_URLS=[
+        'sqlite:///' + str(tmp_path / 'missing' / 'replica.db')])
+    try:
+        assert venue_name(app, '/venues/1') == 'Primary Hall'
+        assert not app.extensions['replica_router'].replicas[0].healthy
+    finally:
+        with app.app_context():
+            db.session.remove()
+            db.get_engine().dispose()
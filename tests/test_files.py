@@ -0,0 +1,59 @@
+import os
+
+import pytest
+
+from files import atomic_write, private_directory, write_atomic
+
+
+def test_write_atomic_replaces_the_file(tmp_path):
+    path = str(tmp_path / 'manifest.json')
+    write_atomic(path, b'old')
+    write_atomic(path, b'new', 0o644)
+    with open(path, 'rb') as written:
+        assert written.read() == b'new'
+    assert os.stat(path).st_mode & 0o777 == 0o644
+    assert os.listdir(str(tmp_path)) == ['manifest.json']
+
+
+def test_failed_write_keeps_the_old_file(tmp_path):
+    path = str(tmp_path / 'entry.cache')
+    write_atomic(path, b'old')
+    with pytest.raises(RuntimeError):
+        with atomic_write(path) as output:
+            output.write(b'half')
+            raise RuntimeError('interrupted')
+    with open(path, 'rb') as written:
+        assert written.read() == b'old'
+    assert os.listdir(str(tmp_path)) == ['entry.cache']
+
+
+def test_private_directory_is_created_for_this_user_only(tmp_path):
+    path = str(tmp_path / 'cache')
+    private_directory(path)
+    assert os.stat(path).st_mode & 0o777 == 0o700
+
+
+def test_private_directory_tightens_an_open_directory(tmp_path):
+    path = str(tmp_path / 'cache')
+    os.mkdir(path)
+    os.chmod(path, 0o777)
+    private_directory(path)
+    assert os.stat(path).st_mode & 0o777 == 0o700
+
+
+def test_private_directory_refuses_a_symlink(tmp_path):
+    os.mkdir(str(tmp_path / 'elsewhere'))
+    os.symlink(str(tmp_path / 'elsewhere'), str(tmp_path / 'cache'))
+    with pytest.raises(RuntimeError):
+        private_directory(str(tmp_path / 'cache'))
+
+
+def test_bytecode_cache_defaults_to_the_instance_folder(tmp_path):
+    from flask import Flask
+    from templating import init_templates
+    app = Flask('fyyur_test', instance_path=str(tmp_path / 'instance'))
+    app.config['TEMPLATE_BYTECODE_CACHE_DIR'] = None
+    init_templates(app)
+    directory = str(tmp_path / 'instance' / 'jinja-cache')
+    assert app.jinja_env.bytecode_cache.directory == directory
+    assert os.stat(directory).st_mode & 0o777 == 0o700
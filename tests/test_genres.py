@@ -0,0 +1,85 @@
+import importlib.util
+import os
+
+import pytest
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import create_engine, inspect, text
+
+from conftest import ROOT
+
+
+def load_migration(revision):
+    path = os.path.join(ROOT, 'migrations', 'versions', revision + '_.py')
+    spec = importlib.util.spec_from_file_location('migration_' + revision, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def genre_names(app):
+    from models import Genre
+    with app.app_context():
+        return sorted(genre.name for genre in Genre.query)
+
+
+def test_get_or_create_genres_drops_duplicates_and_padding(app):
+    from models import db, Genre
+    from queries import get_or_create_genres
+    with app.app_context():
+        db.session.add(Genre(name='Jazz'))
+        db.session.commit()
+        genres = get_or_create_genres(['Rock', ' Jazz', 'Rock ', '', '  ', 'Jazz', 'Hip-Hop'])
+        db.session.commit()
+        assert [genre.name for genre in genres] == ['Jazz', 'Hip-Hop', 'Rock']
+        assert Genre.query.filter_by(name='Jazz').one().id == genres[0].id
+    assert genre_names(app) == ['Hip-Hop', 'Jazz', 'Rock']
+
+
+def test_get_or_create_genres_without_names(app):
+    from queries import get_or_create_genres
+    with app.app_context():
+        assert get_or_create_genres([]) == []
+        assert get_or_create_genres(['', ' ']) == []
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('Jazz,Rock', ['Jazz', 'Rock']),
+    ('{Jazz,"Hip-Hop"}', ['Jazz', 'Hip-Hop']),
+    (' Jazz , Folk ,', ['Jazz', 'Folk']),
+    ('{}', []),
+    ('', []),
+    (None, []),
+])
+def test_split_genres(value, expected):
+    assert load_migration('9c7e3b2d4f16').split_genres(value) == expected
+
+
+def links(connection, table, column):
+    return connection.execute(text(
+        'SELECT {0}, genres.name FROM {1} JOIN genres ON genres.id = {1}.genre_id '
+        'ORDER BY {0}, genres.name'.format(column, table))).fetchall()
+
+
+def test_migration_moves_genre_strings_into_rows(tmp_path):
+    engine = create_engine('sqlite:///' + str(tmp_path / 'fyyur.db'))
+    with engine.begin() as connection:
+        connection.execute(text('CREATE TABLE "Venue" (id INTEGER PRIMARY KEY, genres VARCHAR(120) NOT NULL)'))
+        connection.execute(text('CREATE TABLE "Artist" (id INTEGER PRIMARY KEY, genres VARCHAR(120))'))
+        connection.execute(text('INSERT INTO "Venue" (id, genres) VALUES '
+                                '(1, \'Jazz,Rock\'), (2, \'{Jazz,"Hip-Hop"}\'), (3, \'\')'))
+        connection.execute(text('INSERT INTO "Artist" (id, genres) VALUES '
+                                '(1, \' Jazz , Folk \'), (2, \'Rock,Rock\'), (3, NULL)'))
+        with Operations.context(MigrationContext.configure(connection)):
+            load_migration('9c7e3b2d4f16').upgrade()
+
+    with engine.connect() as connection:
+        assert [name for name, in connection.execute(text('SELECT name FROM genres ORDER BY id'))] == [
+            'Folk', 'Hip-Hop', 'Jazz', 'Rock']
+        assert links(connection, 'venue_genres', 'venue_id') == [
+            (1, 'Jazz'), (1, 'Rock'), (2, 'Hip-Hop'), (2, 'Jazz')]
+        assert links(connection, 'artist_genres', 'artist_id') == [(1, 'Folk'), (1, 'Jazz'), (2, 'Rock')]
+        columns = inspect(connection)
+        assert 'genres' not in [column['name'] for column in columns.get_columns('Venue')]
+        assert 'genres' not in [column['name'] for column in columns.get_columns('Artist')]
+    engine.dispose()
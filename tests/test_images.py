@@ -0,0 +1,78 @@
+import hashlib
+import io
+import os
+
+import pytest
+
+from conftest import make_app
+from images import ImageFetchError, check_image
+
+PIL = pytest.importorskip('PIL.Image')
+
+
+def jpeg_bytes(size=(400, 300)):
+    output = io.BytesIO()
+    PIL.new('RGB', size, (200, 30, 30)).save(output, 'JPEG')
+    return output.getvalue()
+
+
+@pytest.fixture
+def images_app(tmp_path):
+    from models import db, Venue, Artist
+    links = str(tmp_path / 'links')
+    os.mkdir(links)
+    data = jpeg_bytes()
+    with open(os.path.join(links, 'good.jpg'), 'wb') as image_file:
+        image_file.write(data)
+    with open(os.path.join(links, 'truncated.jpg'), 'wb') as image_file:
+        image_file.write(data[:len(data) // 2])
+    with open(os.path.join(links, 'text.jpg'), 'wb') as image_file:
+        image_file.write(b'not an image')
+    app = make_app(tmp_path, IMAGE_FETCHER='local', IMAGE_LOCAL_DIR=links)
+    with app.app_context():
+        db.create_all()
+        for name in ('good', 'truncated', 'text'):
+            db.session.add(Venue(name=name, city='Austin', state='TX', address='1 Main St',
+                                 image_link='https://images.example.com/{}.jpg'.format(name)))
+        db.session.add(Artist(name='missing', city='Austin', state='TX',
+                              image_link='https://images.example.com/missing.jpg'))
+        db.session.commit()
+    return app
+
+
+def test_check_image_rejects_truncated_images():
+    data = jpeg_bytes()
+    check_image(data)
+    with pytest.raises(ImageFetchError):
+        check_image(data[:len(data) // 2])
+
+
+def test_fetch_all_skips_broken_links(images_app):
+    with images_app.app_context():
+        fetched, errors = images_app.extensions['images'].fetch_all()
+    assert list(fetched) == ['https://images.example.com/good.jpg']
+    assert len(errors) == 3
+
+
+def test_image_is_served_resized(images_app):
+    with images_app.app_context():
+        fetched, _ = images_app.extensions['images'].fetch_all()
+    digest = fetched['https://images.example.com/good.jpg']
+    response = images_app.test_client().get(
+        '/img/{}/thumb'.format(digest), headers={'Accept': 'image/webp'})
+    assert response.status_code == 200
+    assert response.mimetype == 'image/webp'
+    assert PIL.open(io.BytesIO(response.data)).size == (320, 240)
+
+
+def test_unresizable_image_redirects_to_its_link(images_app):
+    # An original stored before fetches decoded the whole image.
+    data = jpeg_bytes()
+    store = images_app.extensions['images'].store
+    digest = hashlib.sha256(data[:1000]).hexdigest()
+    store._write(os.path.join(store._image_dir(digest), 'source'),
+                 b'https://images.example.com/old.jpg')
+    store._write(os.path.join(store._image_dir(digest), 'original'), data[:1000])
+    response = images_app.test_client().get('/img/{}/detail'.format(digest))
+    assert response.status_code == 302
+    assert response.headers['Location'] == 'https://images.example.com/old.jpg'
@@ -0,0 +1,34 @@
+import json
+
+from conftest import make_app
+
+
+def slow_queries(path):
+    with open(path) as log_file:
+        return [json.loads(line) for line in log_file]
+
+
+def test_statements_over_the_threshold_are_logged(tmp_path):
+    log_path = str(tmp_path / 'logs' / 'slow_queries.log')
+    app = make_app(tmp_path, SLOW_QUERY_MS=0, SLOW_QUERY_LOG=log_path)
+    from models import db
+    with app.app_context():
+        db.create_all()
+    response = app.test_client().get('/venues?genre=Jazz')
+    assert response.status_code == 200
+    entries = slow_queries(log_path)
+    assert len(entries) == 2
+    assert set(entry['route'] for entry in entries) == {'venues.venues'}
+    assert entries[0]['path'] == '/venues?genre=Jazz'
+
+
+def test_statements_under_the_threshold_are_not_logged(tmp_path):
+    log_path = str(tmp_path / 'slow_queries.log')
+    app = make_app(tmp_path, SLOW_QUERY_MS=60000, SLOW_QUERY_LOG=log_path)
+    from models import db
+    with app.app_context():
+        db.create_all()
+    response = app.test_client().get('/venues')
+    assert response.status_code == 200
+    assert response.headers['Server-Timing'].startswith('db;desc="2 queries"')
+    assert not (tmp_path / 'slow_queries.log').exists()
@@ -0,0 +1,143 @@
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from conftest import make_app
+from jobs import CronSchedule, JobQueue, cron_field, job, parse_schedule
+
+calls = []
+
+
+@job('test-flaky', max_attempts=2)
+def flaky(fail=True):
+    calls.append(fail)
+    if fail:
+        raise RuntimeError('flaky')
+
+
+@pytest.mark.parametrize('spec, expected', [
+    ('*/15', {0, 15, 30, 45}),
+    ('5/20', {5, 25, 45}),
+    ('1-3,10', {1, 2, 3, 10}),
+    ('10-20/5', {10, 15, 20}),
+    ('7', {7}),
+])
+def test_cron_field(spec, expected):
+    assert cron_field(spec, 0, 59) == expected
+
+
+@pytest.mark.parametrize('spec', ['60', '*/0', '5-70', 'x'])
+def test_cron_field_rejects(spec):
+    with pytest.raises(ValueError):
+        cron_field(spec, 0, 59)
+
+
+# 2026-10-18 is a Sunday.
+@pytest.mark.parametrize('spec, after, expected', [
+    ('*/15 * * * *', datetime(2026, 10, 18, 10, 7, 30), datetime(2026, 10, 18, 10, 15)),
+    ('*/15 * * * *', datetime(2026, 10, 18, 10, 15), datetime(2026, 10, 18, 10, 30)),
+    ('0 9 * * 1', datetime(2026, 10, 18, 12, 0), datetime(2026, 10, 19, 9, 0)),
+    ('30 2 * * 7', datetime(2026, 10, 18, 3, 0), datetime(2026, 10, 25, 2, 30)),
+    ('0 0 1 2 *', datetime(2026, 10, 18), datetime(2027, 2, 1)),
+    ('59 23 31 12 *', datetime(2026, 12, 31, 23, 59), datetime(2027, 12, 31, 23, 59)),
+    # Day of month or weekday when both are restricted: the 1st or a Monday.
+    ('0 0 1 * 1', datetime(2026, 10, 18), datetime(2026, 10, 19)),
+    ('0 0 1 * 1', datetime(2026, 10, 26, 1, 0), datetime(2026, 11, 1)),
+])
+def test_next_after(spec, after, expected):
+    assert CronSchedule(spec).next_after(after) == expected
+
+
+def test_schedule_that_never_matches():
+    with pytest.raises(ValueError):
+        CronSchedule('0 0 31 2 *').next_after(datetime(2026, 10, 18))
+
+
+def test_parse_schedule():
+    schedule = parse_schedule(
+        'rollover-show-counters: */15 * * * *; fetch-images: 0 3 * * *;')
+    assert sorted(schedule) == ['fetch-images', 'rollover-show-counters']
+    assert schedule['fetch-images'].hours == {3}
+    assert parse_schedule('') == {}
+
+
+@pytest.mark.parametrize('text', [
+    'no-such-job: * * * * *',
+    'fetch-images: * * * *',
+    'fetch-images * * * * *',
+])
+def test_parse_schedule_rejects(text):
+    with pytest.raises(ValueError):
+        parse_schedule(text)
+
+
+def test_claimed_job_is_locked_until_its_lease_lapses(tmp_path):
+    queue = JobQueue(str(tmp_path / 'jobs.sqlite3'))
+    job_id = queue.enqueue('test-flaky', fail=False)
+    claimed = queue.claim()
+    assert (claimed.id, claimed.args, claimed.attempts) == (job_id, {'fail': False}, 1)
+    assert queue.claim() is None
+
+    queue.lease_seconds = 0
+    queue.enqueue('test-flaky')
+    assert queue.claim().attempts == 1
+    # Its worker died: claimed again once the lease lapses.
+    assert queue.claim().attempts == 2
+
+
+def test_failing_job_is_retried_then_fails(app, tmp_path):
+    queue = JobQueue(str(tmp_path / 'jobs.sqlite3'), retry_base_seconds=0)
+    queue.enqueue('test-flaky')
+    del calls[:]
+    with app.app_context():
+        assert queue.run(queue.claim())[0] == 'retry'
+        assert queue.run(queue.claim())[0] == 'failed'
+    assert queue.claim() is None
+    assert calls == [True, True]
+    assert queue.counts()[0] == {'failed': 1}
+
+
+def test_scheduled_job_is_queued_once_per_due_time(tmp_path):
+    queue = JobQueue(str(tmp_path / 'jobs.sqlite3'),
+                     parse_schedule('fetch-images: */15 * * * *'))
+    # The first check only records when the job is next due.
+    assert queue.queue_scheduled(datetime(2026, 10, 18, 10, 7)) == []
+    assert queue.queue_scheduled(datetime(2026, 10, 18, 10, 14)) == []
+    assert queue.queue_scheduled(datetime(2026, 10, 18, 10, 15)) == ['fetch-images']
+    assert queue.queue_scheduled(datetime(2026, 10, 18, 10, 15)) == []
+    assert queue.claim().name == 'fetch-images'
+
+
+def test_queues_default_to_the_instance_folder(tmp_path):
+    app = make_app(tmp_path, SHOWS_QUEUE_PATH=None, JOBS_QUEUE_PATH=None)
+    assert app.extensions['jobs'].path == os.path.join(app.instance_path, 'jobs.sqlite3')
+    assert (app.extensions['show_writer'].queue.path
+            == os.path.join(app.instance_path, 'show_queue.sqlite3'))
+
+
+def test_queue_directory_is_created_on_first_use(tmp_path):
+    queue = JobQueue(str(tmp_path / 'instance' / 'jobs.sqlite3'))
+    assert not (tmp_path / 'instance').exists()
+    queue.enqueue('test-flaky')
+    assert queue.claim().name == 'test-flaky'
+
+
+def test_counter_jobs_update_the_counters(app, seed, tmp_path):
+    from models import db, Shows, Venue
+    seed(venues=2, artists=2, shows=6)
+    with app.app_context():
+        db.session.add(Shows(artist_id=1, venue_id=1, start_time=datetime.now() - timedelta(minutes=5)))
+        Venue.query.update({Venue.upcoming_shows_count: 0, Venue.past_shows_count: 0})
+        db.session.commit()
+    queue = JobQueue(str(tmp_path / 'jobs.sqlite3'))
+    queue.enqueue('rollover-show-counters', since_minutes=10)
+    with app.app_context():
+        assert queue.run(queue.claim())[0] == 'done'
+        # Only the venue with a show in the window was recomputed.
+        counts = dict((venue.id, venue.upcoming_shows_count + venue.past_shows_count) for venue in Venue.query)
+        assert counts[1] > 0 and counts[2] == 0
+    queue.enqueue('rebuild-show-counters')
+    with app.app_context():
+        assert queue.run(queue.claim())[0] == 'done'
+        assert sum(venue.upcoming_shows_count + venue.past_shows_count for venue in Venue.query) == 7
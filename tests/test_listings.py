@@ -0,0 +1,104 @@
+import json
+import re
+
+import pytest
+
+# (name, city, state, genres), ids in this order.
+VENUES = [
+    ('Blue Note', 'Austin', 'TX', ['Jazz', 'Rock']),
+    ('Stubb\'s', 'Austin', 'TX', ['Rock']),
+    ('Deep Ellum', 'Dallas', 'TX', ['Jazz']),
+    ('Elephant Room', 'Austin', 'TX', ['Jazz']),
+    ('Saxon Pub', 'Austin', 'TX', ['Folk', 'Jazz']),
+    ('Tractor Tavern', 'Seattle', 'WA', ['Jazz']),
+    ('Empty Hall', 'Austin', 'TX', []),
+]
+ARTISTS = [
+    ('Miles', 'Austin', 'TX', ['Jazz']),
+    ('Joan', 'Austin', 'TX', ['Folk']),
+    ('Ella', 'Dallas', 'TX', ['Jazz', 'Swing']),
+]
+
+
+@pytest.fixture
+def listings(app):
+    from models import db, Venue, Artist
+    from queries import get_or_create_genres
+    with app.app_context():
+        for name, city, state, genres in VENUES:
+            db.session.add(Venue(name=name, city=city, state=state, address='1 Main St',
+                                 genres=get_or_create_genres(genres)))
+            db.session.flush()
+        for name, city, state, genres in ARTISTS:
+            db.session.add(Artist(name=name, city=city, state=state,
+                                  genres=get_or_create_genres(genres)))
+            db.session.flush()
+        db.session.commit()
+    return app
+
+
+def linked_ids(page, kind):
+    return sorted(set(int(entity_id) for entity_id in re.findall(r'href="/{}/(\d+)"'.format(kind), page)))
+
+
+def test_filter_by_genre(listings):
+    from models import Venue, Artist
+    from queries import filter_by_genre
+    with listings.app_context():
+        jazz = filter_by_genre(Venue.query, Venue, 'Jazz').order_by(Venue.id)
+        assert [venue.id for venue in jazz] == [1, 3, 4, 5, 6]
+        assert filter_by_genre(Artist.query, Artist, 'Swing').one().name == 'Ella'
+        assert filter_by_genre(Venue.query, Venue, 'Polka').all() == []
+
+
+def test_genre_names_by_id(listings):
+    from models import Venue, Artist
+    from queries import genre_names_by_id
+    with listings.app_context():
+        assert genre_names_by_id(Venue, [1, 5, 7]) == {1: ['Jazz', 'Rock'], 5: ['Folk', 'Jazz'], 7: []}
+        assert genre_names_by_id(Artist, [3]) == {3: ['Jazz', 'Swing']}
+        assert genre_names_by_id(Venue, []) == {}
+
+
+@pytest.mark.parametrize('path, kind, expected', [
+    ('/venues?genre=Jazz', 'venues', [1, 3, 4, 5, 6]),
+    ('/venues?genre=Polka', 'venues', []),
+    ('/venues', 'venues', [1, 2, 3, 4, 5, 6, 7]),
+    ('/artists?genre=Jazz', 'artists', [1, 3]),
+    ('/artists?genre=Folk', 'artists', [2]),
+])
+def test_list_pages_filter_by_genre(listings, path, kind, expected):
+    response = listings.test_client().get(path)
+    assert response.status_code == 200
+    assert linked_ids(response.get_data(as_text=True), kind) == expected
+
+
+def api_pages(client, path):
+    pages = []
+    while path:
+        body = json.loads(client.get(path).data)
+        pages.append([entity['id'] for entity in body['data']])
+        path = body['next']
+    return pages
+
+
+@pytest.mark.parametrize('query, expected', [
+    ('genre=Jazz', [[1, 3], [4, 5], [6]]),
+    ('city=Austin&state=TX', [[1, 2], [4, 5], [7]]),
+    ('genre=Jazz&city=Austin&state=TX', [[1, 4], [5]]),
+    ('genre=Jazz&state=TX&after=3', [[4, 5]]),
+    ('genre=Rock&city=Dallas', [[]]),
+])
+def test_api_filters_combine_with_the_cursor(listings, query, expected):
+    assert api_pages(listings.test_client(), '/api/v1/venues?limit=2&' + query) == expected
+
+
+def test_api_filtered_pages_keep_their_filters(listings):
+    client = listings.test_client()
+    body = json.loads(client.get('/api/v1/venues?limit=1&genre=Folk&fields=id,genres').data)
+    assert body['data'] == [{'id': 5, 'genres': ['Folk', 'Jazz']}]
+    assert body['next'] is None
+    body = json.loads(client.get('/api/v1/artists?limit=1&genre=Jazz&state=TX&fields=id,name,genres').data)
+    assert body['data'] == [{'id': 1, 'name': 'Miles', 'genres': ['Jazz']}]
+    assert 'genre=Jazz' in body['next'] and 'state=TX' in body['next'] and 'after=1' in body['next']
+    assert api_pages(client, body['next']) == [[3]]
@@ -0,0 +1,42 @@
+import json
+
+from conftest import make_app
+
+VENUES_OK = 'fyyur_http_requests_total{endpoint="venues.venues",method="GET",status="200"}'
+
+
+def metric_lines(client):
+    response = client.get('/metrics')
+    assert response.mimetype == 'text/plain'
+    return response.get_data(as_text=True).splitlines()
+
+
+def test_requests_and_renders_are_counted(client, seed):
+    seed(venues=3, artists=3, shows=5)
+    client.get('/venues')
+    client.get('/venues')
+    lines = metric_lines(client)
+    assert VENUES_OK + ' 2' in lines
+    assert 'fyyur_http_request_duration_seconds_count{endpoint="venues.venues"} 2' in lines
+    assert 'fyyur_http_request_duration_seconds_bucket{endpoint="venues.venues",le="+Inf"} 2' in lines
+    assert 'fyyur_template_render_seconds_count{template="pages/venues.html"} 2' in lines
+    assert '# TYPE fyyur_http_requests_total counter' in lines
+    assert 'fyyur_response_cache_misses_total 2' in lines
+
+
+def test_worker_snapshots_are_summed(tmp_path, app):
+    directory = tmp_path / 'metrics'
+    worker = make_app(tmp_path, METRICS_DIR=str(directory))
+    client = worker.test_client()
+    client.get('/venues')
+    # A worker that has exited: its counters are kept, its gauges are not.
+    (directory / '999999999.json').write_text(json.dumps({
+        'pid': 999999999,
+        'counters': [['fyyur_http_requests_total',
+                      [['endpoint', 'venues.venues'], ['method', 'GET'], ['status', '200']], 3]],
+        'histograms': [],
+        'gauges': [['fyyur_db_pool_size', [], 5]],
+    }))
+    lines = metric_lines(client)
+    assert VENUES_OK + ' 4' in lines
+    assert not any('pid="999999999"' in line for line in lines)
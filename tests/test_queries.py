@@ -0,0 +1,84 @@
+import pytest
+
+
+# Statements each page may run, whatever the size of the data: the version
+# check of @conditional, then the page's own queries.
+@pytest.mark.parametrize('path, expected', [
+    ('/venues', 2),
+    ('/venues?genre=Jazz', 2),
+    ('/artists', 2),
+    ('/artists?genre=Jazz', 2),
+])
+@pytest.mark.parametrize('size', [5, 50])
+def test_directory_statements(client, seed, statements, path, expected, size):
+    seed(venues=size, artists=size, shows=size * 10)
+    statements.reset()
+    response = client.get(path)
+    assert response.status_code == 200
+    assert statements.count == expected, statements.statements
+
+
+def test_venue_directory_lists_each_area_once(app, client, seed):
+    from models import Venue
+    seed(venues=30, artists=10, shows=200)
+    page = client.get('/venues').get_data(as_text=True)
+    with app.app_context():
+        venues = Venue.query.all()
+    for city, state in set((venue.city, venue.state) for venue in venues):
+        assert page.count('<h3>{}, {}</h3>'.format(city, state)) == 1
+    for venue in venues:
+        assert 'href="/venues/{}"'.format(venue.id) in page
+
+
+# The version check, the entity, its genres, and its shows joined to their
+# venues or artists.
+DETAIL_STATEMENTS = 4
+
+
+def busiest(app, column):
+    from models import db, Shows
+    with app.app_context():
+        return (db.session.query(column).group_by(column)
+                .order_by(db.func.count(Shows.id).desc()).first()[0])
+
+
+@pytest.mark.parametrize('size', [5, 50])
+def test_venue_page_statements(app, client, seed, statements, size):
+    from models import Shows
+    seed(venues=size, artists=size, shows=size * 10)
+    venue_id = busiest(app, Shows.venue_id)
+    statements.reset()
+    response = client.get('/venues/{}'.format(venue_id))
+    assert response.status_code == 200
+    assert statements.count == DETAIL_STATEMENTS, statements.statements
+
+
+@pytest.mark.parametrize('size', [5, 50])
+def test_artist_page_statements(app, client, seed, statements, size):
+    from models import Shows
+    seed(venues=size, artists=size, shows=size * 10)
+    artist_id = busiest(app, Shows.artist_id)
+    statements.reset()
+    response = client.get('/artists/{}'.format(artist_id))
+    assert response.status_code == 200
+    assert statements.count == DETAIL_STATEMENTS, statements.statements
+
+
+def test_venue_page_splits_past_and_upcoming(app, client):
+    from datetime import datetime, timedelta
+    from models import db, Venue, Artist, Shows
+    now = datetime.now()
+    with app.app_context():
+        venue = Venue(name='The Hop', city='San Francisco', state='CA', address='1 Main St')
+        artist = Artist(name='Guns N Petals', city='San Francisco', state='CA')
+        db.session.add_all([venue, artist])
+        db.session.flush()
+        for days in (-20, -10, 10):
+            db.session.add(Shows(venue_id=venue.id, artist_id=artist.id,
+                                 start_time=now + timedelta(days=days)))
+        db.session.commit()
+        venue_id = venue.id
+    page = client.get('/venues/{}'.format(venue_id)).get_data(as_text=True)
+    assert '2 Past Shows' in page
+    assert '1 Upcoming Show' in page
+    assert page.count('Guns N Petals') == 3
@@ -0,0 +1,55 @@
+import pytest
+
+NAMES = ['The Musical Hop', 'Hop', '100% Jazz', '100 Jazz', 'A_B Club', 'AxB Club',
+         'Park Square Live', 'Hop', 'Hop Shop']
+
+
+@pytest.fixture
+def venues(app):
+    from models import db, Venue
+    with app.app_context():
+        db.session.add_all(Venue(name=name, city='Austin', state='TX', address='1 Main St')
+                           for name in NAMES)
+        db.session.commit()
+    return app
+
+
+def search(app, term):
+    from models import Venue
+    from queries import search_by_name
+    with app.app_context():
+        total, rows = search_by_name(Venue, term)
+        return total, [(row.id, row.name) for row in rows]
+
+
+@pytest.mark.parametrize('term, expected', [
+    ('%', ['100% Jazz']),
+    ('_', ['A_B Club']),
+    ('0 j', ['100 Jazz']),
+    ('\\', []),
+])
+def test_wildcards_are_literal(venues, term, expected):
+    total, rows = search(venues, term)
+    assert [name for _, name in rows] == expected
+    assert total == len(expected)
+
+
+def test_case_insensitive_partial_match(venues):
+    total, rows = search(venues, 'hOP')
+    assert total == 4
+    # Without pg_trgm: shortest name first, then name, then id.
+    assert rows == [(2, 'Hop'), (8, 'Hop'), (9, 'Hop Shop'), (1, 'The Musical Hop')]
+
+
+def test_results_are_limited_but_counted(venues):
+    venues.config['SEARCH_RESULT_LIMIT'] = 2
+    total, rows = search(venues, 'hop')
+    assert total == 4
+    assert rows == [(2, 'Hop'), (8, 'Hop')]
+
+
+def test_search_page(venues):
+    response = venues.test_client().post('/venues/search', data={'search_term': '100%'})
+    page = response.get_data(as_text=True)
+    assert '100% Jazz' in page
+    assert '100 Jazz' not in page
@@ -0,0 +1,35 @@
+from sqlalchemy import func
+
+
+def run_seed(app, *args):
+    return app.test_cli_runner().invoke(
+        args=['seed', '--venues', '4', '--artists', '6', '--shows', '30', '--batch-size', '7'] + list(args))
+
+
+def test_seed_fills_the_database_with_consistent_counters(app):
+    from models import db, Venue, Artist, Shows
+    result = run_seed(app)
+    assert result.exit_code == 0, result.output
+    assert 'Seeded 4 venues, 6 artists and 30 shows' in result.output
+    with app.app_context():
+        assert (Venue.query.count(), Artist.query.count(), Shows.query.count()) == (4, 6, 30)
+        for model, column in ((Venue, Shows.venue_id), (Artist, Shows.artist_id)):
+            shows = dict(db.session.query(column, func.count(Shows.id)).group_by(column))
+            for entity in model.query:
+                assert entity.past_shows_count + entity.upcoming_shows_count == shows.get(entity.id, 0)
+
+
+def test_seed_refuses_a_filled_database_without_reset(app):
+    from models import Shows
+    assert run_seed(app).exit_code == 0
+    with app.app_context():
+        first = [(show.venue_id, show.artist_id) for show in Shows.query.order_by(Shows.id)]
+
+    result = run_seed(app)
+    assert result.exit_code != 0
+    assert '--reset' in result.output
+
+    # The same --seed gives the same shows; start times move with the clock.
+    assert run_seed(app, '--reset').exit_code == 0
+    with app.app_context():
+        assert [(show.venue_id, show.artist_id) for show in Shows.query.order_by(Shows.id)] == first
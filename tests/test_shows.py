@@ -0,0 +1,64 @@
+import re
+from datetime import datetime
+from html import unescape
+
+import pytest
+
+from queries import decode_show_cursor, encode_show_cursor
+
+
+def test_cursor_round_trip():
+    start_time = datetime(2026, 10, 18, 20, 30, 15)
+    cursor = encode_show_cursor(start_time, 42)
+    assert decode_show_cursor(cursor) == (start_time, 42)
+
+
+def all_shows(app):
+    from models import Shows
+    with app.app_context():
+        return [show.id for show in Shows.query.order_by(Shows.start_time, Shows.id)]
+
+
+def test_pages_follow_the_cursors_both_ways(app, seed):
+    from queries import shows_page
+    seed(venues=3, artists=3, shows=25)
+    expected = all_shows(app)
+    with app.app_context():
+        first, prev_cursor, next_cursor = shows_page(10)
+        assert prev_cursor is None
+        second, prev_cursor, next_cursor = shows_page(10, after=next_cursor)
+        third, _, last_cursor = shows_page(10, after=next_cursor)
+        assert last_cursor is None
+        assert [show.id for show in first + second + third] == expected
+        # Back from the second page lands on the first again.
+        back, back_prev, _ = shows_page(10, before=prev_cursor)
+        assert [show.id for show in back] == [show.id for show in first]
+        assert back_prev is None
+
+
+PAGER_LINK = re.compile(r'<li class="(previous|next)"><a href="([^"]+)"')
+
+
+def page_links(response):
+    return dict((rel, unescape(href)) for rel, href in PAGER_LINK.findall(response.get_data(as_text=True)))
+
+
+def test_shows_page_links_across_a_page_boundary(client, seed):
+    seed(venues=3, artists=3, shows=12)
+    first = client.get('/shows?per_page=10')
+    assert first.status_code == 200
+    links = page_links(first)
+    assert list(links) == ['next']
+    second = client.get(links['next'])
+    assert second.get_data(as_text=True).count('tile-show') == 2
+    links = page_links(second)
+    assert list(links) == ['previous']
+    assert client.get(links['previous']).get_data(as_text=True).count('tile-show') == 10
+
+
+@pytest.mark.parametrize('query', [
+    'after=garbage', 'before=garbage', 'after=2026-13-01T00:00:00_1', 'after=2026-10-18T20:00:00_x',
+])
+def test_malformed_cursors_are_rejected(client, seed, query):
+    seed(venues=3, artists=3, shows=5)
+    assert client.get('/shows?' + query).status_code == 400
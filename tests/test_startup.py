@@ -0,0 +1,55 @@
+import os
+import subprocess
+import sys
+
+from sqlalchemy import text
+
+from benchmark_startup import import_times
+from conftest import ROOT, make_app
+
+# Generous enough for a loaded CI machine; `python benchmark_startup.py`
+# shows where the time goes when it is exceeded.
+IMPORT_BUDGET_MS = float(os.environ.get('FYYUR_IMPORT_BUDGET_MS', 2000))
+
+# Only the commands and requests that need these import them.
+LAZY_MODULES = ('dateutil', 'alembic', 'flask_migrate', 'PIL', 'xml.dom')
+
+
+def test_import_time():
+    times = import_times('app')
+    assert times['app'][1] / 1000.0 < IMPORT_BUDGET_MS
+    assert [name for name in times if name.startswith(LAZY_MODULES)] == []
+
+
+def test_import_builds_no_app(tmp_path):
+    # Only wsgi.py builds the default app, with its error.log handler.
+    result = subprocess.run(
+        [sys.executable, '-c', 'import logging, app; print(hasattr(app, "app"), logging.getLogger("app").handlers)'],
+        cwd=str(tmp_path), env=dict(os.environ, PYTHONPATH=ROOT),
+        stdout=subprocess.PIPE, universal_newlines=True, check=True)
+    assert result.stdout.split() == ['False', '[]']
+    assert os.listdir(str(tmp_path)) == []
+
+
+def test_apps_keep_their_own_extension_state(tmp_path):
+    first = make_app(tmp_path, RESPONSE_CACHE_BACKEND='memory', SUMMARY_CACHE_TTL=60)
+    second = make_app(tmp_path, RESPONSE_CACHE_BACKEND='null', SUMMARY_CACHE_TTL=1,
+                      IMAGE_FETCHER='local', IMAGE_LOCAL_DIR=str(tmp_path))
+
+    assert type(first.extensions['response_cache'].backend).__name__ == 'LRUCache'
+    assert type(second.extensions['response_cache'].backend).__name__ == 'NullCache'
+    assert first.extensions['summaries'].backend.ttl == 60
+    assert second.extensions['summaries'].backend.ttl == 1
+    assert type(first.extensions['images'].fetcher).__name__ == 'HTTPFetcher'
+    assert type(second.extensions['images'].fetcher).__name__ == 'LocalFetcher'
+
+
+def test_pool_listeners_are_not_stacked(tmp_path):
+    from models import db
+    for _ in range(3):
+        app = make_app(tmp_path)
+    registry = app.extensions['metrics'].registry
+    with app.app_context():
+        db.session.execute(text('SELECT 1'))
+        db.session.remove()
+    assert registry.counters[('fyyur_db_pool_checkouts_total', ())] == 1
@@ -0,0 +1,52 @@
+from conftest import make_app
+
+
+def rename_artist(app, artist_id, name, invalidate=True):
+    from models import db, Artist
+    with app.app_context():
+        Artist.query.get(artist_id).name = name
+        db.session.commit()
+        if invalidate:
+            app.extensions['summaries'].invalidate(Artist, artist_id)
+
+
+def test_summaries_are_reused_until_invalidated(tmp_path, seed):
+    from models import Artist
+    seed(venues=3, artists=3, shows=10)
+    worker = make_app(tmp_path, RESPONSE_CACHE_BACKEND='memory')
+    with worker.app_context():
+        cache = worker.extensions['summaries']
+        name = cache.get(Artist, 1).name
+        assert cache.get(Artist, 1).name == name
+        assert (cache.hits, cache.misses) == (1, 1)
+    rename_artist(worker, 1, 'Renamed Band')
+    with worker.app_context():
+        assert cache.get(Artist, 1).name == 'Renamed Band'
+        assert cache.misses == 2
+
+
+def test_invalidation_reaches_other_workers(tmp_path, seed):
+    seed(venues=3, artists=3, shows=10)
+    shared = dict(RESPONSE_CACHE_BACKEND='filesystem', RESPONSE_CACHE_DIR=str(tmp_path / 'pages'))
+    reader = make_app(tmp_path, **shared)
+    writer = make_app(tmp_path, **shared)
+    client = reader.test_client()
+    client.get('/shows?per_page=100')
+    rename_artist(writer, 1, 'Renamed Band')
+    assert b'Renamed Band' in client.get('/shows?per_page=100').data
+
+
+def test_detail_pages_read_counterparts_from_the_database(tmp_path, seed):
+    from models import Shows
+    seed(venues=3, artists=3, shows=10)
+    worker = make_app(tmp_path, RESPONSE_CACHE_BACKEND='memory')
+    with worker.app_context():
+        show = Shows.query.first()
+        venue_id, artist_id = show.venue_id, show.artist_id
+    client = worker.test_client()
+    client.get('/venues/{}'.format(venue_id))
+    client.get('/api/v1/venues/{}'.format(venue_id))
+    # Renamed by another worker, which invalidates nothing here.
+    rename_artist(worker, artist_id, 'Renamed Band', invalidate=False)
+    assert b'Renamed Band' in client.get('/venues/{}'.format(venue_id)).data
+    assert b'Renamed Band' in client.get('/api/v1/venues/{}'.format(venue_id)).data
@@ -0,0 +1,59 @@
+import os
+import stat
+
+from conftest import make_app
+from templating import source_environment, template_names
+
+
+def warm(app, *args):
+    return app.test_cli_runner().invoke(args=['templates', 'warm'] + list(args))
+
+
+def refuse_to_compile(app):
+    compiled = []
+
+    def compile(source, name=None, filename=None, *args, **kwargs):
+        compiled.append(name)
+        raise AssertionError('{} was compiled'.format(name))
+    app.jinja_env.compile = compile
+    return compiled
+
+
+def test_warm_fills_the_private_cache(tmp_path):
+    cache_dir = tmp_path / 'jinja-cache'
+    app = make_app(tmp_path, TEMPLATE_BYTECODE_CACHE_DIR=str(cache_dir))
+    result = warm(app)
+    assert result.exit_code == 0, result.output
+    names = template_names(source_environment(app))
+    assert 'Compiled {} templates'.format(len(names)) in result.output
+    assert stat.S_IMODE(os.stat(str(cache_dir)).st_mode) == 0o700
+    files = os.listdir(str(cache_dir))
+    assert len(files) == len(names)
+    assert all(stat.S_IMODE(os.stat(str(cache_dir / name)).st_mode) == 0o600 for name in files)
+
+
+def test_a_second_app_reuses_the_warm_cache(tmp_path):
+    cache_dir = str(tmp_path / 'jinja-cache')
+    assert warm(make_app(tmp_path, TEMPLATE_BYTECODE_CACHE_DIR=cache_dir)).exit_code == 0
+
+    app = make_app(tmp_path, TEMPLATE_BYTECODE_CACHE_DIR=cache_dir)
+    compiled = refuse_to_compile(app)
+    for name in template_names(source_environment(app)):
+        app.jinja_env.get_template(name)
+    assert compiled == []
+
+
+def test_warm_needs_a_destination(tmp_path):
+    result = warm(make_app(tmp_path))
+    assert result.exit_code != 0
+    assert 'TEMPLATE_BYTECODE_CACHE_DIR' in result.output
+
+
+def test_precompiled_modules_are_loaded(tmp_path):
+    modules_dir = str(tmp_path / 'templates')
+    assert warm(make_app(tmp_path), '--modules', modules_dir).exit_code == 0
+    app = make_app(tmp_path, TEMPLATE_MODULES_DIR=modules_dir)
+    compiled = refuse_to_compile(app)
+    with app.test_request_context('/'):
+        app.jinja_env.get_template('pages/home.html').render()
+    assert compiled == []
@@ -0,0 +1,113 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+import writebehind
+
+START = datetime.now() + timedelta(days=7)
+
+
+@pytest.fixture
+def writer(app, seed):
+    from models import db
+    seed(venues=3, artists=3, shows=0)
+    with app.app_context():
+        engine = db.get_engine()
+        # Rejections come from foreign keys, which SQLite only enforces when asked.
+        event.listen(engine, 'connect', lambda connection, record: connection.execute('PRAGMA foreign_keys=ON'))
+        engine.dispose()
+        writer = app.extensions['show_writer']
+        writer.lease_seconds = 0
+        yield writer
+        db.session.remove()
+
+
+def show_count():
+    from models import Shows
+    return Shows.query.count()
+
+
+def test_batch_is_saved_with_its_counters(writer):
+    from models import Venue
+    tokens = [writer.queue.put(1, 2, START) for _ in range(3)]
+    assert writer.drain_batch() == (3, 0)
+    statuses = [writer.queue.status(token) for token in tokens]
+    assert [status['state'] for status in statuses] == ['saved'] * 3
+    assert len(set(status['show_id'] for status in statuses)) == 3
+    assert Venue.query.get(2).upcoming_shows_count == 3
+
+
+def test_rejected_show_fails_alone(writer):
+    good = writer.queue.put(1, 1, START)
+    bad = writer.queue.put(1, 99, START)
+    assert writer.drain_batch() == (1, 1)
+    assert writer.queue.status(good)['state'] == 'saved'
+    assert writer.queue.status(bad)['state'] == 'failed'
+    assert show_count() == 1
+
+
+def test_reclaimed_show_is_not_inserted_twice(writer):
+    from models import db
+    token = writer.queue.put(1, 1, START)
+    # A writer that commits its batch and dies before marking it saved.
+    show_id = writer._insert(writer.queue.claim(10, 0))[token]
+    db.session.commit()
+    assert writer.drain_batch() == (1, 0)
+    assert writer.queue.status(token)['show_id'] == show_id
+    assert show_count() == 1
+
+
+def test_identical_reclaimed_submissions_are_separate_shows(writer):
+    tokens = [writer.queue.put(1, 1, START) for _ in range(2)]
+    # A writer that dies before committing its batch.
+    writer.queue.claim(10, 0)
+    assert writer.drain_batch() == (2, 0)
+    assert len(set(writer.queue.status(token)['show_id'] for token in tokens)) == 2
+    assert show_count() == 2
+
+
+def test_show_fails_after_max_attempts(writer):
+    token = writer.queue.put(1, 1, START)
+    for _ in range(writer.max_attempts):
+        writer.queue.claim(10, 0)
+    assert writer.drain_batch() == (0, 1)
+    status = writer.queue.status(token)
+    assert status['state'] == 'failed'
+    assert 'attempts' in status['error']
+    assert show_count() == 0
+
+
+def test_unavailable_database_leaves_the_batch_claimed(writer):
+    from models import db
+    token = writer.queue.put(1, 1, START)
+    db.session.execute('DROP TABLE show_submissions')
+    db.session.commit()
+    with pytest.raises(writebehind.DBAPIError):
+        writer.drain_batch()
+    assert writer.queue.status(token)['state'] == 'claimed'
+
+
+def test_run_backs_off_on_database_errors(app, writer, monkeypatch):
+    from models import db
+    writer.queue.put(1, 1, START)
+    db.session.execute('DROP TABLE show_submissions')
+    db.session.commit()
+    delays = []
+
+    class Stop(Exception):
+        pass
+
+    def sleep(seconds):
+        delays.append(seconds)
+        if len(delays) == 4:
+            raise Stop
+    monkeypatch.setattr(writebehind.time, 'sleep', sleep)
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=['show-queue', 'run', '--interval', '1'])
+    assert isinstance(result.exception, Stop)
+    assert delays == [1, 2, 4, 8]
+
+    result = runner.invoke(args=['show-queue', 'run', '--once'])
+    assert result.exit_code == 1
+    assert 'Cannot commit shows' in result.output
@@ -0,0 +1,4 @@
+#----------------------------------------------------------------------------#
+# HTML views, one blueprint per area. create_app() (app.py) registers them;
+# the JSON API lives in api.py.
+#----------------------------------------------------------------------------#
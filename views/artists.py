@@ -0,0 +1,230 @@
+#----------------------------------------------------------------------------#
+# Artists.
+#----------------------------------------------------------------------------#
+
+import sys
+from datetime import datetime
+
+from flask import Blueprint, render_template, request, flash, redirect, url_for
+
+from cache import conditional
+from extensions import response_cache, summaries
+from forms import ArtistForm
+from models import db, Artist
+from queries import (
+  get_or_create_genres, search_by_name, artist_list_version, artist_version,
+  filter_by_genre, artist_with_shows, split_shows)
+from views.pages import not_found_error
+
+bp = Blueprint('artists', __name__)
+
+@bp.route('/artists')
+@conditional(artist_list_version)
+@response_cache.cached('artists')
+def artists():
+  # TODO: replace with real data returned from querying the database
+  # ?genre=<name> narrows the list through the artist_genres index.
+  artist_query = Artist.query.with_entities(Artist.id, Artist.name)
+  genre = request.args.get('genre')
+  if genre:
+    artist_query = filter_by_genre(artist_query, Artist, genre)
+  data = artist_query.order_by(Artist.id).all()
+  return render_template('pages/artists.html', artists=data, genre=genre)
+
+@bp.route('/artists/search', methods=['POST'])
+def search_artists():
+  # TODO: implement search on artists with partial string search. Ensure it is case-insensitive.
+  # seach for "A" should return "Guns N Petals", "Matt Quevado", and "The Wild Sax Band".
+  # search for "band" should return "The Wild Sax Band".
+  count, search_result = search_by_name(Artist, request.form.get('search_term', ''))
+  response={
+    "count": count,
+    "data": []
+  }
+  for artist in search_result:
+    response['data'].append({
+      'id': artist.id,
+      'name': artist.name,
+      'num_upcoming_shows': artist.num_upcoming_shows
+    })
+  
+  return render_template('pages/search_artists.html', results=response, search_term=request.form.get('search_term', ''))
+
+@bp.route('/artists/<int:artist_id>')
+@conditional(artist_version)
+@response_cache.cached('artists')
+def show_artist(artist_id):
+  # shows the artist page with the given artist_id
+  # TODO: replace with real artist data from the artist table, using artist_id
+  
+  data={}
+  try:
+    artist_requested = artist_with_shows(artist_id)
+    
+    if artist_requested is None:
+      return not_found_error(404)
+    
+    genres = []
+    for option in artist_requested.genres:
+      genres.append(option.name)
+
+    past_shows = []
+    upcoming_shows = []
+    on_past_shows, on_upcoming_shows = split_shows(artist_requested.shows)
+    for shows_list, on_shows in ((past_shows, on_past_shows), (upcoming_shows, on_upcoming_shows)):
+      for show in on_shows:
+        shows_list.append({
+          'venue_id': show.venue.id,
+          'venue_name': show.venue.name,
+          'venue_image_link': show.venue.image_link,
+          'start_time': show.start_time
+        })
+    
+    data = {
+      "id": artist_requested.id,
+      "name": artist_requested.name,
+      "genres": genres,
+      "city": artist_requested.city,
+      "state": artist_requested.state,
+      "phone": artist_requested.phone,
+      "website": artist_requested.website_link,
+      "facebook_link": artist_requested.facebook_link,
+      "seeking_venue": artist_requested.seeking_venue,
+      "seeking_description": artist_requested.seeking_description,
+      "image_link": artist_requested.image_link,
+      "past_shows": past_shows,
+      "upcoming_shows": upcoming_shows,
+      "past_shows_count": len(past_shows),
+      "upcoming_shows_count": len(upcoming_shows)
+    }
+  except:
+    print(sys.exc_info())
+    flash('Error! Please try again.')
+  finally:
+    db.session.close()
+
+  
+  return render_template('pages/show_artist.html', artist=data)
+
+#  Update
+#  ----------------------------------------------------------------
+@bp.route('/artists/<int:artist_id>/edit', methods=['GET'])
+def edit_artist(artist_id):
+  form = ArtistForm()
+  
+  # TODO: populate form with fields from artist with ID <artist_id>
+  artist={}
+  try:
+    artist_edit = Artist.query.get(artist_id)
+    print(artist_edit)
+    if artist_edit is None:
+      return not_found_error(404)
+    
+    genres = []
+    if len(artist_edit.genres) > 0:
+      for option in artist_edit.genres:
+        genres.append(option.name)
+    
+    artist = {
+      "id": artist_edit.id,
+      "name": artist_edit.name,
+      "city": artist_edit.city,
+      "state": artist_edit.state,
+      "phone": artist_edit.phone,
+      "genres": genres,
+      "facebook_link": artist_edit.facebook_link,
+      "seeking_venue": artist_edit.seeking_venue,
+      "seeking_description": artist_edit.seeking_description,
+      "image_link": artist_edit.image_link,
+    }
+  except:
+    print(sys.exc_info())
+    flash('Please try again.')
+  finally:
+    db.session.close()
+
+  return render_template('forms/edit_artist.html', form=form, artist=artist)
+
+@bp.route('/artists/<int:artist_id>/edit', methods=['POST'])
+def edit_artist_submission(artist_id):
+  # TODO: take values from the form submitted, and update existing
+  # artist record with ID <artist_id> using the new attributes
+  form = ArtistForm(request.form)
+  try:
+    updating_artist = Artist.query.get(artist_id)
+
+    if updating_artist is None:
+      return not_found_error(404)
+    
+    updating_artist.name = form.name.data
+    updating_artist.city = form.city.data
+    updating_artist.state = form.state.data
+    updating_artist.phone = form.phone.data
+    updating_artist.facebook_link = form.facebook_link.data
+    updating_artist.genres = get_or_create_genres(form.genres.data)
+    updating_artist.image_link = form.image_link.data
+    updating_artist.website_link = form.website_link.data
+    updating_artist.updated_at = datetime.now()
+    db.session.commit()
+    summaries.invalidate(Artist, artist_id)
+    response_cache.invalidate('artists', 'venues')
+    flash('Artist updated successfully')
+  except:
+    db.session.rollback()
+    print(sys.exc_info())
+    flash('Artist was NOT updated, try again')
+  finally:
+    db.session.close()
+
+  return redirect(url_for('.show_artist', artist_id=artist_id))
+
+#  Create Artist
+#  ----------------------------------------------------------------
+
+@bp.route('/artists/create', methods=['GET'])
+def create_artist_form():
+  form = ArtistForm()
+  return render_template('forms/new_artist.html', form=form)
+
+@bp.route('/artists/create', methods=['POST'])
+def create_artist_submission():
+  # called upon submitting the new artist listing form
+  # TODO: insert form data as a new Venue record in the db, instead
+  # TODO: modify data to be the data object returned from db insertion
+  listing_artist = Artist()
+  listing_artist.name=request.form['name']    
+  listing_artist.city=request.form['city']
+  listing_artist.state=request.form['state']
+  listing_artist.phone=request.form['phone']
+  listing_artist.image_link=request.form['image_link']
+  listing_artist.facebook_link=request.form['facebook_link']
+  listing_artist.website_link=request.form['website_link']
+  listing_artist.genres=get_or_create_genres(request.form.getlist('genres'))
+
+  # new_artist = Artist(
+  #   name=name,
+  #   city=city,
+  #   state=state,
+  #   phone=phone,
+  #   image_link=image_link,
+  #   facebook_link=facebook_link,
+  #   website_link=website_link,
+  #   genres=genres
+  # )
+   
+  try:
+    db.session.add(listing_artist)
+    db.session.commit()
+    response_cache.invalidate('artists')
+
+  # on successful db insert, flash success
+    flash('Artist ' + request.form['name'] + ' was successfully listed!')
+  # TODO: on unsuccessful db insert, flash an error instead.
+  # e.g., flash('An error occurred. Artist ' + data.name + ' could not be listed.')
+  except:
+    db.session.rollback()
+    print(sys.exc_info())
+    flash('An error occurred, Artist ' + request.form['name'] + ' was NOT listed!')
+  finally:
+    db.session.close()
+    return render_template('pages/home.html')
@@ -0,0 +1,15 @@
+#----------------------------------------------------------------------------#
+# Home page and error pages.
+#----------------------------------------------------------------------------#
+
+from flask import render_template
+
+
+def index():
+  return render_template('pages/home.html')
+
+def not_found_error(error):
+    return render_template('errors/404.html'), 404
+
+def server_error(error):
+    return render_template('errors/500.html'), 500
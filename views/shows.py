@@ -0,0 +1,102 @@
+#----------------------------------------------------------------------------#
+# Shows.
+#----------------------------------------------------------------------------#
+
+import sys
+
+from flask import Blueprint, abort, current_app, render_template, request, flash, url_for
+
+from extensions import response_cache, show_writer, summaries
+from forms import ShowForm
+from models import db, Venue, Artist, Shows
+from queries import count_new_show, shows_page
+
+bp = Blueprint('shows', __name__)
+
+@bp.route('/shows')
+def shows():
+  # displays list of shows at /shows, one keyset page at a time.
+  # ?after=<cursor> pages forward and ?before=<cursor> pages back, where the
+  # cursor is the (start_time, id) of the last/first show on the current page.
+  per_page = request.args.get('per_page', current_app.config['SHOWS_PER_PAGE'], type=int)
+  per_page = max(1, min(per_page, current_app.config['SHOWS_MAX_PER_PAGE']))
+  after = request.args.get('after')
+  before = request.args.get('before')
+
+  try:
+    page, prev_cursor, next_cursor = shows_page(per_page, after=after, before=before)
+  except ValueError:
+    abort(400)
+  data=[]
+  for show in page:
+    data.append({
+      'venue_id': show.venue_id,
+      'venue_name': show.venue_name,
+      'artist_id': show.artist_id,
+      'artist_name': show.artist_name,
+      'artist_image_link': show.artist_image_link,
+      'start_time': show.start_time
+    })
+  return render_template('pages/shows.html', shows=data,
+    per_page=per_page, next_cursor=next_cursor, prev_cursor=prev_cursor)
+
+@bp.route('/shows/create')
+def create_shows():
+  # renders form. do not touch.
+  form = ShowForm()
+  return render_template('forms/new_show.html', form=form)
+
+@bp.route('/shows/create', methods=['POST'])
+def create_show_submission():
+  # called to create new shows in the db, upon submitting new show listing form
+  # TODO: insert form data as a new Show record in the db, instead
+  errors = {
+    'artist_id_invalid':False, 'venue_id_invalid':False}
+  # dateutil is only needed here; importing it lazily keeps worker start-up lean.
+  import dateutil.parser
+  try:
+    artist_id = int(request.form.get('artist_id'))
+    venue_id = int(request.form.get('venue_id'))
+    start_time = dateutil.parser.parse(request.form.get('start_time'))
+
+    if current_app.config['SHOWS_WRITE_BEHIND']:
+      # Queued for `flask show-queue run`; see writebehind.py.
+      token, errors = show_writer.submit(artist_id, venue_id, start_time)
+      if token is not None:
+        flash('Show was received and will be listed shortly. Status: {}'.format(
+          url_for('api_v1.pending_show', token=token)))
+      return render_template('pages/home.html')
+
+    # Summaries are enough to check that both exist (see summaries.py).
+    artist_available = summaries.get(Artist, artist_id)
+    if artist_available is None:
+      errors['artist_id_invalid'] = True
+    
+    venue_available = summaries.get(Venue, venue_id)
+    if venue_available is None:
+      errors['venue_id_invalid'] = True
+    
+    if artist_available is not None and venue_available is not None:
+      new_show = Shows(
+        artist_id = artist_available.id,
+        venue_id = venue_available.id,
+        start_time=start_time
+      )
+      db.session.add(new_show)
+      count_new_show(new_show.artist_id, new_show.venue_id, start_time)
+      db.session.commit()
+      response_cache.invalidate('venues', 'artists')
+  
+  # on successful db insert, flash success
+      flash('Show was successfully listed!')
+  # TODO: on unsuccessful db insert, flash an error instead.
+  except:
+      print(sys.exc_info())
+      db.session.rollback()
+      flash("Something went wrong! The show was NOT created.")
+
+  finally:
+      db.session.close()
+  # e.g., flash('An error occurred. Show could not be listed.')
+  # see: http://flask.pocoo.org/docs/1.0/patterns/flashing/
+  return render_template('pages/home.html')
@@ -0,0 +1,264 @@
+#----------------------------------------------------------------------------#
+# Venues.
+#----------------------------------------------------------------------------#
+
+import sys
+from datetime import datetime
+from itertools import groupby
+
+from flask import Blueprint, render_template, request, flash, redirect, url_for
+
+from cache import conditional
+from extensions import response_cache, summaries
+from forms import VenueForm
+from models import db, Venue
+from queries import (
+  get_or_create_genres, search_by_name, venue_list_version, venue_version,
+  filter_by_genre, venue_with_shows, split_shows)
+from views.pages import not_found_error
+
+bp = Blueprint('venues', __name__)
+
+@bp.route('/venues')
+@conditional(venue_list_version)
+@response_cache.cached('venues')
+def venues():
+  # One query: every venue with its upcoming show counter, ordered so that
+  # venues of the same city/state arrive next to each other.
+  # ?genre=<name> narrows the directory through the venue_genres index.
+  venue_query = db.session.query(
+    Venue.city,
+    Venue.state,
+    Venue.id,
+    Venue.name,
+    Venue.upcoming_shows_count.label('num_upcoming_shows'))
+  genre = request.args.get('genre')
+  if genre:
+    venue_query = filter_by_genre(venue_query, Venue, genre)
+  venue_rows = venue_query.order_by(Venue.state, Venue.city, Venue.id).all()
+
+  data = []
+  for (city, state), rows in groupby(venue_rows, key=lambda row: (row.city, row.state)):
+    venue_data = {'city': city, 'state': state, 'venues': []}
+    for row in rows:
+      venue_data['venues'].append({
+        'id': row.id,
+        'name': row.name,
+        'num_upcoming_shows': row.num_upcoming_shows
+      })
+    data.append(venue_data)
+  return render_template('pages/venues.html', areas=data, genre=genre);
+
+@bp.route('/venues/search', methods=['POST'])
+def search_venues():
+  # TODO: implement search on venues with partial string search. Ensure it is case-insensitive.
+  # seach for Hop should return "The Musical Hop".
+  # search for "Music" should return "The Musical Hop" and "Park Square Live Music & Coffee"
+  count, search_return = search_by_name(Venue, request.form.get('search_term', ''))
+  render_result={
+    "count": count,
+    "data": []
+  }
+  for venue in search_return:
+    render_result['data'].append({
+      'id': venue.id,
+      'name': venue.name,
+      'num_upcoming_shows': venue.num_upcoming_shows
+    })
+  return render_template('pages/search_venues.html', results=render_result, search_term=request.form.get('search_term', ''))
+
+@bp.route('/venues/<int:venue_id>')
+@conditional(venue_version)
+@response_cache.cached('venues')
+def show_venue(venue_id):
+  # shows the venue page with the given venue_id
+  # TODO: replace with real venue data from the venues table, using venue_id
+  data={}
+  try:
+    venue_requested = venue_with_shows(venue_id)
+    
+    if venue_requested is None:
+      return not_found_error(404)
+    
+    genres = []
+    for option in venue_requested.genres:
+      genres.append(option.name)
+
+    past_shows = []
+    upcoming_shows = []
+    on_past_shows, on_upcoming_shows = split_shows(venue_requested.shows)
+    for shows_list, on_shows in ((past_shows, on_past_shows), (upcoming_shows, on_upcoming_shows)):
+      for show in on_shows:
+        shows_list.append({
+          'artist_id': show.artist.id,
+          'artist_name': show.artist.name,
+          'artist_image_link': show.artist.image_link,
+          'start_time': show.start_time
+        })
+    
+    data = {
+      "id": venue_requested.id,
+      "name": venue_requested.name,
+      "genres": genres,
+      "address": venue_requested.address,
+      "city": venue_requested.city,
+      "state": venue_requested.state,
+      "phone": venue_requested.phone,
+      "website": venue_requested.website_link,
+      "facebook_link": venue_requested.facebook_link,
+      "seeking_talent": venue_requested.seeking_talent,
+      "seeking_description": venue_requested.seeking_description,
+      "image_link": venue_requested.image_link,
+      "past_shows": past_shows,
+      "upcoming_shows": upcoming_shows,
+      "past_shows_count": len(past_shows),
+      "upcoming_shows_count": len(upcoming_shows)
+    }
+  except:
+    print(sys.exc_info())
+    flash('Error! Please try again.')
+  finally:
+    db.session.close()
+
+  
+  return render_template('pages/show_venue.html', venue=data)
+
+#  Create Venue
+#  ----------------------------------------------------------------
+
+@bp.route('/venues/create', methods=['GET'])
+def create_venue_form():
+  form = VenueForm()
+  return render_template('forms/new_venue.html', form=form)
+
+@bp.route('/venues/create', methods=['POST'])
+def create_venue_submission():
+  # TODO: insert form data as a new Venue record in the db, instead
+  # TODO: modify data to be the data object returned from db insertion
+  form = VenueForm(request.form)
+  try:
+    name=form.name.data    
+    city=form.city.data
+    state=form.state.data
+    address=form.address.data
+    phone=form.phone.data
+    image_link=form.image_link.data
+    facebook_link=form.facebook_link.data
+    website_link=form.website_link.data
+    genres=get_or_create_genres(form.genres.data)
+
+    new_venue = Venue(
+      name=name,
+      city=city,
+      state=state,
+      address=address,
+      phone=phone,
+      image_link=image_link,
+      facebook_link=facebook_link,
+      website_link=website_link,
+      genres=genres
+    )
+    db.session.add(new_venue)
+    db.session.commit()
+    response_cache.invalidate('venues')
+  
+  # on successful db insert, flash success
+    flash('Venue ' + request.form['name'] + ' was successfully listed!')
+  # TODO: on unsuccessful db insert, flash an error instead.
+  # e.g., flash('An error occurred. Venue ' + data.name + ' could not be listed.')
+  # see: http://flask.pocoo.org/docs/1.0/patterns/flashing/
+  except:
+    db.session.rollback()
+    print(sys.exc_info())
+    flash(' An error occurred, Venue ' + request.form['name'] + ' was NOT listed!')
+  finally:
+    db.session.close()
+    return render_template('pages/home.html')
+
+@bp.route('/venues/<venue_id>', methods=['DELETE'])
+def delete_venue(venue_id):
+  # TODO: Complete this endpoint for taking a venue_id, and using
+  # SQLAlchemy ORM to delete a record. Handle cases where the session commit could fail.
+  required_venue = Venue.query.get(venue_id).name
+  try:
+    delete_venue = db.session.query(Venue).filter(Venue.id==venue_id)
+    delete_venue.delete()
+    db.session.commit()
+    summaries.invalidate(Venue, venue_id)
+    response_cache.invalidate('venues', 'artists')
+    flash('The venue ' + required_venue + ' was deleted successfully.')
+  except:
+    db.session.rollback()
+    flash('Error!. This venue was not successfully deleted.')
+  finally:
+    db.session.close()
+
+  # BONUS CHALLENGE: Implement a button to delete a Venue on a Venue Page, have it so that
+  # clicking that button delete it from the db then redirect the user to the homepage
+  return None
+
+#  Update
+#  ----------------------------------------------------------------
+@bp.route('/venues/<int:venue_id>/edit', methods=['GET'])
+def edit_venue(venue_id):
+  form = VenueForm()
+  venue = {}
+  # TODO: populate form with values from venue with ID <venue_id>
+  # try:
+  venue_needed = Venue.query.get(venue_id)
+    # if  venue_needed is None:
+    #   return not_found_error(404)
+    # genres = []
+    # if len(venue_needed.genres) > 0:
+    #   for option in venue_needed.genres:
+    #     genres.append(option.genre)
+  venue = {
+      'id': venue_needed.id,
+      'name': venue_needed.name,
+      'genres': [genre.name for genre in venue_needed.genres],
+      'address': venue_needed.address,
+      'city': venue_needed.city,
+      'state': venue_needed.state,
+      'phone': venue_needed.phone,
+      'website_link': venue_needed.website_link,
+      'facebook_link': venue_needed.facebook_link,
+      'seeking_talent': venue_needed.seeking_talent,
+      'seeking_description': venue_needed.seeking_description,
+      'image_link': venue_needed.image_link,
+    }
+  # except:
+  #   db.session.rollback()
+  #   print(sys.exc_info())
+  #   flash('Please try again!!!')
+  # finally:
+  #   db.session.close()
+  return render_template('forms/edit_venue.html', form=form, venue=venue)
+
+@bp.route('/venues/<int:venue_id>/edit', methods=['POST'])
+def edit_venue_submission(venue_id):
+  # TODO: take values from the form submitted, and update existing
+  # venue record with ID <venue_id> using the new attributes
+  form = VenueForm(request.form)
+  edited_venue = Venue.query.get(venue_id)
+  edited_venue.name = form.name.data
+  edited_venue.city = form.city.data
+  edited_venue.state = form.state.data
+  edited_venue.address = form.address.data
+  edited_venue.phone = form.phone.data
+  edited_venue.facebook_link = form.facebook_link.data
+  edited_venue.genres = get_or_create_genres(form.genres.data)
+  edited_venue.image_link = form.image_link.data
+  edited_venue.website_link = form.website_link.data
+  edited_venue.updated_at = datetime.now()
+
+  try:
+    db.session.commit()
+    summaries.invalidate(Venue, venue_id)
+    response_cache.invalidate('venues', 'artists')
+    flash('You venue ' + request.form['name'] + ' was successfully updated!')
+  except:
+    db.session.rollback()
+    flash('An error occurred. Venue ' + edited_venue.name + ' could not be updated.')
+  finally:
+    db.session.close()
+  return redirect(url_for('.show_venue', venue_id=venue_id))
@@ -0,0 +1,343 @@
+#----------------------------------------------------------------------------#
+# Write-behind show creation.
+#
+# With SHOWS_WRITE_BEHIND=1, POST /shows/create checks the artist and venue
+# ids against the summary cache (see summaries.py), appends the show to a
+# SQLite queue (SHOWS_QUEUE_PATH) and returns without touching the main
+# database unless an id is not cached.
+# `flask show-queue run` commits queued shows in batches of
+# SHOWS_QUEUE_BATCH_SIZE, one transaction per batch, and records the id of
+# each new show; GET /api/v1/shows/pending/<token> reports whether a
+# submission is queued, saved or failed.
+#
+# Shows are claimed for SHOWS_QUEUE_LEASE_SECONDS. A batch whose writer dies
+# is claimed again after that. Each show is inserted with a show_submissions
+# row holding its token, so a show that is claimed again after its batch was
+# committed is not inserted twice; identical submissions are separate shows.
+#
+# A batch that fails with a database error is retried one show at a time.
+# Shows the database rejects (e.g. one whose venue was deleted after it was
+# queued) fail; the others are committed, or stay claimed and are retried
+# when their lease lapses, and fail after SHOWS_QUEUE_MAX_ATTEMPTS claims.
+# When no show of a batch can be committed, e.g. because the database is
+# down, `flask show-queue run` logs the error and backs off.
+#----------------------------------------------------------------------------#
+
+import os
+import sqlite3
+import time
+import uuid
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy.exc import DataError, DBAPIError, IntegrityError
+
+from models import db, Venue, Artist, Shows, ShowSubmission
+from queries import count_new_show
+
+show_queue_cli = AppGroup('show-queue', help='Commit shows queued by the write-behind mode.')
+
+PendingShow = namedtuple('PendingShow', 'token artist_id venue_id start_time attempts')
+
+# Errors that retrying the same show cannot fix.
+REJECTED = (IntegrityError, DataError)
+# Longest wait of `flask show-queue run` after a failed batch.
+MAX_BACKOFF_SECONDS = 60
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS pending_shows (
+  token TEXT PRIMARY KEY,
+  artist_id INTEGER NOT NULL,
+  venue_id INTEGER NOT NULL,
+  start_time TEXT NOT NULL,
+  state TEXT NOT NULL DEFAULT 'queued',
+  attempts INTEGER NOT NULL DEFAULT 0,
+  claimed_until REAL,
+  show_id INTEGER,
+  error TEXT,
+  enqueued_at REAL NOT NULL,
+  updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_pending_shows_state ON pending_shows (state, enqueued_at);
+'''
+
+
+class PendingShows(object):
+    """Durable queue of submitted shows in a SQLite file shared by all workers."""
+
+    def __init__(self, path, timeout=10):
+        self.path = path
+        self.timeout = timeout
+        self._ready = False
+
+    def _connect(self):
+        # One connection per call: the queue is used from request threads and
+        # the writer, and SQLite connections are not shared between threads.
+        if not self._ready:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+        connection.row_factory = sqlite3.Row
+        if not self._ready:
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.executescript(SCHEMA)
+            self._ready = True
+        return connection
+
+    def put(self, artist_id, venue_id, start_time):
+        token = uuid.uuid4().hex
+        now = time.time()
+        connection = self._connect()
+        try:
+            connection.execute(
+                'INSERT INTO pending_shows (token, artist_id, venue_id, start_time, enqueued_at, updated_at)'
+                ' VALUES (?, ?, ?, ?, ?, ?)',
+                (token, artist_id, venue_id, start_time.isoformat(), now, now))
+        finally:
+            connection.close()
+        return token
+
+    def claim(self, limit, lease_seconds):
+        """Up to limit queued shows, or shows whose claim has lapsed, oldest first."""
+        now = time.time()
+        connection = self._connect()
+        try:
+            connection.execute('BEGIN IMMEDIATE')
+            rows = connection.execute(
+                "SELECT token, artist_id, venue_id, start_time, attempts FROM pending_shows"
+                " WHERE state = 'queued' OR (state = 'claimed' AND claimed_until < ?)"
+                " ORDER BY enqueued_at LIMIT ?", (now, limit)).fetchall()
+            connection.executemany(
+                "UPDATE pending_shows SET state = 'claimed', attempts = attempts + 1,"
+                " claimed_until = ?, updated_at = ? WHERE token = ?",
+                [(now + lease_seconds, now, row['token']) for row in rows])
+            connection.execute('COMMIT')
+        except BaseException:
+            if connection.in_transaction:
+                connection.execute('ROLLBACK')
+            raise
+        finally:
+            connection.close()
+        return [PendingShow(row['token'], row['artist_id'], row['venue_id'],
+                            datetime.fromisoformat(row['start_time']), row['attempts'] + 1)
+                for row in rows]
+
+    def _finish(self, updates):
+        if not updates:
+            return
+        now = time.time()
+        connection = self._connect()
+        try:
+            connection.execute('BEGIN IMMEDIATE')
+            connection.executemany(
+                'UPDATE pending_shows SET state = ?, show_id = ?, error = ?,'
+                ' claimed_until = NULL, updated_at = ? WHERE token = ?',
+                [(state, show_id, error, now, token) for token, state, show_id, error in updates])
+            connection.execute('COMMIT')
+        finally:
+            connection.close()
+
+    def mark_saved(self, show_ids):
+        self._finish([(token, 'saved', show_id, None) for token, show_id in show_ids.items()])
+
+    def mark_failed(self, errors):
+        self._finish([(token, 'failed', None, error) for token, error in errors.items()])
+
+    def status(self, token):
+        connection = self._connect()
+        try:
+            row = connection.execute(
+                'SELECT token, artist_id, venue_id, start_time, state, attempts, show_id, error,'
+                ' enqueued_at, updated_at FROM pending_shows WHERE token = ?', (token,)).fetchone()
+        finally:
+            connection.close()
+        return dict(row) if row is not None else None
+
+    def counts(self):
+        connection = self._connect()
+        try:
+            return dict(connection.execute(
+                'SELECT state, COUNT(*) FROM pending_shows GROUP BY state').fetchall())
+        finally:
+            connection.close()
+
+    def purge(self, older_than_seconds):
+        # Saved and failed entries are only kept for the status endpoint.
+        connection = self._connect()
+        try:
+            return connection.execute(
+                "DELETE FROM pending_shows WHERE state IN ('saved', 'failed') AND updated_at < ?",
+                (time.time() - older_than_seconds,)).rowcount
+        finally:
+            connection.close()
+
+
+class ShowWriter(object):
+    """Queues show submissions and commits them in batches."""
+
+    def __init__(self, queue, batch_size=100, lease_seconds=60, max_attempts=5):
+        self.queue = queue
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+
+    def submit(self, artist_id, venue_id, start_time):
+        """Queue a show; returns its token and the form's errors dict."""
+        summaries = current_app.extensions['summaries']
+        errors = {
+            'artist_id_invalid': summaries.get(Artist, artist_id) is None,
+            'venue_id_invalid': summaries.get(Venue, venue_id) is None,
+        }
+        if any(errors.values()):
+            return None, errors
+        return self.queue.put(artist_id, venue_id, start_time), errors
+
+    def _submitted(self, pending):
+        # {token: show id} of the shows an earlier claim already committed.
+        tokens = [entry.token for entry in pending if entry.attempts > 1]
+        if not tokens:
+            return {}
+        return dict(db.session.query(ShowSubmission.token, ShowSubmission.show_id)
+                    .filter(ShowSubmission.token.in_(tokens)))
+
+    def _insert(self, pending):
+        # {token: show id}, in the current transaction.
+        show_ids = self._submitted(pending)
+        new_shows = {}
+        for entry in pending:
+            if entry.token not in show_ids:
+                new_shows[entry.token] = Shows(artist_id=entry.artist_id, venue_id=entry.venue_id,
+                                               start_time=entry.start_time)
+        db.session.add_all(new_shows.values())
+        # One counter update per artist, venue and side of now, not per show.
+        now = datetime.now()
+        groups = {}
+        for show in new_shows.values():
+            key = (show.artist_id, show.venue_id, show.start_time > now)
+            start_time, count = groups.get(key, (show.start_time, 0))
+            groups[key] = (start_time, count + 1)
+        for (artist_id, venue_id, _), (start_time, count) in groups.items():
+            count_new_show(artist_id, venue_id, start_time, count)
+        db.session.flush()
+        db.session.add_all(ShowSubmission(token=token, show_id=show.id)
+                           for token, show in new_shows.items())
+        db.session.flush()
+        show_ids.update((token, show.id) for token, show in new_shows.items())
+        return show_ids
+
+    def drain_batch(self):
+        """Commit one batch; returns the number of shows saved and failed.
+
+        Raises the database error when none of the batch could be committed.
+        """
+        pending = self.queue.claim(self.batch_size, self.lease_seconds)
+        if not pending:
+            return 0, 0
+        # Shows claimed too often fail, unless a claim did commit them.
+        exhausted = [entry for entry in pending if entry.attempts > self.max_attempts]
+        pending = [entry for entry in pending if entry.attempts <= self.max_attempts]
+        saved = {}
+        failed = {}
+        try:
+            if exhausted:
+                saved = self._submitted(exhausted)
+                for entry in exhausted:
+                    if entry.token not in saved:
+                        failed[entry.token] = 'Gave up after {} attempts'.format(self.max_attempts)
+            saved.update(self._insert(pending))
+            db.session.commit()
+        except DBAPIError:
+            db.session.rollback()
+            # One show at a time; shows that fail for another reason than
+            # their own data stay claimed until their lease lapses.
+            retry_error = None
+            for entry in pending:
+                try:
+                    saved.update(self._insert([entry]))
+                    db.session.commit()
+                except REJECTED as error:
+                    db.session.rollback()
+                    failed[entry.token] = str(error.orig)
+                except DBAPIError as error:
+                    db.session.rollback()
+                    retry_error = error
+            if retry_error is not None and not saved and not failed:
+                raise retry_error
+        except BaseException:
+            db.session.rollback()
+            raise
+        self.queue.mark_saved(saved)
+        self.queue.mark_failed(failed)
+        if saved:
+            current_app.extensions['response_cache'].invalidate('venues', 'artists')
+        return len(saved), len(failed)
+
+    def purge(self, older_than_seconds):
+        """Forget finished queue entries and the tokens of shows saved long ago."""
+        self.queue.purge(older_than_seconds)
+        ShowSubmission.query.filter(
+            ShowSubmission.created_at < datetime.now() - timedelta(seconds=older_than_seconds)
+        ).delete(synchronize_session=False)
+        db.session.commit()
+
+
+class ShowWriteBehind(object):
+    """The ShowWriter of the current app (app.extensions['show_writer'])."""
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        path = app.config.get('SHOWS_QUEUE_PATH')
+        if path is None:
+            path = os.path.join(app.instance_path, 'show_queue.sqlite3')
+        app.extensions['show_writer'] = ShowWriter(
+            PendingShows(path),
+            app.config.get('SHOWS_QUEUE_BATCH_SIZE', 100),
+            app.config.get('SHOWS_QUEUE_LEASE_SECONDS', 60),
+            app.config.get('SHOWS_QUEUE_MAX_ATTEMPTS', 5))
+
+    def submit(self, artist_id, venue_id, start_time):
+        return current_app.extensions['show_writer'].submit(artist_id, venue_id, start_time)
+
+
+@show_queue_cli.command('run', help='Commit queued shows until stopped.')
+@click.option('--once', is_flag=True, help='Stop when the queue is empty.')
+@click.option('--interval', default=1.0, show_default=True,
+              help='Seconds to wait when the queue is empty.')
+def run_command(once, interval):
+    writer = current_app.extensions['show_writer']
+    retain_seconds = current_app.config.get('SHOWS_QUEUE_RETAIN_SECONDS', 86400)
+    backoff = interval
+    while True:
+        started = time.perf_counter()
+        try:
+            saved, failed = writer.drain_batch()
+            if not (saved or failed):
+                writer.purge(retain_seconds)
+        except (DBAPIError, sqlite3.Error) as error:
+            if once:
+                raise click.ClickException('Cannot commit shows: {}'.format(error))
+            current_app.logger.error('Cannot commit shows, retrying in {:.0f}s: {}'.format(backoff, error))
+            time.sleep(backoff)
+            backoff = min(backoff * 2, MAX_BACKOFF_SECONDS)
+            continue
+        finally:
+            db.session.remove()
+        backoff = interval
+        if saved or failed:
+            click.echo('Committed {} shows ({} failed) in {:.3f}s.'.format(
+                saved, failed, time.perf_counter() - started))
+            continue
+        if once:
+            break
+        time.sleep(interval)
+
+@show_queue_cli.command('status', help='Count queued, claimed, saved and failed shows.')
+def status_command():
+    counts = current_app.extensions['show_writer'].queue.counts()
+    for state in ('queued', 'claimed', 'saved', 'failed'):
+        click.echo('{:<8} {}'.format(state, counts.get(state, 0)))
@@ -0,0 +1,12 @@
+#----------------------------------------------------------------------------#
+# The default app, built from config.py and the environment. Importing app
+# only defines create_app(); this module is what servers and the flask
+# command load:
+#
+#   gunicorn wsgi:app
+#   flask run                (finds wsgi.py; or FLASK_APP=wsgi)
+#----------------------------------------------------------------------------#
+
+from app import create_app
+
+app = create_app()